@@ -3,6 +3,8 @@ from django.contrib import admin
 # Added after the project generated.
 from .models import Note
 from .models import Category
+from .models import Job
 
 admin.site.register(Note)
 admin.site.register(Category)
+admin.site.register(Job)
@@ -0,0 +1,301 @@
+"""
+JSON API for 'sticky-notes', used by the sync clients and import scripts.
+
+Every request works on a batch of notes, written in a single transaction with
+bulk inserts/updates, so syncing thousands of notes takes one round trip
+rather than one form post (and dashboard redirect) per note.
+
+The API uses the same session login as the website. Requests that change
+notes need Django's CSRF token, sent in the 'X-CSRFToken' header.
+"""
+
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_http_methods
+
+from .changes import get_changes, stamp_notes
+from .conditional import get_board_state
+from .forms import NoteForm
+from .models import Note
+from .pagination import KeysetPage, get_page_size
+from .signals import bulk_delete_notes, notes_bulk_saved
+
+NOTE_API_FIELDS = (
+    "title",
+    "content",
+    "category",
+    "created_at",
+    "updated_at",
+    "version",
+)
+
+
+def serialize_note(note):
+    """
+    Turns a 'sticky-note' into a compact, JSON-ready dictionary.
+
+    :param note: Note object.
+    :return: Dictionary of the note's fields.
+    """
+
+    return {
+        "id": note.pk,
+        "title": note.title,
+        "content": note.content,
+        "category": note.category_id,
+        "created_at": note.created_at.isoformat(),
+        "updated_at": note.updated_at.isoformat(),
+        "version": note.version,
+    }
+
+
+def error(message, status=400, **extra):
+    return JsonResponse({"error": message, **extra}, status=status)
+
+
+def read_batch(request, key):
+    """
+    Reads a batch of items from a JSON request body, i.e. {"notes": [...]}.
+
+    :param request: HTTP request object.
+    :param key: Name of the list in the JSON body.
+    :return: Tuple of (items, error response), one of which is None.
+    """
+
+    try:
+        body = json.loads(request.body)
+    except ValueError:
+        return None, error("The request body is not valid JSON.")
+    items = body.get(key) if isinstance(body, dict) else None
+    if not isinstance(items, list):
+        return None, error(f"The request body needs a '{key}' list.")
+    max_batch = getattr(settings, "NOTEY_API_MAX_BATCH", 500)
+    if len(items) > max_batch:
+        return None, error(f"Send at most {max_batch} {key} per request.")
+    return items, None
+
+
+def check_ids(ids):
+    """
+    :param ids: List of the note ids sent.
+    :return: Error response if an id is not a whole number, or is sent
+    twice, None if the ids are valid.
+    """
+
+    # JSON true and false are read as bools, which Python counts as ints.
+    if not all(type(pk) is int for pk in ids):
+        return error("Each id must be a whole number.")
+    if len(set(ids)) != len(ids):
+        return error("Each id may only be sent once.")
+    return None
+
+
+def validate_forms(forms):
+    """
+    :param forms: List of bound NoteForms, one per item in the batch.
+    :return: Error response listing each invalid item, or None if all valid.
+    """
+
+    errors = {
+        index: form.errors.get_json_data()
+        for index, form in enumerate(forms)
+        if not form.is_valid()
+    }
+    if errors:
+        return error("Some notes are not valid.", errors=errors)
+    return None
+
+
+@require_http_methods(["GET", "POST", "PATCH", "DELETE"])
+def api_notes(request):
+    """
+    API view to list, create, update and delete the user's 'sticky-notes'.
+
+    - GET: A page of notes, oldest first. Pass the returned 'next' cursor as
+      'after' to get the following page, and 'count', the number of notes
+      the user has.
+    - POST: Creates the notes in {"notes": [{"title", "content",
+      "category"}, ...]}.
+    - PATCH: Updates the notes in {"notes": [{"id", ...}, ...]}, only the
+      fields given for each note are changed. A note given with the
+      'version' it was read at is only changed if it has not been changed
+      since, otherwise nothing is saved and the conflicting ids are returned
+      with a 409 status.
+    - DELETE: Deletes the notes in {"ids": [...]}.
+
+    :param request: HTTP request object.
+    :return: JSON response.
+    """
+
+    if not request.user.is_authenticated:
+        return error("You are not logged in.", status=401)
+    if request.method == "POST":
+        return create_notes(request)
+    if request.method == "PATCH":
+        return update_notes(request)
+    if request.method == "DELETE":
+        return delete_notes(request)
+    page = KeysetPage(
+        Note.objects.filter(user_id=request.user.id).only(*NOTE_API_FIELDS),
+        cursor=request.GET.get("after"),
+        page_size=get_page_size(request),
+        total=get_board_state(request)["count"],
+    )
+    return JsonResponse(
+        {
+            "notes": [serialize_note(note) for note in page],
+            "next": page.next_cursor,
+            "count": page.total,
+        }
+    )
+
+
+@require_http_methods(["GET"])
+def api_changes(request):
+    """
+    API view listing what changed on the user's board since a client last
+    synced, so it does not have to download the whole board again.
+
+    - GET: The notes created or edited, and the ids of the notes deleted,
+      after change number 'since' (0, the default, for the whole board), in
+      the order they changed, a page at a time. Pass the returned 'seq' as
+      'since' next time; 'more' is true while there are changes left.
+
+    :param request: HTTP request object.
+    :return: JSON response.
+    """
+
+    if not request.user.is_authenticated:
+        return error("You are not logged in.", status=401)
+    try:
+        since = int(request.GET.get("since", 0))
+    except ValueError:
+        since = -1
+    if since < 0:
+        return error("'since' must be a whole number, 0 or more.")
+    notes, deleted, seq, more = get_changes(
+        request.user.id,
+        since,
+        get_page_size(request),
+        fields=NOTE_API_FIELDS,
+    )
+    return JsonResponse(
+        {
+            "notes": [serialize_note(note) for note in notes],
+            "deleted": deleted,
+            "seq": seq,
+            "more": more,
+        }
+    )
+
+
+def create_notes(request):
+    items, response = read_batch(request, "notes")
+    if response:
+        return response
+    forms = [NoteForm(data=item) for item in items if isinstance(item, dict)]
+    if len(forms) != len(items):
+        return error("Each note must be a JSON object.")
+    response = validate_forms(forms)
+    if response:
+        return response
+    notes = []
+    for form in forms:
+        note = form.save(commit=False)
+        note.user = request.user
+        notes.append(note)
+    with transaction.atomic():
+        stamp_notes(notes)
+        Note.objects.bulk_create(notes)
+        notes_bulk_saved.send(sender=Note, notes=notes, created=True)
+    return JsonResponse(
+        {"notes": [serialize_note(note) for note in notes]}, status=201
+    )
+
+
+def update_notes(request):
+    items, response = read_batch(request, "notes")
+    if response:
+        return response
+    if not all(isinstance(item, dict) and "id" in item for item in items):
+        return error("Each note must be a JSON object with an 'id'.")
+    ids = [item["id"] for item in items]
+    response = check_ids(ids)
+    if response:
+        return response
+    with transaction.atomic():
+        # Locked, so the versions cannot change before the update.
+        notes = (
+            Note.objects.select_for_update()
+            .filter(user_id=request.user.id)
+            .in_bulk(ids)
+        )
+        missing = [pk for pk in ids if pk not in notes]
+        if missing:
+            return error("Notes not found.", status=404, ids=missing)
+        conflicts = [
+            item["id"]
+            for item in items
+            if "version" in item
+            and item["version"] != notes[item["id"]].version
+        ]
+        if conflicts:
+            return error(
+                "Notes were changed since they were read.",
+                status=409,
+                ids=conflicts,
+            )
+        forms = []
+        changed = set()
+        for item in items:
+            note = notes[item["id"]]
+            data = {
+                "title": note.title,
+                "content": note.content,
+                "category": note.category_id,
+            }
+            fields = set(item) & set(data)
+            data.update({field: item[field] for field in fields})
+            forms.append(NoteForm(data=data, instance=note))
+            changed |= fields
+        response = validate_forms(forms)
+        if response:
+            return response
+        updated = [form.save(commit=False) for form in forms]
+        if changed:
+            # bulk_update skips auto_now, so updated_at is set here.
+            now = timezone.now()
+            for note in updated:
+                note.updated_at = now
+                note.version += 1
+            stamp_notes(updated)
+            Note.objects.bulk_update(
+                updated,
+                sorted(changed | {"updated_at", "version", "change_seq"}),
+            )
+            notes_bulk_saved.send(sender=Note, notes=updated, created=False)
+    return JsonResponse({"notes": [serialize_note(note) for note in updated]})
+
+
+def delete_notes(request):
+    ids, response = read_batch(request, "ids")
+    if response:
+        return response
+    response = check_ids(ids)
+    if response:
+        return response
+    with transaction.atomic():
+        # Deleted in bulk, sending notes_bulk_deleted once for the search
+        # index, the board counters, the tombstones and open boards, rather
+        # than post_delete for each note.
+        notes = list(
+            Note.objects.select_for_update()
+            .filter(user_id=request.user.id, pk__in=ids)
+            .only("user", "category")
+        )
+        bulk_delete_notes(notes)
+    return JsonResponse({"deleted": len(notes)})
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class NoteyConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "notey"
+
+    def ready(self):
+        # Connects the signal receivers (see signals.py).
+        from . import signals  # noqa: F401
@@ -0,0 +1,141 @@
+"""
+Compressed downloads of a user's 'sticky-notes' (see the note_export view).
+
+Notes are read with a database cursor a chunk at a time (see
+transfer.export_rows), compressed as they arrive and streamed out, so the
+web worker holds one chunk of notes at a time however big the board is.
+
+Two archives are offered:
+- json: The notes as JSON Lines (one note per line, as export_notes writes
+  them), gzip compressed.
+- markdown: A zip file holding one Markdown file per note.
+"""
+
+import io
+import json
+import zipfile
+import zlib
+from datetime import datetime
+
+from django.utils.text import slugify
+
+# Bytes gathered before a piece of the zip file is sent on.
+CHUNK_SIZE = 64 * 1024
+
+
+class GzipJsonLines:
+    """
+    Compresses notes into a gzip file of JSON Lines.
+    """
+
+    content_type = "application/gzip"
+    extension = "jsonl.gz"
+
+    def __init__(self):
+        # A window of 16 + 15 bits writes the gzip header and trailer.
+        self.compressor = zlib.compressobj(wbits=31)
+
+    def add(self, row):
+        line = json.dumps(row, ensure_ascii=False) + "\n"
+        return self.compressor.compress(line.encode())
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class StreamBuffer(io.RawIOBase):
+    """
+    Write-only file collecting what ZipFile writes until it is drained.
+    Having no tell() or seek(), ZipFile writes the zip as a stream.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.data += data
+        return len(data)
+
+    def drain(self, at_least=0):
+        if len(self.data) < at_least:
+            return b""
+        data = bytes(self.data)
+        self.data.clear()
+        return data
+
+
+def note_markdown(row):
+    """
+    :param row: Note dictionary (see transfer.export_rows).
+    :return: Tuple of the note's file name and Markdown text.
+    """
+
+    slug = slugify(row["title"])[:50] or "note"
+    name = f"{row['created_at'][:10]}-{row['id']}-{slug}.md"
+    lines = [f"# {row['title']}", "", row["content"], "", "---"]
+    if row["category"]:
+        lines.append(f"Colour: {row['category']} (#{row['category_hex']})")
+    lines.append(f"Created: {row['created_at']}")
+    lines.append(f"Updated: {row['updated_at']}")
+    return name, "\n".join(lines) + "\n"
+
+
+class MarkdownZip:
+    """
+    Compresses notes into a zip file of Markdown files.
+    """
+
+    content_type = "application/zip"
+    extension = "zip"
+
+    def __init__(self):
+        self.buffer = StreamBuffer()
+        self.zip = zipfile.ZipFile(self.buffer, "w", zipfile.ZIP_DEFLATED)
+
+    def add(self, row):
+        name, text = note_markdown(row)
+        updated_at = datetime.fromisoformat(row["updated_at"])
+        info = zipfile.ZipInfo(name, date_time=updated_at.timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        self.zip.writestr(info, text)
+        return self.buffer.drain(at_least=CHUNK_SIZE)
+
+    def finish(self):
+        self.zip.close()
+        return self.buffer.drain()
+
+
+ARCHIVES = {"json": GzipJsonLines, "markdown": MarkdownZip}
+
+
+def stream_archive(archive, rows):
+    """
+    :param archive: GzipJsonLines or MarkdownZip object.
+    :param rows: Iterable of note dictionaries.
+    :return: Generator of the archive's bytes.
+    """
+
+    for row in rows:
+        data = archive.add(row)
+        if data:
+            yield data
+    yield archive.finish()
+
+
+async def astream_archive(archive, rows):
+    """
+    Async version of stream_archive, for the async views.
+
+    :param archive: GzipJsonLines or MarkdownZip object.
+    :param rows: Async iterable of note dictionaries.
+    :return: Async generator of the archive's bytes.
+    """
+
+    async for row in rows:
+        data = archive.add(row)
+        if data:
+            yield data
+    yield archive.finish()
@@ -0,0 +1,468 @@
+"""
+Async (ASGI-native) versions of the 'sticky-note' and category views.
+
+Under an ASGI server (see sticky_notes/asgi.py) the views in views.py each
+run in a thread from a limited pool. These versions run on the event loop
+instead, reading and writing through Django's async ORM API, so waiting on
+the database does not tie up a thread per request.
+
+They behave the same as the views in views.py, and are switched on with the
+NOTEY_ASYNC_VIEWS setting (see urls.py). The account views are left
+synchronous, as logging in and out is rare compared to using the board.
+
+Templates are rendered on the event loop, so everything they read from the
+database (the user, the palette, the notes) is fetched before rendering.
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.http import Http404, HttpResponse
+from django.shortcuts import redirect, render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .conditional import (
+    aget_board_state,
+    aget_note_updated_at,
+    get_board_version,
+    note_detail_etag,
+    note_detail_last_modified,
+    note_list_etag,
+    note_list_last_modified,
+)
+from .archive import astream_archive
+from .counters import aget_category_counts, get_board_categories
+from .events import astream_events
+from .forms import CategoryForm, NoteForm
+from .jobs import get_category_deletions, retire_category
+from .models import Category, Note
+from .pagination import KeysetPage, get_page_size
+from .palette import get_category, get_palette
+from .search import search_note_ids
+from .transfer import aexport_rows
+from .views import (
+    NOTE_DETAIL_FIELDS,
+    NOTE_EDIT_FIELDS,
+    NOTE_LIST_FIELDS,
+    archive_response,
+    event_stream_response,
+    get_archive,
+    get_version,
+    note_conflict,
+)
+
+
+async def load_user(request):
+    """
+    Resolves request.user, which reads the session and the user from the
+    database the first time it is used, in a worker thread. Later uses of it
+    (in the view and the templates) then do not touch the database.
+
+    :param request: HTTP request object.
+    :return: The logged in User object, or AnonymousUser.
+    """
+
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+async def load_palette():
+    """
+    Loads the category palette, if it is not cached yet, in a worker thread.
+
+    :return: Tuple of Category objects.
+    """
+
+    return await sync_to_async(get_palette)()
+
+
+async def get_note_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except Note.DoesNotExist:
+        raise Http404("No Note matches the given query.")
+
+
+def async_condition(prefetch, etag_func, last_modified_func):
+    """
+    Async version of Django's condition decorator, which (in Django 4.2)
+    only wraps sync views. Answers with a 304 when the page is unchanged, and
+    tells the browser to check back every time (no-cache).
+
+    :param prefetch: Coroutine function loading what the ETag and
+    Last-Modified functions read, so they do not query the database.
+    :param etag_func: Function returning the page's ETag, or None.
+    :param last_modified_func: Function returning when the page last
+    changed, or None.
+    :return: Decorator for an async view.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            user = await load_user(request)
+            if user.is_authenticated:
+                await prefetch(request, *args, **kwargs)
+            etag = etag_func(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag else None
+            last_modified = last_modified_func(request, *args, **kwargs)
+            timestamp = (
+                int(last_modified.timestamp()) if last_modified else None
+            )
+            response = get_conditional_response(
+                request, etag=etag, last_modified=timestamp
+            )
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD"):
+                if timestamp and not response.has_header("Last-Modified"):
+                    response.headers["Last-Modified"] = http_date(timestamp)
+                if etag:
+                    response.headers.setdefault("ETag", etag)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return inner
+
+    return decorator
+
+
+async def prefetch_board(request):
+    await aget_board_state(request)
+    await load_palette()
+
+
+async def prefetch_note(request, pk):
+    await aget_note_updated_at(request, pk)
+
+
+@async_condition(prefetch_board, note_list_etag, note_list_last_modified)
+async def note_list(request):
+    """
+    Async view to display a list of 'sticky-notes', see views.note_list.
+
+    :param request: HTTP reqeust object.
+    :return: Rendered template, contains a list of 'sticky-notes'.
+    """
+
+    user = await load_user(request)
+    if user.is_authenticated:
+        state = await aget_board_state(request)
+        page = KeysetPage(
+            Note.objects.filter(user_id=user.id)
+            .select_related("category")
+            .only(*NOTE_LIST_FIELDS),
+            cursor=request.GET.get("after"),
+            page_size=get_page_size(request),
+            total=state["count"],
+        )
+        await page.aload()
+        counts = await aget_category_counts(user.id)
+        context = {
+            "notes": page,
+            "page": page,
+            "board_categories": get_board_categories(user.id, counts),
+            "board_version": get_board_version(request),
+            "page_title": "Your Notes",
+            "user": f"{user.first_name} {user.last_name}",
+        }
+        return render(request, "notey/note_list.html", context)
+    else:
+        messages.error(request, "You are not logged in.")
+        return redirect("login")
+
+
+async def note_search(request):
+    """
+    Async view to search the user's 'sticky-notes', see views.note_search.
+
+    :param request: HTTP reqeust object.
+    :return: Rendered template, contains a list of matching 'sticky-notes'.
+    """
+
+    user = await load_user(request)
+    if user.is_authenticated:
+        query = request.GET.get("q", "").strip()
+        page_size = get_page_size(request)
+        try:
+            page_number = max(1, int(request.GET.get("page", 1)))
+        except ValueError:
+            page_number = 1
+        # The search index is read with raw SQL, which has no async API.
+        ids = await sync_to_async(search_note_ids)(
+            user.id,
+            query,
+            offset=(page_number - 1) * page_size,
+            limit=page_size + 1,
+        )
+        notes = (
+            await Note.objects.select_related("category")
+            .only(*NOTE_LIST_FIELDS)
+            .ain_bulk(ids[:page_size])
+        )
+        context = {
+            "notes": [notes[pk] for pk in ids[:page_size] if pk in notes],
+            "query": query,
+            "page_number": page_number,
+            "has_previous": page_number > 1,
+            "has_next": len(ids) > page_size,
+            "page_title": "Search",
+            "user": f"{user.first_name} {user.last_name}",
+        }
+        return render(request, "notey/note_search.html", context)
+    else:
+        messages.error(request, "You are not logged in.")
+        return redirect("login")
+
+
+async def note_export(request):
+    """
+    Async view downloading the user's 'sticky-notes' as a compressed archive,
+    see views.note_export. The notes are read with aiterator, as Django
+    would otherwise read all of a sync stream into memory before sending it.
+
+    :param request: HTTP request object.
+    :return: Streaming response of the archive.
+    """
+
+    user = await load_user(request)
+    if user.is_authenticated:
+        archive = get_archive(request)
+        if archive is None:
+            return HttpResponse("Unknown export format.", status=400)
+        rows = aexport_rows(Note.objects.filter(user_id=user.id))
+        return archive_response(archive, astream_archive(archive, rows))
+    else:
+        messages.error(request, "You are not logged in.")
+        return redirect("login")
+
+
+async def note_events(request):
+    """
+    Async view streaming changes to the user's 'sticky-notes', see
+    views.note_events. Waiting for events holds no thread.
+
+    :param request: HTTP request object.
+    :return: Streaming response of text/event-stream events, 401 if the user
+    is not logged in, or 204 if NOTEY_LIVE_BOARD is off.
+    """
+
+    if not getattr(settings, "NOTEY_LIVE_BOARD", False):
+        return HttpResponse(status=204)
+    user = await load_user(request)
+    if user.is_authenticated:
+        return event_stream_response(astream_events(user.id))
+    else:
+        return HttpResponse("You are not logged in.", status=401)
+
+
+@async_condition(prefetch_note, note_detail_etag, note_detail_last_modified)
+async def note_detail(request, pk):
+    """
+    Async view to display the details of the 'sticky-note', see
+    views.note_detail.
+
+    :param request: HTTP request object.
+    :param pk: Primary key of the Note (sticky-note).
+    :return: Rendered template, containing the details of the 'sticky-note'.
+    """
+
+    user = await load_user(request)
+    if user.is_authenticated:
+        context = {
+            "note": await get_note_or_404(
+                Note.objects.only(*NOTE_DETAIL_FIELDS), pk=pk
+            ),
+            "page_title": "Note Detail",
+        }
+        return render(request, "notey/note_detail.html", context)
+    else:
+        messages.error(request, "You are not logged in.")
+        return redirect("login")
+
+
+async def note_create(request):
+    """
+    Async view to create a 'sticky-note', see views.note_create.
+
+    :param request: HTTP request object.
+    :return: Rendered template for creating a 'sticky-note'.
+    """
+
+    user = await load_user(request)
+    if user.is_authenticated:
+        # The note form's colour picker and validation read the palette.
+        await load_palette()
+        if request.method == "POST":
+            form = NoteForm(request.POST)
+            if form.is_valid():
+                note = form.save(commit=False)
+                note.user = user
+                await note.asave()
+                messages.success(request, "Sticky Note created.")
+                return redirect("note_list")
+        else:
+            form = NoteForm()
+        context = {"form": form, "page_title": "Create Note"}
+        return render(request, "notey/note_form.html", context)
+    else:
+        messages.error(request, "You are not logged in.")
+        return redirect("login")
+
+
+async def note_update(request, pk):
+    """
+    Async view to update an existing 'sticky-note', see views.note_update.
+
+    :param request: HTTP request object.
+    :param pk: Primary key of the 'sticky-note' (i.e. Note object) to be
+    updated.
+    :return: Rendered template for updated the specified 'sticky-note'.
+    """
+
+    user = await load_user(request)
+    if user.is_authenticated:
+        await load_palette()
+        # The category is loaded with the note, as the form reads it when
+        # it is being retired (see forms.NoteForm).
+        note = await get_note_or_404(
+            Note.objects.select_related("category").only(*NOTE_EDIT_FIELDS),
+            pk=pk,
+            user_id=user.id,
+        )
+        if request.method == "POST":
+            version = get_version(request, note)
+            form = NoteForm(request.POST, instance=note)
+            if form.is_valid():
+                saved = await sync_to_async(note.save_changes)(
+                    form.changed_data, version
+                )
+                if not saved:
+                    return await sync_to_async(note_conflict)(
+                        request, pk, request.POST
+                    )
+                return redirect("note_list")
+        else:
+            form = NoteForm(instance=note)
+        context = {
+            "form": form,
+            "page_title": "Create Note",
+            "note_id": note.id,
+        }
+        return render(request, "notey/note_form.html", context)
+    else:
+        messages.error(request, "You are not logged in.")
+        return redirect("login")
+
+
+async def note_delete(request, pk):
+    """
+    Async view to delete an existing 'sticky-note', see views.note_delete.
+
+    :param request: HTTP request object.
+    :param pk: Primary key of the 'sticky-note' to be deleted.
+    :return: Redirect to the notes list after deletion.
+    """
+
+    user = await load_user(request)
+    if user.is_authenticated:
+        note = await get_note_or_404(Note.objects.all(), pk=pk)
+        await note.adelete()
+        return redirect("/notes")
+    else:
+        messages.error(request, "You are not logged in.")
+        return redirect("login")
+
+
+async def category_list(request):
+    """
+    Async view to display a list of categories ('sticky-note' colours), see
+    views.category_list.
+
+    :param request: HTTP reqeust object.
+    :return: Rendered template, contains a list of categories.
+    """
+
+    user = await load_user(request)
+    if user.is_superuser:
+        context = {
+            "categories": await load_palette(),
+            "deletions": await sync_to_async(get_category_deletions)(),
+            "page_title": "Categories",
+            "form": CategoryForm(),
+        }
+        return render(request, "notey/categories.html", context)
+    else:
+        if user.is_authenticated:
+            messages.error(request, "You are not authorised to view that.")
+            return redirect("/notes")
+        else:
+            messages.error(request, "You are not logged in.")
+        return redirect("login")
+
+
+async def category_create(request):
+    """
+    Async view to create a 'sticky-note' category, see
+    views.category_create.
+
+    :param request: HTTP request object.
+    :return: Redirect to the category list after category creation.
+    """
+
+    user = await load_user(request)
+    if user.is_authenticated and request.method == "POST":
+        form = CategoryForm(request.POST)
+        if form.is_valid():
+            category = form.save(commit=False)
+            await category.asave()
+            messages.success(request, "Category created.")
+        return redirect("/categories")
+    elif user.is_authenticated:
+        messages.error(request, "You are not authorised to view that.")
+        return redirect("/notes")
+    else:
+        messages.error(request, "You are not logged in.")
+        return redirect("login")
+
+
+async def category_delete(request, pk):
+    """
+    Async view to delete an existing 'sticky-note' category, see
+    views.category_delete.
+
+    :param request: HTTP request object.
+    :param pk: Primary key of the category to be deleted.
+    :return: Redirect to the category list after deletion.
+    """
+
+    user = await load_user(request)
+    if user.is_superuser:
+        try:
+            category = await Category.objects.aget(pk=pk, retired=False)
+        except Category.DoesNotExist:
+            raise Http404("No Category matches the given query.")
+        await load_palette()
+        reassign_to = get_category(request.POST.get("reassign_to"))
+        if reassign_to == category:
+            reassign_to = None
+        job = await sync_to_async(retire_category)(category, reassign_to)
+        if job:
+            messages.success(
+                request,
+                "Category deleted. Its notes are being "
+                f"{'moved' if reassign_to else 'deleted'} in the background.",
+            )
+        else:
+            messages.success(request, "Category deleted.")
+        return redirect("/categories")
+    else:
+        if user.is_authenticated:
+            messages.error(request, "You are not authorised to view that.")
+            return redirect("/notes")
+        else:
+            messages.error(request, "You are not logged in.")
+        return redirect("login")
@@ -0,0 +1,51 @@
+"""
+Authentication backend caching the logged in user.
+
+With Django's ModelBackend, every request from a logged in user reads the
+user's row from the database. CachedModelBackend keeps the user in the
+'sessions' cache instead, and drops it when the user is saved or deleted
+(see signals.py), so a change such as a new password is seen straight away.
+"""
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import transaction
+
+
+def get_user_cache():
+    return caches[getattr(settings, "SESSION_CACHE_ALIAS", "default")]
+
+
+def user_cache_key(user_id):
+    return f"notey:user:{user_id}"
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, looking the logged in user up in the cache first.
+    """
+
+    def get_user(self, user_id):
+        cache = get_user_cache()
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, settings.NOTEY_USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+
+def forget_user(user_id):
+    """
+    Drops the user from the cache, straight away and again when the current
+    transaction commits (so a request in between cannot cache the old row).
+
+    :param user_id: Primary key of the user.
+    """
+
+    key = user_cache_key(user_id)
+    get_user_cache().delete(key)
+    transaction.on_commit(lambda: get_user_cache().delete(key))
@@ -0,0 +1,276 @@
+"""
+Benchmark harness for the notey views (see the benchmark command).
+
+Each scenario is a request driven through Django's test client. It is run a
+number of rounds, reporting the spread of its latency, the number of
+queries it made and the peak memory it allocated, so a change making a page
+slower, chattier or hungrier shows up before it is deployed.
+
+Results can be saved as JSON and later runs compared against them.
+"""
+
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Note
+from .pagination import encode_cursor
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def percentile(values, percent):
+    """
+    :param values: List of numbers.
+    :param percent: Percentile wanted, from 0 to 100.
+    :return: The nearest-rank percentile of the values.
+    """
+
+    ordered = sorted(values)
+    rank = max(0, -(-len(ordered) * percent // 100) - 1)
+    return ordered[int(rank)]
+
+
+class Scenario:
+    """
+    A request to benchmark.
+
+    Fields:
+    - name: Name the results are reported under.
+    - run: Function making the request, given what setup returned, and
+      returning the response.
+    - setup: Optional function run (untimed) before each round, i.e. to
+      create the note a round deletes.
+    - status: The response status code expected.
+    """
+
+    def __init__(self, name, run, setup=None, status=200):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.status = status
+
+    def prepare(self):
+        return self.setup() if self.setup else ()
+
+    def timed(self, args):
+        """
+        :param args: What prepare returned.
+        :return: Seconds the request took.
+        """
+
+        start = time.perf_counter()
+        response = self.run(*args)
+        elapsed = time.perf_counter() - start
+        if response.status_code != self.status:
+            raise BenchmarkError(
+                f"{self.name} answered {response.status_code}, "
+                f"expected {self.status}."
+            )
+        return elapsed
+
+
+class BenchmarkResult:
+    """
+    The measurements of one scenario.
+
+    Fields:
+    - name: Name of the scenario.
+    - timings: List of each round's latency, in seconds.
+    - queries: List of each round's number of queries.
+    - peak_memory: Most memory allocated during a round, in bytes.
+    """
+
+    def __init__(self, name, timings, queries, peak_memory):
+        self.name = name
+        self.timings = timings
+        self.queries = queries
+        self.peak_memory = peak_memory
+
+    def as_dict(self):
+        milliseconds = [timing * 1000 for timing in self.timings]
+        return {
+            "name": self.name,
+            "rounds": len(self.timings),
+            "p50_ms": round(percentile(milliseconds, 50), 3),
+            "p90_ms": round(percentile(milliseconds, 90), 3),
+            "p99_ms": round(percentile(milliseconds, 99), 3),
+            "mean_ms": round(statistics.mean(milliseconds), 3),
+            "max_ms": round(max(milliseconds), 3),
+            "queries": max(self.queries),
+            "peak_kib": round(self.peak_memory / 1024, 1),
+        }
+
+
+def measure(scenario, rounds=20, warmup=2, cold=False):
+    """
+    Runs a scenario, recording every round.
+
+    Memory is traced in one extra round, as tracing slows the code it traces
+    and would skew the timings.
+
+    :param scenario: Scenario object.
+    :param rounds: Number of measured rounds.
+    :param warmup: Number of rounds run first and not measured, so caches
+    are filled as they would be on a running site.
+    :param cold: Empties the fragment cache before each round.
+    :return: BenchmarkResult object.
+    """
+
+    for _ in range(warmup):
+        scenario.timed(scenario.prepare())
+    timings, queries = [], []
+    for _ in range(rounds):
+        args = scenario.prepare()
+        if cold:
+            caches["fragments"].clear()
+        with CaptureQueriesContext(connection) as captured:
+            timings.append(scenario.timed(args))
+        queries.append(len(captured))
+    args = scenario.prepare()
+    if cold:
+        caches["fragments"].clear()
+    tracemalloc.start()
+    try:
+        scenario.timed(args)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return BenchmarkResult(scenario.name, timings, queries, peak_memory)
+
+
+def view_scenarios(client, user):
+    """
+    The note and category views, as seen by a logged in user.
+
+    :param client: Test client, logged in as the user.
+    :param user: User with at least a page of notes, and a superuser (to
+    see the category page).
+    :return: List of Scenario objects.
+    """
+
+    notes = Note.objects.filter(user=user).order_by("created_at", "pk")
+    first_page = list(notes[:50])
+    note = first_page[0]
+
+    def new_note():
+        return (
+            Note.objects.create(
+                user=user,
+                title="Benchmark note",
+                content="Created for the benchmark.",
+                category=note.category,
+            ),
+        )
+
+    def edit_data():
+        return {
+            "title": f"Edited {time.perf_counter()}",
+            "content": note.content,
+            "category": note.category_id or "",
+        }
+
+    return [
+        Scenario("note_list", lambda: client.get(reverse("note_list"))),
+        Scenario(
+            "note_list (next page)",
+            lambda: client.get(
+                reverse("note_list"),
+                {"after": encode_cursor(first_page[-1])},
+            ),
+        ),
+        Scenario(
+            "note_detail",
+            lambda: client.get(reverse("note_detail", kwargs={"pk": note.pk})),
+        ),
+        Scenario(
+            "note_create",
+            lambda: client.post(
+                reverse("note_create"),
+                {"title": "Benchmark", "content": "Benchmark", "category": ""},
+            ),
+            status=302,
+        ),
+        Scenario(
+            "note_update",
+            lambda: client.post(
+                reverse("note_update", kwargs={"pk": note.pk}), edit_data()
+            ),
+            status=302,
+        ),
+        Scenario(
+            "note_delete",
+            lambda new: client.post(
+                reverse("note_delete", kwargs={"pk": new.pk})
+            ),
+            setup=new_note,
+            status=302,
+        ),
+        Scenario("category_list", lambda: client.get(reverse("category_list"))),
+    ]
+
+
+def login_scenario(username, password):
+    """
+    Logging in, from a new browser (client) each round.
+
+    :param username: Username of a user able to log in.
+    :param password: The user's password.
+    :return: Scenario object.
+    """
+
+    def log_in(client):
+        return client.post(
+            reverse("login"), {"username": username, "password": password}
+        )
+
+    return Scenario("user_login", log_in, setup=lambda: (Client(),), status=302)
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Finds the scenarios that got worse since the baseline was saved.
+
+    :param results: List of result dictionaries (see BenchmarkResult).
+    :param baseline: List of result dictionaries from an earlier run.
+    :param tolerance: How much slower (as a fraction) the median latency may
+    get before it counts as a regression. More queries always count.
+    :return: List of messages, one per regression.
+    """
+
+    earlier = {result["name"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        before = earlier.get(result["name"])
+        if before is None:
+            continue
+        if result["p50_ms"] > before["p50_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{result['name']}: median {result['p50_ms']}ms, "
+                f"was {before['p50_ms']}ms."
+            )
+        if result["queries"] > before["queries"]:
+            regressions.append(
+                f"{result['name']}: {result['queries']} queries, "
+                f"was {before['queries']}."
+            )
+    return regressions
+
+
+def load_results(path):
+    with open(path) as file:
+        return json.load(file)["results"]
+
+
+def save_results(path, results, **details):
+    with open(path, "w") as file:
+        json.dump({**details, "results": results}, file, indent=2)
@@ -0,0 +1,127 @@
+"""
+Change sequence numbers, for clients keeping a copy of the board in sync
+(see api.api_changes) without downloading the whole board every time.
+
+Each user has a counter (BoardSummary.change_seq), and every note created,
+edited or deleted takes the next number from it: saved notes keep it in
+Note.change_seq, deleted notes leave a NoteTombstone behind with it. A client
+remembers the highest number it has seen, and asks for the changes after it,
+which the (user, change_seq) indexes find without reading the rest of the
+board.
+
+The numbers are taken with an UPDATE of the user's BoardSummary row, which
+stays locked until the transaction commits, so one user's changes commit in
+the order of their numbers, and a client never skips a change still being
+written. Numbers taken by a transaction that is rolled back are not used.
+
+Notes are stamped by the Note signal receivers (see signals.py). Code saving
+notes in bulk calls stamp_notes itself, before the write.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import BoardSummary, Note, NoteTombstone
+
+
+def reserve_seqs(user_id, count, create=True):
+    """
+    Takes the next change sequence numbers of a user.
+
+    :param user_id: Primary key of the owner.
+    :param count: How many numbers to take.
+    :param create: False to not create the user's counter if it is missing,
+    i.e. when the owner is being deleted along with their notes.
+    :return: The first of the numbers, or None if the counter is missing.
+    """
+
+    summaries = BoardSummary.objects.filter(user_id=user_id)
+    with transaction.atomic():
+        updated = summaries.update(change_seq=F("change_seq") + count)
+        if not updated:
+            if not create:
+                return None
+            _, created = BoardSummary.objects.get_or_create(
+                user_id=user_id, defaults={"change_seq": count}
+            )
+            if created:
+                return 1
+            summaries.update(change_seq=F("change_seq") + count)
+        return summaries.values_list("change_seq", flat=True).get() - count + 1
+
+
+def stamp_notes(notes):
+    """
+    Gives each note the next change sequence number of its owner, to be
+    written with the note.
+
+    :param notes: Iterable of Note objects about to be saved.
+    """
+
+    owned = defaultdict(list)
+    for note in notes:
+        if note.user_id is not None:
+            owned[note.user_id].append(note)
+    for user_id, user_notes in owned.items():
+        first = reserve_seqs(user_id, len(user_notes))
+        for offset, note in enumerate(user_notes):
+            note.change_seq = first + offset
+
+
+def record_deletions(notes):
+    """
+    Leaves a tombstone for each deleted note.
+
+    :param notes: Iterable of deleted Note objects.
+    """
+
+    owned = defaultdict(list)
+    for note in notes:
+        if note.user_id is not None:
+            owned[note.user_id].append(note)
+    tombstones = []
+    for user_id, user_notes in owned.items():
+        first = reserve_seqs(user_id, len(user_notes), create=False)
+        if first is None:
+            continue
+        tombstones += [
+            NoteTombstone(user_id=user_id, note_id=note.pk, change_seq=seq)
+            for seq, note in enumerate(user_notes, start=first)
+        ]
+    NoteTombstone.objects.bulk_create(tombstones)
+
+
+def get_changes(user_id, since, limit, fields=None):
+    """
+    :param user_id: Primary key of the owner.
+    :param since: The change sequence number the client has seen up to, 0
+    for the whole board.
+    :param limit: Most changes returned.
+    :param fields: Note fields to load, None for all.
+    :return: Tuple of (saved Note objects, ids of the deleted notes, the
+    number to pass as 'since' next time, True if there are more changes),
+    the changes in the order they were made.
+    """
+
+    notes = Note.objects.filter(user_id=user_id, change_seq__gt=since)
+    if fields is not None:
+        notes = notes.only(*fields, "change_seq")
+    deleted = NoteTombstone.objects.filter(
+        user_id=user_id, change_seq__gt=since
+    ).values_list("change_seq", "note_id")
+    changes = [
+        (note.change_seq, note)
+        for note in notes.order_by("change_seq")[: limit + 1]
+    ]
+    changes += list(deleted.order_by("change_seq")[: limit + 1])
+    changes.sort(key=lambda change: change[0])
+    page = changes[:limit]
+    seq = page[-1][0] if page else since
+    return (
+        [change for _, change in page if isinstance(change, Note)],
+        [change for _, change in page if not isinstance(change, Note)],
+        seq,
+        len(changes) > limit,
+    )
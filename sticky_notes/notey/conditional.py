@@ -0,0 +1,192 @@
+"""
+ETag and Last-Modified values for the 'sticky-note' pages.
+
+Used with Django's condition decorator, so a browser re-requesting a page
+that has not changed gets a '304 Not Modified' answer without the page being
+queried for or rendered again.
+
+A user's board (the dashboard) changes when one of their notes is created,
+edited or deleted, or when a category is recoloured. The first is read from
+the user's counters (see counters.py), one primary key lookup, and the second
+from the cached palette.
+"""
+
+import hashlib
+
+from django.contrib import messages
+from django.middleware.csrf import get_token
+
+from .models import BoardSummary, Note
+from .palette import get_palette_version
+
+
+def make_etag(*parts):
+    """
+    :param parts: Values the page depends on.
+    :return: Hash of the values, for use as a strong ETag.
+    """
+
+    value = "|".join(str(part) for part in parts)
+    return hashlib.sha1(value.encode(), usedforsecurity=False).hexdigest()
+
+
+def is_cacheable(request):
+    """
+    Whether the page can be answered with a 304, i.e. the user is logged in
+    and there are no messages waiting to be shown on it.
+
+    :param request: HTTP request object.
+    :return: Boolean.
+    """
+
+    if not request.user.is_authenticated:
+        return False
+    return len(messages.get_messages(request)) == 0
+
+
+def user_parts(request):
+    # The parts of every page that depend on who is logged in. The pages'
+    # forms hold a CSRF token made from the CSRF secret, which login()
+    # replaces, so a page from before the user last logged in is stale.
+    # get_token makes the secret, if the browser has none yet, as rendering
+    # the page would.
+    get_token(request)
+    user = request.user
+    return (
+        user.pk,
+        user.first_name,
+        user.last_name,
+        user.is_superuser,
+        request.META["CSRF_COOKIE"],
+    )
+
+
+BOARD_STATE_FIELDS = ("note_count", "last_modified")
+
+
+def board_state(summary):
+    # A user without counters has no notes yet.
+    if summary is None:
+        return {"count": 0, "last_modified": None}
+    return {"count": summary[0], "last_modified": summary[1]}
+
+
+def get_board_state(request):
+    """
+    Reads how many notes the user has and when their board last changed. The
+    result is kept on the request, so the ETag and Last-Modified values share
+    a query.
+
+    :param request: HTTP request object.
+    :return: Dictionary with 'count' and 'last_modified' keys.
+    """
+
+    if not hasattr(request, "_notey_board_state"):
+        request._notey_board_state = board_state(
+            BoardSummary.objects.filter(user_id=request.user.id)
+            .values_list(*BOARD_STATE_FIELDS)
+            .first()
+        )
+    return request._notey_board_state
+
+
+async def aget_board_state(request):
+    """
+    Async version of get_board_state, for the async views.
+
+    :param request: HTTP request object.
+    :return: Dictionary with 'count' and 'last_modified' keys.
+    """
+
+    if not hasattr(request, "_notey_board_state"):
+        request._notey_board_state = board_state(
+            await BoardSummary.objects.filter(user_id=request.user.id)
+            .values_list(*BOARD_STATE_FIELDS)
+            .afirst()
+        )
+    return request._notey_board_state
+
+
+def note_list_etag(request, *args, **kwargs):
+    if not is_cacheable(request):
+        return None
+    state = get_board_state(request)
+    return make_etag(
+        "note_list",
+        *user_parts(request),
+        state["count"],
+        state["last_modified"],
+        get_palette_version(),
+        request.GET.urlencode(),
+    )
+
+
+def get_board_version(request):
+    """
+    A key for the rendered page of the user's board, which changes whenever
+    one of their notes, or the palette, changes (see note_list.html).
+
+    :param request: HTTP request object.
+    :return: Hex string.
+    """
+
+    state = get_board_state(request)
+    return make_etag(
+        "board",
+        request.user.pk,
+        state["count"],
+        state["last_modified"],
+        get_palette_version(),
+        request.GET.urlencode(),
+    )
+
+
+def note_list_last_modified(request, *args, **kwargs):
+    if not is_cacheable(request):
+        return None
+    return get_board_state(request)["last_modified"]
+
+
+def get_note_updated_at(request, pk):
+    """
+    :param request: HTTP request object.
+    :param pk: Primary key of the Note.
+    :return: When the note was last saved, None if there is no such note.
+    """
+
+    if not hasattr(request, "_notey_note_updated_at"):
+        request._notey_note_updated_at = (
+            Note.objects.filter(pk=pk)
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+    return request._notey_note_updated_at
+
+
+async def aget_note_updated_at(request, pk):
+    """
+    Async version of get_note_updated_at, for the async views.
+    """
+
+    if not hasattr(request, "_notey_note_updated_at"):
+        request._notey_note_updated_at = (
+            await Note.objects.filter(pk=pk)
+            .values_list("updated_at", flat=True)
+            .afirst()
+        )
+    return request._notey_note_updated_at
+
+
+def note_detail_etag(request, pk, *args, **kwargs):
+    if not is_cacheable(request):
+        return None
+    updated_at = get_note_updated_at(request, pk)
+    if updated_at is None:
+        return None
+    return make_etag("note_detail", *user_parts(request), pk, updated_at)
+
+
+def note_detail_last_modified(request, pk, *args, **kwargs):
+    if not is_cacheable(request):
+        return None
+    return get_note_updated_at(request, pk)
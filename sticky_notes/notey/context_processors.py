@@ -0,0 +1,28 @@
+from django.conf import settings
+
+
+def fragment_cache(request):
+    """
+    Adds the fragment cache's timeout to every template, for use with the
+    {% cache %} tags in the 'sticky-note' templates.
+
+    :param request: HTTP request object.
+    :return: Dictionary of template variables.
+    """
+
+    return {
+        "fragment_cache_timeout": getattr(
+            settings, "NOTEY_FRAGMENT_CACHE_TIMEOUT", 3600
+        )
+    }
+
+
+def live_board(request):
+    """
+    Tells the templates whether boards get realtime updates (see events.py).
+
+    :param request: HTTP request object.
+    :return: Dictionary of template variables.
+    """
+
+    return {"live_board": getattr(settings, "NOTEY_LIVE_BOARD", False)}
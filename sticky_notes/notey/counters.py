@@ -0,0 +1,213 @@
+"""
+Per-user 'sticky-note' counters: how many notes each user has, how many in
+each category, and when their board last changed (see BoardSummary and
+CategoryCount in models.py).
+
+The counters are updated by the Note signal receivers (see signals.py), in
+the same transaction as the notes, with F() expressions, so concurrent
+changes add up rather than overwrite each other. Reading them is one primary
+key lookup, instead of a COUNT over the user's notes.
+
+Changes made without signals (i.e. QuerySet.update(), or raw SQL) are not
+counted; the rebuild_counters command recounts every board from the notes.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import BoardSummary, CategoryCount, Note
+from .palette import get_palette
+
+
+def add_counts(user_id, total, categories, last_modified):
+    """
+    Adds to a user's counters, creating them if they do not exist yet.
+
+    :param user_id: Primary key of the owner.
+    :param total: Change to the number of notes.
+    :param categories: Dictionary of category id to change in its count.
+    :param last_modified: When the board changed.
+    """
+
+    # Never below zero, should the counters have drifted from the notes.
+    note_count = Greatest(F("note_count") + total, 0)
+    with transaction.atomic():
+        updated = BoardSummary.objects.filter(user_id=user_id).update(
+            note_count=note_count, last_modified=last_modified
+        )
+        # Nothing to take away from when the summary is gone, i.e. the owner
+        # is being deleted along with their notes.
+        if not updated and total >= 0:
+            summary, created = BoardSummary.objects.get_or_create(
+                user_id=user_id,
+                defaults={
+                    "note_count": total,
+                    "last_modified": last_modified,
+                },
+            )
+            if not created:
+                BoardSummary.objects.filter(user_id=user_id).update(
+                    note_count=note_count,
+                    last_modified=last_modified,
+                )
+        for category_id, change in categories.items():
+            if not change:
+                continue
+            updated = CategoryCount.objects.filter(
+                user_id=user_id, category_id=category_id
+            ).update(note_count=Greatest(F("note_count") + change, 0))
+            if not updated and change > 0:
+                CategoryCount.objects.get_or_create(
+                    user_id=user_id,
+                    category_id=category_id,
+                    defaults={"note_count": change},
+                )
+
+
+def count_saved(notes, created):
+    """
+    Counts created notes, and edited notes whose category changed.
+
+    :param notes: Iterable of saved Note objects.
+    :param created: True for new notes.
+    """
+
+    totals = Counter()
+    categories = defaultdict(Counter)
+    for note in notes:
+        if note.user_id is None:
+            continue
+        changes = categories[note.user_id]
+        if created:
+            totals[note.user_id] += 1
+            changes[note.category_id] += 1
+        else:
+            previous = getattr(note, "_loaded_category_id", note.category_id)
+            if previous != note.category_id:
+                changes[previous] -= 1
+                changes[note.category_id] += 1
+        note._loaded_category_id = note.category_id
+    now = timezone.now()
+    for user_id, changes in categories.items():
+        changes.pop(None, None)
+        add_counts(user_id, totals[user_id], changes, now)
+
+
+def count_deleted(notes):
+    """
+    :param notes: Iterable of deleted Note objects.
+    """
+
+    totals = Counter()
+    categories = defaultdict(Counter)
+    for note in notes:
+        if note.user_id is None:
+            continue
+        totals[note.user_id] -= 1
+        if note.category_id is not None:
+            categories[note.user_id][note.category_id] -= 1
+    now = timezone.now()
+    for user_id, total in totals.items():
+        add_counts(user_id, total, categories[user_id], now)
+
+
+def get_category_counts(user_id):
+    """
+    :param user_id: Primary key of the owner.
+    :return: Dictionary of category id to the number of the user's notes in
+    it, leaving out empty categories.
+    """
+
+    return dict(
+        CategoryCount.objects.filter(
+            user_id=user_id, note_count__gt=0
+        ).values_list("category_id", "note_count")
+    )
+
+
+async def aget_category_counts(user_id):
+    """
+    Async version of get_category_counts, for the async views.
+    """
+
+    rows = CategoryCount.objects.filter(
+        user_id=user_id, note_count__gt=0
+    ).values("category_id", "note_count")
+    return {row["category_id"]: row["note_count"] async for row in rows}
+
+
+def get_board_categories(user_id, counts=None):
+    """
+    :param user_id: Primary key of the owner.
+    :param counts: The user's category counts, if already loaded.
+    :return: List of (Category, number of notes) tuples, in palette order,
+    for the categories the user has notes in.
+    """
+
+    if counts is None:
+        counts = get_category_counts(user_id)
+    return [
+        (category, counts[category.pk])
+        for category in get_palette()
+        if category.pk in counts
+    ]
+
+
+def rebuild_counters(user_ids=None):
+    """
+    Recounts the boards from the Note table.
+
+    :param user_ids: Primary keys of the users to recount, None for all.
+    :return: Number of boards recounted.
+    """
+
+    notes = Note.objects.exclude(user_id=None)
+    if user_ids is not None:
+        notes = notes.filter(user_id__in=user_ids)
+    now = timezone.now()
+    with transaction.atomic():
+        totals = dict(
+            notes.values_list("user_id").annotate(count=Count("id")).order_by()
+        )
+        if user_ids is None:
+            user_ids = set(
+                BoardSummary.objects.values_list("user_id", flat=True)
+            )
+        user_ids = set(user_ids) | set(totals)
+        # The change sequences are carried over, or they would start again
+        # and syncing clients would miss changes (see changes.py).
+        seqs = dict(
+            notes.values_list("user_id")
+            .annotate(seq=Max("change_seq"))
+            .order_by()
+        )
+        seqs.update(
+            BoardSummary.objects.filter(user_id__in=user_ids).values_list(
+                "user_id", "change_seq"
+            )
+        )
+        BoardSummary.objects.filter(user_id__in=user_ids).delete()
+        CategoryCount.objects.filter(user_id__in=user_ids).delete()
+        BoardSummary.objects.bulk_create(
+            BoardSummary(
+                user_id=user_id,
+                note_count=totals.get(user_id, 0),
+                last_modified=now,
+                change_seq=seqs.get(user_id, 0),
+            )
+            for user_id in user_ids
+        )
+        CategoryCount.objects.bulk_create(
+            CategoryCount(
+                user_id=user_id, category_id=category_id, note_count=count
+            )
+            for user_id, category_id, count in notes.exclude(category=None)
+            .values_list("user_id", "category_id")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+    return len(user_ids)
@@ -0,0 +1,24 @@
+"""
+Tuning for the database connections (see DATABASES in settings.py).
+
+SQLite's defaults suit a single user: a writer locks the whole database,
+readers included, and waits for the disk on every commit. The pragmas in
+NOTEY_SQLITE_PRAGMAS are set on each new connection, switching to
+write-ahead logging so pages can be read while a note is saved.
+"""
+
+from django.conf import settings
+
+
+def tune_sqlite(sender, connection, **kwargs):
+    """
+    Sets NOTEY_SQLITE_PRAGMAS on a new SQLite connection. Connected to the
+    connection_created signal (see signals.py).
+    """
+
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "NOTEY_SQLITE_PRAGMAS", {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
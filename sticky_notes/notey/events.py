@@ -0,0 +1,251 @@
+"""
+Realtime updates for the 'sticky-note' board, sent as Server-Sent Events.
+
+When a note is created, edited or deleted, an event is published to its
+owner (see signals.py), and every board the owner has open receives it over
+the note_events stream and patches itself (see static/notey/js/board.js),
+rather than reloading the whole page.
+
+Events go through a broker, chosen with the NOTEY_EVENT_BROKER setting (the
+dotted path of its class). The default, LocalBroker, only reaches the boards
+connected to the same process, so deployments running several processes
+need a broker backed by a shared service (i.e. Redis pub/sub), with the same
+methods as LocalBroker.
+"""
+
+import asyncio
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.module_loading import import_string
+
+# Seconds between the comments sent to keep an idle stream open.
+KEEPALIVE = 15
+
+_broker = None
+
+
+class Subscription:
+    """
+    One open event stream, receiving the events published to its user.
+
+    Events are published from whichever thread saved the note, so they are
+    passed through a thread-safe queue. Async streams are woken up on their
+    own event loop.
+
+    Fields:
+    - user_id: Primary key of the user the events are for.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._queue = queue.SimpleQueue()
+        self._loop = None
+        self._ready = None
+
+    def put(self, event):
+        self._queue.put(event)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._ready.set)
+
+    def get(self, timeout):
+        """
+        :param timeout: Seconds to wait for an event.
+        :return: The next event, None if there was none in time.
+        """
+
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def aget(self, timeout):
+        """
+        Async version of get, which waits without holding a thread.
+        """
+
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._ready = asyncio.Event()
+        while True:
+            try:
+                return self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._ready.clear()
+            # Checked again, in case an event came in before clear().
+            if not self._queue.empty():
+                continue
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+
+class LocalBroker:
+    """
+    Passes events between the threads (and event loops) of one process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id):
+        """
+        :param user_id: Primary key of the user to receive events for.
+        :return: Subscription object.
+        """
+
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions[subscription.user_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+    def has_subscribers(self, user_id):
+        """
+        Whether anyone is listening for the user's events, so events nobody
+        would receive are not rendered.
+
+        :param user_id: Primary key of the user.
+        :return: Boolean.
+        """
+
+        with self._lock:
+            return bool(self._subscriptions.get(user_id))
+
+    def publish(self, user_id, event):
+        """
+        :param user_id: Primary key of the user the event is for.
+        :param event: JSON-ready dictionary, with a 'type' key.
+        """
+
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+
+def get_broker():
+    """
+    :return: The broker named by the NOTEY_EVENT_BROKER setting.
+    """
+
+    global _broker
+    if _broker is None:
+        path = getattr(
+            settings, "NOTEY_EVENT_BROKER", "notey.events.LocalBroker"
+        )
+        _broker = import_string(path)()
+    return _broker
+
+
+def note_event(event_type, pk, note):
+    """
+    :param event_type: 'created', 'updated' or 'deleted'.
+    :param pk: Primary key of the note (a deleted note has lost its own).
+    :param note: The Note object.
+    :return: Event dictionary, holding the note's rendered card unless the
+    note was deleted.
+    """
+
+    event = {"type": event_type, "id": pk}
+    if event_type != "deleted":
+        event["html"] = render_to_string(
+            "notey/note_card.html",
+            {
+                "note": note,
+                "fragment_cache_timeout": getattr(
+                    settings, "NOTEY_FRAGMENT_CACHE_TIMEOUT", 3600
+                ),
+            },
+        )
+    return event
+
+
+def publish_note_events(event_type, notes):
+    """
+    Sends an event for each note to its owner's open boards, once the
+    current transaction commits (so a rolled back change is never sent).
+
+    :param event_type: 'created', 'updated' or 'deleted'.
+    :param notes: List of Note objects.
+    """
+
+    # Read now, as deleting a note clears its primary key.
+    targets = [(note.user_id, note.pk, note) for note in notes if note.user_id]
+
+    def publish():
+        broker = get_broker()
+        for user_id, pk, note in targets:
+            if broker.has_subscribers(user_id):
+                broker.publish(user_id, note_event(event_type, pk, note))
+
+    transaction.on_commit(publish)
+
+
+def format_event(event):
+    """
+    :param event: Event dictionary, or None to keep the stream open.
+    :return: The event, in the text/event-stream format.
+    """
+
+    if event is None:
+        return ": keepalive\n\n"
+    data = json.dumps(event, separators=(",", ":"))
+    return f"event: {event['type']}\ndata: {data}\n\n"
+
+
+def get_stream_timeout():
+    return getattr(settings, "NOTEY_EVENT_STREAM_TIMEOUT", 300)
+
+
+def stream_events(user_id):
+    """
+    Yields the user's events as they are published, for up to
+    NOTEY_EVENT_STREAM_TIMEOUT seconds. The browser then opens a new stream,
+    so a sync worker is not held by one board forever.
+
+    :param user_id: Primary key of the user.
+    :return: Generator of text/event-stream chunks.
+    """
+
+    broker = get_broker()
+    subscription = broker.subscribe(user_id)
+    deadline = time.monotonic() + get_stream_timeout()
+    try:
+        yield "retry: 3000\n\n"
+        while time.monotonic() < deadline:
+            yield format_event(subscription.get(KEEPALIVE))
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def astream_events(user_id):
+    """
+    Async version of stream_events, for the async views.
+    """
+
+    broker = get_broker()
+    subscription = broker.subscribe(user_id)
+    deadline = time.monotonic() + get_stream_timeout()
+    try:
+        yield "retry: 3000\n\n"
+        while time.monotonic() < deadline:
+            event = await subscription.aget(KEEPALIVE)
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
@@ -2,6 +2,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from .models import Note, Category
+from .palette import get_category, get_palette
 
 
 class UserRegisterForm(UserCreationForm):
@@ -34,6 +35,73 @@ class UserRegisterForm(UserCreationForm):
         ]
 
 
+class PaletteChoiceIterator(forms.models.ModelChoiceIterator):
+    """
+    Iterates over the cached palette rather than the field's queryset.
+
+    :param forms.models.ModelChoiceIterator: Django's ModelChoiceIterator.
+    """
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for category in self.field.palette:
+            yield self.choice(category)
+
+    def __len__(self):
+        return len(self.field.palette) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.palette)
+
+
+class PaletteChoiceField(forms.ModelChoiceField):
+    """
+    Choice field for picking a 'sticky-note' category.
+
+    Works like ModelChoiceField, but the choices are read from (and submitted
+    values checked against) the cached palette, instead of querying the
+    Category table each time the form is shown or validated.
+
+    Attributes:
+    - palette: The categories to choose from, ordered by name.
+    - current: The category of the note being edited, kept as a choice
+      while it is being retired (see jobs.py) and so missing from the
+      palette, or None.
+
+    :param forms.ModelChoiceField: Django's ModelChoiceField class.
+    """
+
+    iterator = PaletteChoiceIterator
+
+    def __init__(self, **kwargs):
+        super().__init__(queryset=Category.objects.all(), **kwargs)
+        self.current = None
+
+    @property
+    def palette(self):
+        palette = get_palette()
+        if self.current is None:
+            return palette
+        return tuple(sorted(palette + (self.current,), key=lambda c: c.name))
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, Category):
+            return value
+        if self.current is not None and str(value) == str(self.current.pk):
+            return self.current
+        category = get_category(value)
+        if category is None:
+            raise forms.ValidationError(
+                self.error_messages["invalid_choice"],
+                code="invalid_choice",
+                params={"value": value},
+            )
+        return category
+
+
 class NoteForm(forms.ModelForm):
     """
     Form for creating and updating 'sticky-notes' (Note objects).
@@ -41,6 +109,7 @@ class NoteForm(forms.ModelForm):
     Fields:
     - title: CharField for the Note's title.
     - content: TextField for the Note's content.
+    - category: PaletteChoiceField for the Note's category (colour).
 
     Meta class:
     - Defines the model to use (Note) and the fields to include in the
@@ -49,10 +118,27 @@ class NoteForm(forms.ModelForm):
     :param forms.ModelForm: Django's ModelForm class.
     """
 
+    category = PaletteChoiceField(required=False)
+
     class Meta:
         model = Note
         fields = ["title", "content", "category"]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # A note in a category being retired keeps it until the job moves
+        # the note, rather than the form picking another colour.
+        category_id = self.instance.category_id
+        if category_id is not None and get_category(category_id) is None:
+            self.fields["category"].current = self.instance.category
+
+    def _get_validation_exclusions(self):
+        # The category has already been checked against the palette, so the
+        # model's own (database) check of the foreign key is skipped.
+        exclude = super()._get_validation_exclusions()
+        exclude.add("category")
+        return exclude
+
 
 class CategoryForm(forms.ModelForm):
     """
@@ -0,0 +1,63 @@
+"""
+Password hashing profile (see PASSWORD_HASHERS in settings.py).
+
+Hashing a password is meant to be slow, to hold off anyone guessing
+passwords from a stolen database, but every login pays for it too. The
+NOTEY_PASSWORD_ITERATIONS setting trades one against the other; the
+tune_password_hasher command times the hasher on the server, to pick a value
+for a target login time.
+
+Passwords hashed with a different number of iterations (or an older hasher)
+still work, and are rehashed with the current profile the next time their
+user logs in.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher, with its number of iterations read from the
+    NOTEY_PASSWORD_ITERATIONS setting (Django's default when it is None).
+
+    It keeps the 'pbkdf2_sha256' algorithm name, so existing hashes are
+    verified with the iterations stored in them, and Django's must_update
+    upgrades those that differ.
+    """
+
+    @property
+    def iterations(self):
+        iterations = getattr(settings, "NOTEY_PASSWORD_ITERATIONS", None)
+        return iterations or PBKDF2PasswordHasher.iterations
+
+
+def time_hasher(iterations, rounds=3):
+    """
+    :param iterations: Number of PBKDF2 iterations.
+    :param rounds: Number of hashes timed, the fastest is kept.
+    :return: Seconds taken to hash a password.
+    """
+
+    hasher = PBKDF2PasswordHasher()
+    salt = hasher.salt()
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hasher.encode("benchmark password", salt, iterations)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def suggest_iterations(target_seconds, sample_iterations=100_000):
+    """
+    :param target_seconds: How long hashing a password should take.
+    :param sample_iterations: Number of iterations timed to estimate from.
+    :return: Number of iterations taking about the target time on this
+    machine, rounded to the nearest thousand.
+    """
+
+    per_iteration = time_hasher(sample_iterations) / sample_iterations
+    return max(1000, int(round(target_seconds / per_iteration, -3)))
@@ -0,0 +1,302 @@
+"""
+A small job queue kept in the database (see the Job model), for work too big
+to do during a request, i.e. deleting every note of a category or of a
+deleted account.
+
+A view queues a job in the same transaction as its own changes, and returns
+straight away. The run_jobs command, left running in the background (i.e.
+under systemd), works through the queue. A job is done a chunk at a time,
+each chunk in its own short transaction saving the job's progress, so a big
+job never holds a long lock on the database, and a worker that is stopped
+carries on from the last chunk.
+
+A chunk that raises an error is rolled back and retried later, the pause
+doubling after each failure, until NOTEY_JOB_MAX_ATTEMPTS failures in a row
+mark the job as failed.
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .changes import stamp_notes
+from .models import Category, Job, Note
+from .signals import bulk_delete_notes, notes_bulk_saved
+
+logger = logging.getLogger("notey.jobs")
+
+# Job handlers, by kind. A handler is given the Job and the chunk size, works
+# through one chunk (updating job.done and job.total), and returns True once
+# there is nothing left to do.
+HANDLERS = {}
+
+
+def handler(kind):
+    """
+    Decorator registering a function as the handler of a kind of job.
+
+    :param kind: Name of the kind of job.
+    """
+
+    def register(function):
+        HANDLERS[kind] = function
+        return function
+
+    return register
+
+
+def enqueue(kind, **payload):
+    """
+    :param kind: Name of the kind of job, see HANDLERS.
+    :param payload: The handler's arguments, JSON serialisable.
+    :return: The new Job object.
+    """
+
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown kind of job: {kind}")
+    return Job.objects.create(kind=kind, payload=payload)
+
+
+def retry_delay(attempts):
+    """
+    :param attempts: Number of failed attempts in a row.
+    :return: How long to wait before trying again.
+    """
+
+    base = getattr(settings, "NOTEY_JOB_RETRY_DELAY", 30)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 3600))
+
+
+def get_lease():
+    # How long a worker holds a job between chunks before others may take it.
+    return timedelta(seconds=getattr(settings, "NOTEY_JOB_LEASE", 300))
+
+
+def claim_job():
+    """
+    Finds the next job due to run, and locks it for this worker for
+    NOTEY_JOB_LEASE seconds. The lock is taken with a conditional UPDATE, so
+    two workers cannot both claim a job, on any database.
+
+    :return: The claimed Job object, or None if no job is due.
+    """
+
+    now = timezone.now()
+    unlocked = Q(locked_until=None) | Q(locked_until__lt=now)
+    due = (
+        Job.objects.filter(unlocked, status=Job.PENDING, run_after__lte=now)
+        .order_by("run_after", "pk")
+        .values_list("pk", flat=True)
+    )
+    for pk in due[:10]:
+        claimed = Job.objects.filter(unlocked, pk=pk).update(
+            locked_until=now + get_lease()
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def run_chunk(job, batch_size):
+    """
+    Works through one chunk of a job, saving its progress.
+
+    :param job: Job object, claimed by this worker.
+    :param batch_size: Number of items worked through.
+    :return: True when the worker is finished with the job, because it is
+    done, failed, or waiting to be retried.
+    """
+
+    try:
+        with transaction.atomic():
+            finished = HANDLERS[job.kind](job, batch_size)
+            job.attempts = 0
+            job.last_error = ""
+            if finished:
+                job.status = Job.DONE
+                job.locked_until = None
+            else:
+                job.locked_until = timezone.now() + get_lease()
+            job.save()
+    except Exception as error:
+        job.refresh_from_db()
+        job.attempts += 1
+        job.last_error = repr(error)
+        job.locked_until = None
+        max_attempts = getattr(settings, "NOTEY_JOB_MAX_ATTEMPTS", 5)
+        if job.attempts >= max_attempts:
+            job.status = Job.FAILED
+            logger.exception("Job %s (%s) failed.", job.pk, job.kind)
+        else:
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+            logger.warning(
+                "Job %s (%s) failed, attempt %d, retrying at %s.",
+                job.pk,
+                job.kind,
+                job.attempts,
+                job.run_after,
+                exc_info=True,
+            )
+        job.save()
+        return True
+    return finished
+
+
+def run_jobs(batch_size=None, pause=0.0):
+    """
+    Works through the due jobs, one chunk at a time, until none are left.
+
+    :param batch_size: Number of items per chunk, defaults to
+    NOTEY_JOB_BATCH_SIZE.
+    :param pause: Seconds to wait between chunks, to spread out the load on
+    the database.
+    :return: Generator of each chunk's Job object, after the chunk.
+    """
+
+    batch_size = batch_size or getattr(settings, "NOTEY_JOB_BATCH_SIZE", 1000)
+    while True:
+        job = claim_job()
+        if job is None:
+            return
+        finished = False
+        while not finished:
+            finished = run_chunk(job, batch_size)
+            yield job
+            if pause:
+                time.sleep(pause)
+
+
+def retire_category(category, reassign_to=None):
+    """
+    Deletes a category. A category without notes is deleted straight away.
+    Otherwise it is retired (hidden from the palette) and its notes are
+    deleted, or moved to another category, by a job.
+
+    :param category: Category object to delete.
+    :param reassign_to: Category object to move the notes to, None to delete
+    them.
+    :return: The queued Job object, or None if the category was deleted.
+    """
+
+    with transaction.atomic():
+        if not Note.objects.filter(category=category).exists():
+            category.delete()
+            return None
+        category.retired = True
+        category.save(update_fields=["retired"])
+        return enqueue(
+            "delete_category",
+            category_id=category.pk,
+            reassign_to=reassign_to.pk if reassign_to else None,
+        )
+
+
+def retire_user(user):
+    """
+    Deletes a user's account. A user without notes is deleted straight away.
+    Otherwise the user is deactivated (so they cannot log in) and their
+    notes, then the user, are deleted by a job.
+
+    :param user: User object to delete, already logged out.
+    :return: The queued Job object, or None if the user was deleted.
+    """
+
+    with transaction.atomic():
+        if not Note.objects.filter(user=user).exists():
+            user.delete()
+            return None
+        user.is_active = False
+        user.set_unusable_password()
+        user.save(update_fields=["is_active", "password"])
+        return enqueue("delete_user", user_id=user.pk)
+
+
+def delete_notes(job, notes, batch_size, owner_deleted=False):
+    """
+    Deletes a chunk of notes in bulk, updating the search index, the board
+    counters, the change tombstones and open boards once for the whole chunk
+    (see signals.bulk_delete_notes).
+
+    :param job: Job object, its progress is updated.
+    :param notes: Note QuerySet to delete.
+    :param batch_size: Number of notes deleted.
+    :param owner_deleted: True when the notes' owner is being deleted, see
+    bulk_delete_notes.
+    :return: True if there were no notes left to delete.
+    """
+
+    if job.total is None:
+        job.total = notes.count()
+    batch = list(notes.order_by("pk").only("user", "category")[:batch_size])
+    if not batch:
+        return True
+    bulk_delete_notes(batch, owner_deleted=owner_deleted)
+    job.done += len(batch)
+    return False
+
+
+@handler("delete_user")
+def delete_user(job, batch_size):
+    user_id = job.payload["user_id"]
+    notes = Note.objects.filter(user_id=user_id)
+    if delete_notes(job, notes, batch_size, owner_deleted=True):
+        User.objects.filter(pk=user_id).delete()
+        return True
+    return False
+
+
+@handler("delete_category")
+def delete_category(job, batch_size):
+    category_id = job.payload["category_id"]
+    reassign_to = job.payload.get("reassign_to")
+    notes = Note.objects.filter(category_id=category_id)
+    if not reassign_to:
+        if delete_notes(job, notes, batch_size):
+            Category.objects.filter(pk=category_id).delete()
+            return True
+        return False
+    if job.total is None:
+        job.total = notes.count()
+    batch = list(notes.order_by("pk")[:batch_size])
+    if not batch:
+        Category.objects.filter(pk=category_id).delete()
+        return True
+    # Saved in bulk, sending notes_bulk_saved for the search index, the board
+    # counters and open boards, as the JSON API does.
+    now = timezone.now()
+    for note in batch:
+        note.category_id = reassign_to
+        note.updated_at = now
+        note.version += 1
+    stamp_notes(batch)
+    Note.objects.bulk_update(
+        batch, ["category", "updated_at", "version", "change_seq"]
+    )
+    notes_bulk_saved.send(sender=Note, notes=batch, created=False)
+    job.done += len(batch)
+    return False
+
+
+def get_category_deletions():
+    """
+    :return: List of (category name, Job) tuples, for the category deletions
+    not finished yet.
+    """
+
+    jobs = list(
+        Job.objects.filter(kind="delete_category")
+        .exclude(status=Job.DONE)
+        .order_by("pk")
+    )
+    names = dict(
+        Category.objects.filter(
+            pk__in=[job.payload["category_id"] for job in jobs]
+        ).values_list("pk", "name")
+    )
+    return [(names.get(job.payload["category_id"]), job) for job in jobs]
@@ -0,0 +1,167 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from notey.benchmark import (
+    BenchmarkError,
+    compare,
+    load_results,
+    login_scenario,
+    measure,
+    save_results,
+    view_scenarios,
+)
+from notey.seeding import SEED_PALETTE, seed_categories, seed_notes, seed_users
+
+
+class Command(BaseCommand):
+    """
+    Management command to benchmark the note and category views against a
+    seeded database, reporting each view's latency percentiles, queries and
+    peak memory (see notey/benchmark.py).
+
+    The benchmark runs in a throwaway test database, created and seeded for
+    the run, so the site's own data is never touched. Save a run with
+    --output, and pass it as --baseline to a later run to fail (exit with an
+    error) when a view has got slower or makes more queries.
+
+    Example:
+    python manage.py benchmark --notes 100000 --output baseline.json
+    python manage.py benchmark --notes 100000 --baseline baseline.json
+    """
+
+    help = "Benchmarks the notey views against a seeded test database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=10, help="Number of users to seed."
+        )
+        parser.add_argument(
+            "--notes",
+            type=int,
+            default=10000,
+            help="Total number of notes, shared evenly between the users.",
+        )
+        parser.add_argument(
+            "--categories",
+            type=int,
+            default=len(SEED_PALETTE),
+            help="Number of categories to seed.",
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=50,
+            help="Number of measured requests per view.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=5,
+            help="Number of unmeasured requests per view, run first.",
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Empty the fragment cache before every request.",
+        )
+        parser.add_argument(
+            "--output", help="File to save the results to, as JSON."
+        )
+        parser.add_argument(
+            "--baseline", help="Results file of an earlier run to compare."
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="How much slower a view's median may get (default: 0.25).",
+        )
+
+    def handle(self, *args, **options):
+        if min(options["users"], options["categories"], options["rounds"]) < 1:
+            raise CommandError(
+                "--users, --categories and --rounds must be at least 1."
+            )
+        if options["notes"] < 50 * options["users"]:
+            raise CommandError("Seed at least 50 notes (a page) per user.")
+        baseline = (
+            load_results(options["baseline"]) if options["baseline"] else None
+        )
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            results = self.run_benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        self.print_results(results)
+        if options["output"]:
+            save_results(
+                options["output"],
+                results,
+                users=options["users"],
+                notes=options["notes"],
+                categories=options["categories"],
+                cold=options["cold"],
+            )
+        if baseline is not None:
+            regressions = compare(results, baseline, options["tolerance"])
+            if regressions:
+                raise CommandError(
+                    "Regressions found:\n" + "\n".join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS("No regressions found."))
+
+    def run_benchmark(self, options):
+        self.stdout.write(
+            f"Seeding {options['users']} users, {options['categories']} "
+            f"categories and {options['notes']} notes..."
+        )
+        categories = seed_categories(options["categories"])
+        user_ids = seed_users(options["users"], "benchmark")
+        for _ in seed_notes(user_ids, categories, options["notes"]):
+            pass
+        # The category page is only shown to superusers.
+        user = User.objects.get(pk=user_ids[0])
+        user.is_superuser = True
+        user.save()
+        user.set_password("benchmark password")
+        user.save()
+        client = Client()
+        client.force_login(user)
+        scenarios = view_scenarios(client, user)
+        scenarios.append(login_scenario(user.username, "benchmark password"))
+        results = []
+        try:
+            for scenario in scenarios:
+                result = measure(
+                    scenario,
+                    rounds=options["rounds"],
+                    warmup=options["warmup"],
+                    cold=options["cold"],
+                )
+                results.append(result.as_dict())
+        except BenchmarkError as error:
+            raise CommandError(str(error))
+        return results
+
+    def print_results(self, results):
+        header = (
+            f"{'view':<24}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}"
+            f"{'queries':>9}{'peak KiB':>10}"
+        )
+        self.stdout.write(self.style.MIGRATE_HEADING(header))
+        for result in results:
+            self.stdout.write(
+                f"{result['name']:<24}{result['p50_ms']:>9.2f}"
+                f"{result['p90_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+                f"{result['queries']:>9}{result['peak_kib']:>10.1f}"
+            )
@@ -0,0 +1,112 @@
+import itertools
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notey.models import Note
+from notey.transfer import (
+    FORMATS,
+    WRITERS,
+    Checkpoint,
+    export_rows,
+    guess_format,
+)
+
+
+class Command(BaseCommand):
+    """
+    Management command to export 'sticky-notes', with their owners and
+    categories, as JSON Lines or CSV (see notey/transfer.py).
+
+    Notes are read from the database a chunk at a time, in id order, and a
+    checkpoint (the last id written and the size of the file) is saved
+    beside the file after each chunk. If the export is interrupted, run it
+    again with --resume to carry on from the last checkpoint.
+
+    Example:
+    python manage.py export_notes notes.jsonl
+    python manage.py export_notes notes.csv --user craig --resume
+    """
+
+    help = "Exports notes as JSON Lines or CSV, in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", help="File to write, or - for standard output."
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="File format, defaults to csv for .csv files, else jsonl.",
+        )
+        parser.add_argument(
+            "--user",
+            action="append",
+            default=[],
+            help="Only export this user's notes (can be repeated).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of notes read from the database at a time.",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Carry on from the checkpoint of an interrupted export.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        format = options["format"] or guess_format(path)
+        queryset = Note.objects.all()
+        if options["user"]:
+            queryset = queryset.filter(user__username__in=options["user"])
+        if path == "-":
+            if options["resume"]:
+                raise CommandError("Cannot resume an export to stdout.")
+            self.export(queryset, sys.stdout, format, options, None)
+            return
+        checkpoint = Checkpoint(f"{path}.checkpoint")
+        state = checkpoint.load() if options["resume"] else {}
+        if options["resume"] and not state:
+            raise CommandError(f"There is no checkpoint for {path}.")
+        if state:
+            # Drops anything written after the checkpoint was saved.
+            with open(path, "r+b") as file:
+                file.truncate(state["offset"])
+        mode = "a" if state else "w"
+        with open(path, mode, encoding="utf-8", newline="") as file:
+            written = self.export(queryset, file, format, options, checkpoint)
+        checkpoint.remove()
+        self.stderr.write(self.style.SUCCESS(f"Exported {written} notes."))
+
+    def export(self, queryset, file, format, options, checkpoint):
+        state = checkpoint.state if checkpoint else {}
+        writer = WRITERS[format](file)
+        if not state:
+            writer.write_header()
+        written = state.get("written", 0)
+        rows = export_rows(
+            queryset,
+            after_id=state.get("last_id", 0),
+            chunk_size=options["chunk_size"],
+        )
+        while True:
+            chunk = list(itertools.islice(rows, options["chunk_size"]))
+            if not chunk:
+                break
+            for row in chunk:
+                writer.write(row)
+            written += len(chunk)
+            file.flush()
+            if checkpoint:
+                checkpoint.save(
+                    last_id=chunk[-1]["id"],
+                    offset=file.tell(),
+                    written=written,
+                )
+            # Progress goes to stderr, as the notes may go to stdout.
+            self.stderr.write(f"{written} notes exported.")
+        return written
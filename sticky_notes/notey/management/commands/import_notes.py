@@ -0,0 +1,92 @@
+import itertools
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from notey.transfer import (
+    FORMATS,
+    Checkpoint,
+    NoteImporter,
+    TransferError,
+    guess_format,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    """
+    Management command to import 'sticky-notes' written by export_notes
+    (see notey/transfer.py).
+
+    The file is read a batch at a time, and each batch written with
+    bulk_create in its own transaction. A checkpoint (the number of notes
+    imported) is saved beside the file after each batch, so an interrupted
+    import can be carried on with --resume. The imported notes get new ids.
+
+    Example:
+    python manage.py import_notes notes.jsonl
+    python manage.py import_notes notes.csv --resume
+    """
+
+    help = "Imports notes from JSON Lines or CSV, in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to read.")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="File format, defaults to csv for .csv files, else jsonl.",
+        )
+        parser.add_argument(
+            "--owner",
+            help="Give every note to this user, not the owners in the file.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Number of notes written per INSERT.",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Carry on from the checkpoint of an interrupted import.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        format = options["format"] or guess_format(path)
+        owner = None
+        if options["owner"]:
+            try:
+                owner = User.objects.get(username=options["owner"])
+            except User.DoesNotExist:
+                raise CommandError(
+                    f"There is no user called {options['owner']}."
+                )
+        checkpoint = Checkpoint(f"{path}.checkpoint")
+        state = checkpoint.load() if options["resume"] else {}
+        if options["resume"] and not state:
+            raise CommandError(f"There is no checkpoint for {path}.")
+        imported = state.get("imported", 0)
+        importer = NoteImporter(owner=owner)
+        try:
+            with open(path, encoding="utf-8", newline="") as file:
+                rows = read_rows(file, format)
+                # Skips the notes imported before the checkpoint.
+                rows = itertools.islice(rows, imported, None)
+                while True:
+                    batch = list(itertools.islice(rows, options["batch_size"]))
+                    if not batch:
+                        break
+                    importer.import_batch(batch)
+                    imported += len(batch)
+                    checkpoint.save(imported=imported)
+                    self.stdout.write(f"{imported} notes imported.")
+        except (TransferError, KeyError) as error:
+            raise CommandError(
+                f"Stopped after {imported} notes: {error}. Fix the file and "
+                "run again with --resume."
+            )
+        checkpoint.remove()
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} notes."))
@@ -0,0 +1,272 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import AsyncClient, Client, override_settings
+from django.urls import include, path
+
+from notey import urls
+
+
+class SyncURLConf:
+    urlpatterns = [path("", include(urls.urlpatterns))]
+
+
+class AsyncURLConf:
+    urlpatterns = [path("", include(urls.async_urlpatterns + urls.urlpatterns))]
+
+
+class Load:
+    """
+    Tracks the requests in flight, and the threads the process runs, during
+    a run.
+
+    Fields:
+    - in_flight: Number of requests being served now.
+    - peak_requests: Most requests served at once.
+    - peak_threads: Most threads running at once, above those running before
+      the run started.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_requests = 0
+        self.peak_threads = 0
+        self._baseline = threading.active_count()
+        self._running = threading.Event()
+        self._sampler = None
+
+    def started(self):
+        with self.lock:
+            self.in_flight += 1
+            self.peak_requests = max(self.peak_requests, self.in_flight)
+
+    def finished(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def __enter__(self):
+        # Counts the threads every millisecond, in a thread of its own.
+        def sample():
+            while not self._running.wait(0.001):
+                threads = threading.active_count() - self._baseline - 1
+                self.peak_threads = max(self.peak_threads, threads)
+
+        self._sampler = threading.Thread(target=sample, daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._running.set()
+        self._sampler.join()
+
+
+class SlowDependencyMiddleware:
+    """
+    Stands in for a slow dependency of every request (i.e. a remote API, or
+    a slow database query), waiting Command.delay seconds. Under WSGI the
+    wait blocks the request's thread, as a blocking client library would.
+    Under ASGI it is awaited, as an async client library would, so the
+    thread serves other requests meanwhile.
+
+    Parameters:
+    - get_response: The next middleware, or the view.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        Command.load.started()
+        try:
+            time.sleep(Command.delay)
+            return self.get_response(request)
+        finally:
+            Command.load.finished()
+
+    async def __acall__(self, request):
+        Command.load.started()
+        try:
+            await asyncio.sleep(Command.delay)
+            return await self.get_response(request)
+        finally:
+            Command.load.finished()
+
+
+class Command(BaseCommand):
+    """
+    Management command to compare the sync views, served the WSGI way (a
+    fixed pool of worker threads, one request per thread), with the async
+    views in async_views.py, served the ASGI way (one event loop).
+
+    Every request waits on a simulated slow dependency (--delay), the case
+    the async views are for: a WSGI worker thread is held for the whole
+    wait, while the event loop serves other requests. Each run reports the
+    throughput, the most requests served at once, and the most threads used
+    to serve them.
+
+    Both are driven in this process through Django's test clients, so the
+    numbers leave out the web server, but include the middleware, the
+    database and the templates. Run it against a seeded database (see
+    seed_notes), with DEBUG off. Slow requests are not logged during the
+    runs (see NOTEY_SLOW_REQUEST_MS).
+
+    Example:
+    python manage.py seed_notes --users 10 --notes 10000
+    python manage.py loadtest --requests 500 --concurrency 50 --delay 100
+    """
+
+    # Set for the SlowDependencyMiddleware while the command runs.
+    delay = 0.0
+    load = None
+
+    help = "Compares the request throughput of the sync and async views."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            help="Username to log in as, defaults to the user with most notes.",
+        )
+        parser.add_argument(
+            "--path",
+            default="/notes",
+            help="Page to request (default: /notes).",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Number of requests to make on each path (default: 200).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=20,
+            help="Number of requests the clients send at once (default: 20).",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Number of WSGI worker threads (default: 8).",
+        )
+        parser.add_argument(
+            "--delay",
+            type=int,
+            default=50,
+            help="Milliseconds each request waits on the simulated slow "
+            "dependency (default: 50, 0 for none).",
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options["user"])
+        total = options["requests"]
+        concurrency = options["concurrency"]
+        url = options["path"]
+        Command.delay = options["delay"] / 1000
+        self.stdout.write(
+            f"{total} requests for {url} as {user.username}, "
+            f"{concurrency} at a time, each waiting {options['delay']}ms on "
+            f"a slow dependency."
+        )
+        common = {
+            # The test clients send requests for the 'testserver' host.
+            "ALLOWED_HOSTS": ["testserver"],
+            "MIDDLEWARE": settings.MIDDLEWARE
+            + [f"{__name__}.SlowDependencyMiddleware"],
+            # Every request would be logged as slow otherwise.
+            "NOTEY_SLOW_REQUEST_MS": None,
+        }
+        with override_settings(ROOT_URLCONF=SyncURLConf, **common):
+            self.report(
+                f"WSGI (sync views, {options['threads']} threads)",
+                self.run_sync,
+                user,
+                url,
+                options,
+            )
+        with override_settings(ROOT_URLCONF=AsyncURLConf, **common):
+            self.report(
+                "ASGI (async views)", self.run_async, user, url, options
+            )
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"There is no user called {username}.")
+        busiest = (
+            User.objects.annotate(total=Count("note"))
+            .order_by("-total")
+            .first()
+        )
+        if busiest is None:
+            raise CommandError("There are no users, run seed_notes first.")
+        return busiest
+
+    def report(self, title, run, user, url, options):
+        total = options["requests"]
+        with Load() as load:
+            Command.load = load
+            start = time.perf_counter()
+            statuses = run(user, url, total, options)
+            elapsed = time.perf_counter() - start
+        failed = sum(1 for status in statuses if status != 200)
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(
+            f"  {elapsed:.2f}s, {total / elapsed:.1f} requests/s, "
+            f"{failed} failed\n"
+            f"  At most {load.peak_requests} requests served at once, "
+            f"on at most {load.peak_threads} threads"
+        )
+
+    def run_sync(self, user, url, total, options):
+        client = Client()
+        client.force_login(user)
+        cookies = client.cookies
+
+        def fetch(_):
+            thread_client = Client()
+            thread_client.cookies = cookies
+            try:
+                return thread_client.get(url).status_code
+            finally:
+                connection.close()
+
+        # The clients send up to --concurrency requests at once, but only
+        # --threads of them are served at a time, the rest wait in the queue
+        # (as in a WSGI server's backlog).
+        with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+            return list(pool.map(fetch, range(total)))
+
+    def run_async(self, user, url, total, options):
+        client = AsyncClient()
+        client.force_login(user)
+
+        async def main():
+            slots = asyncio.Semaphore(options["concurrency"])
+
+            async def fetch():
+                async with slots:
+                    response = await client.get(url)
+                    return response.status_code
+
+            return await asyncio.gather(*(fetch() for _ in range(total)))
+
+        return asyncio.run(main())
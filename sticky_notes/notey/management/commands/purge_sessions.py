@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from notey.sessions import get_session_store, purge_expired_sessions
+
+
+class Command(BaseCommand):
+    """
+    Management command to delete expired sessions in small, rate-limited
+    batches, reporting its progress as it goes.
+
+    Meant to be run regularly in the background (i.e. from cron), in place of
+    clearing every session when a user deletes their account.
+
+    Example:
+    python manage.py purge_sessions --batch-size 500 --pause 0.1
+    """
+
+    help = "Deletes expired sessions in batches, pausing between batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of sessions deleted per batch.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.05,
+            help="Seconds to wait between batches.",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=None,
+            help="Stop after this many batches, the rest are left for the "
+            "next run.",
+        )
+
+    def handle(self, *args, **options):
+        SessionStore = get_session_store()
+        if not hasattr(SessionStore, "get_model_class"):
+            raise CommandError(
+                "The session engine does not store sessions in the database, "
+                "there is nothing to purge."
+            )
+        Session = SessionStore.get_model_class()
+        expired = Session.objects.filter(expire_date__lt=timezone.now())
+        self.stdout.write(f"{expired.count()} expired sessions to purge.")
+        started = time.perf_counter()
+        batches = 0
+        deleted = 0
+        for count in purge_expired_sessions(
+            batch_size=options["batch_size"], pause=options["pause"]
+        ):
+            batches += 1
+            deleted += count
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"Batch {batches}: {deleted} sessions deleted "
+                f"({deleted / elapsed:.0f}/s)."
+            )
+            if batches == options["max_batches"]:
+                break
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Purged {deleted} sessions in {batches} batches, "
+                f"{time.perf_counter() - started:.1f}s."
+            )
+        )
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+
+from notey.models import Category, Note
+from notey.pagination import KeysetPage, encode_cursor
+from notey.views import NOTE_DETAIL_FIELDS, NOTE_LIST_FIELDS
+
+
+def note_list_page(user_id, cursor=None):
+    """
+    The page of notes the note_list view shows, for the given user.
+
+    :param user_id: Primary key of the user whose dashboard is checked.
+    :param cursor: Cursor of the page, None for the first page.
+    :return: KeysetPage of the user's notes.
+    """
+
+    return KeysetPage(
+        Note.objects.filter(user_id=user_id)
+        .select_related("category")
+        .only(*NOTE_LIST_FIELDS),
+        cursor=cursor,
+    )
+
+
+class Command(BaseCommand):
+    """
+    Management command to print the database's query plans for the queries
+    behind note_list, note_detail and category_list.
+
+    Run it against a seeded database (see seed_notes) before and after the
+    0006_note_category_indexes migration to compare the plans.
+
+    Example:
+    python manage.py seed_notes --users 10 --notes 1000000
+    python manage.py query_plans --analyze
+    """
+
+    help = "Prints the query plans of the dashboard, detail and category pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            help="User id to plan for, defaults to the user with most notes.",
+        )
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Refresh the database's table statistics first.",
+        )
+
+    def handle(self, *args, **options):
+        if options["analyze"]:
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        user_id = options["user"] or self.busiest_user()
+        if user_id is None:
+            raise CommandError("There are no notes, run seed_notes first.")
+        first_page = note_list_page(user_id)
+        last_note = first_page.object_list[-1]
+        plans = {
+            "note_list (first page)": first_page.get_queryset(),
+            "note_list (next page)": note_list_page(
+                user_id, cursor=encode_cursor(last_note)
+            ).get_queryset(),
+            "note_detail": Note.objects.only(*NOTE_DETAIL_FIELDS).filter(
+                pk=last_note.pk
+            ),
+            "category_list": Category.objects.order_by("name"),
+        }
+        for title, queryset in plans.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain())
+            self.stdout.write("")
+
+    def busiest_user(self):
+        busiest = (
+            Note.objects.values("user_id")
+            .annotate(total=Count("id"))
+            .order_by("-total")
+            .first()
+        )
+        return busiest["user_id"] if busiest else None
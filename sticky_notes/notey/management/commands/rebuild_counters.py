@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from notey.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    """
+    Management command to recount users' 'sticky-notes' from the Note table,
+    for boards whose counters (see notey/counters.py) have drifted, i.e.
+    after notes were changed with raw SQL.
+
+    Example:
+    python manage.py rebuild_counters --user alice
+    """
+
+    help = "Recounts the notes on every board, or on the given users' boards."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            action="append",
+            default=[],
+            help="Only recount this user's board (can be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options["user"]:
+            user_ids = list(
+                User.objects.filter(username__in=options["user"]).values_list(
+                    "pk", flat=True
+                )
+            )
+            if len(user_ids) != len(set(options["user"])):
+                raise CommandError("Unknown username.")
+        count = rebuild_counters(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Recounted {count} boards."))
@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notey.jobs import run_jobs
+from notey.models import Job
+
+
+class Command(BaseCommand):
+    """
+    Management command working through the background job queue (see
+    notey/jobs.py), i.e. deleting the notes of deleted categories, a chunk
+    at a time, reporting its progress as it goes.
+
+    Run it with --forever under a process manager (i.e. systemd), or
+    without it regularly from cron.
+
+    Example:
+    python manage.py run_jobs --forever --batch-size 500 --pause 0.1
+    """
+
+    help = "Runs the queued background jobs, a chunk at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Number of items per chunk, defaults to "
+            "NOTEY_JOB_BATCH_SIZE.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.05,
+            help="Seconds to wait between chunks.",
+        )
+        parser.add_argument(
+            "--forever",
+            action="store_true",
+            help="Keep waiting for new jobs, rather than stopping when the "
+            "queue is empty.",
+        )
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=5,
+            help="Seconds to wait before checking an empty queue again, with "
+            "--forever.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for job in run_jobs(options["batch_size"], options["pause"]):
+                self.report(job)
+            if not options["forever"]:
+                break
+            time.sleep(options["poll"])
+
+    def report(self, job):
+        total = "?" if job.total is None else job.total
+        message = f"Job {job.pk} ({job.kind}): {job.done} of {total} done."
+        if job.status == Job.DONE:
+            self.stdout.write(self.style.SUCCESS(message))
+        elif job.status == Job.FAILED:
+            self.stdout.write(
+                self.style.ERROR(f"{message} Failed: {job.last_error}")
+            )
+        elif job.attempts:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{message} Retrying at {job.run_after:%H:%M:%S}: "
+                    f"{job.last_error}"
+                )
+            )
+        else:
+            self.stdout.write(message)
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notey.seeding import SEED_PALETTE, seed_categories, seed_notes, seed_users
+
+
+class Command(BaseCommand):
+    """
+    Management command to fill the database with generated users, categories
+    and 'sticky-notes', for benchmarking and checking query plans.
+
+    The rows are written with bulk_create, a batch at a time, so seeding a
+    million notes runs in constant memory (see notey/seeding.py).
+
+    Example:
+    python manage.py seed_notes --users 10 --notes 1000000
+    """
+
+    help = "Seeds the database with generated users, categories and notes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=10, help="Number of users to create."
+        )
+        parser.add_argument(
+            "--notes",
+            type=int,
+            default=1000,
+            help="Total number of notes, shared evenly between the users.",
+        )
+        parser.add_argument(
+            "--categories",
+            type=int,
+            default=len(SEED_PALETTE),
+            help="Number of categories the notes are spread over.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of notes written per INSERT.",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Prefix for the generated usernames.",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--users and --batch-size must be at least 1.")
+        if options["categories"] < 1:
+            raise CommandError("--categories must be at least 1.")
+        started = time.perf_counter()
+        categories = seed_categories(options["categories"])
+        users = seed_users(options["users"], options["prefix"])
+        total = options["notes"]
+        written = 0
+        for written in seed_notes(
+            users, categories, total, options["batch_size"]
+        ):
+            self.stdout.write(f"{written}/{total} notes written.")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {len(users)} users and {written} notes in "
+                f"{time.perf_counter() - started:.1f}s."
+            )
+        )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from notey.hashers import (
+    TunablePBKDF2PasswordHasher,
+    suggest_iterations,
+    time_hasher,
+)
+
+
+class Command(BaseCommand):
+    """
+    Management command to time the password hasher on this machine, and
+    suggest a NOTEY_PASSWORD_ITERATIONS value for a target login time (see
+    notey/hashers.py).
+
+    Example:
+    python manage.py tune_password_hasher --target-ms 150
+    """
+
+    help = "Times password hashing and suggests NOTEY_PASSWORD_ITERATIONS."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            default=250,
+            help="How long hashing a password should take, in milliseconds.",
+        )
+
+    def handle(self, *args, **options):
+        current = TunablePBKDF2PasswordHasher().iterations
+        seconds = time_hasher(current)
+        self.stdout.write(
+            f"Current: {current} iterations, {seconds * 1000:.1f}ms per "
+            f"login, at most {1 / seconds:.1f} logins/s per CPU core."
+        )
+        suggested = suggest_iterations(options["target_ms"] / 1000)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Suggested: NOTEY_PASSWORD_ITERATIONS={suggested} for about "
+                f"{options['target_ms']:.0f}ms per login."
+            )
+        )
@@ -0,0 +1,290 @@
+"""
+Request metrics: how long each view takes, and how much of that is spent on
+SQL (split between session handling and everything else) and on rendering
+templates.
+
+MetricsMiddleware (see middleware.py) measures every request, and the
+metrics view shows the totals in the Prometheus text format. The totals are
+kept in each process's memory, so with several worker processes each one
+reports its own (as Prometheus expects, scraping each process).
+
+Queries are seen through a database execute wrapper, added to every
+connection, and template rendering through the DjangoTemplates subclass at
+the bottom of this file (see TEMPLATES in settings.py). Both report to the
+request being measured through a context variable, which follows the
+request into the threads async views run their queries in.
+"""
+
+import contextvars
+import threading
+import time
+from collections import defaultdict
+
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+# Upper bounds of the histograms' buckets.
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# The RequestStats of the request being measured, if any.
+_current = contextvars.ContextVar("notey_request_stats", default=None)
+
+
+class RequestStats:
+    """
+    What one request spent its time on.
+
+    Fields:
+    - queries: List of (sql, seconds) tuples, one per query.
+    - template_seconds: Time spent rendering templates.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.template_seconds = 0.0
+
+    def query_seconds(self, session=None):
+        """
+        :param session: True for the session queries only, False for the
+        rest, None for all of them.
+        :return: Total time spent on the queries, in seconds.
+        """
+
+        return sum(
+            seconds
+            for sql, seconds in self.queries
+            if session is None or is_session_query(sql) == session
+        )
+
+
+def is_session_query(sql):
+    return "django_session" in sql or "notey_usersession" in sql
+
+
+def start_request():
+    """
+    Starts measuring the current request.
+
+    :return: Tuple of the RequestStats object, and the token to pass to
+    end_request.
+    """
+
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper, timing every query made while a request is
+    measured.
+    """
+
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries.append((sql, time.perf_counter() - start))
+
+
+def install_query_recorder(connection=None, **kwargs):
+    """
+    Adds record_query to the given database connection, or all of them.
+    Connected to the connection_created signal (see signals.py), so each new
+    connection gets it.
+    """
+
+    for conn in [connection] if connection else connections.all():
+        if record_query not in conn.execute_wrappers:
+            conn.execute_wrappers.append(record_query)
+
+
+class Histogram:
+    """
+    Counts observations into buckets, per set of label values.
+    """
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = defaultdict(lambda: [[0] * len(buckets), 0, 0.0])
+
+    def observe(self, value, *label_values):
+        counts, _, _ = series = self._series[label_values]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        series[1] += 1
+        series[2] += value
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for label_values, (counts, count, total) in sorted(
+            self._series.items()
+        ):
+            labels = format_labels(self.labels, label_values)
+            for bound, bucket_count in zip(self.buckets, counts):
+                le = format_labels(
+                    self.labels + ("le",), label_values + (str(bound),)
+                )
+                lines.append(f"{self.name}_bucket{le} {bucket_count}")
+            le = format_labels(self.labels + ("le",), label_values + ("+Inf",))
+            lines.append(f"{self.name}_bucket{le} {count}")
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Counter:
+    """
+    Counts events, per set of label values.
+    """
+
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._series = defaultdict(int)
+
+    def inc(self, *label_values):
+        self._series[label_values] += 1
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} counter",
+        ]
+        for label_values, count in sorted(self._series.items()):
+            labels = format_labels(self.labels, label_values)
+            lines.append(f"{self.name}{labels} {count}")
+        return lines
+
+
+def format_labels(names, values):
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value)
+            .replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("\n", "\\n"),
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Registry:
+    """
+    The metrics of this process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter(
+            "notey_requests_total",
+            "Requests answered, by view, method and status code.",
+            ("view", "method", "status"),
+        )
+        self.duration = Histogram(
+            "notey_request_duration_seconds",
+            "Time taken to answer a request, by view.",
+            ("view",),
+            SECONDS_BUCKETS,
+        )
+        self.queries = Histogram(
+            "notey_request_queries",
+            "Number of SQL queries made per request, by view.",
+            ("view",),
+            QUERY_BUCKETS,
+        )
+        self.query_duration = Histogram(
+            "notey_request_query_seconds",
+            "Time spent on SQL queries per request, by view and whether the "
+            "queries were for the session.",
+            ("view", "session"),
+            SECONDS_BUCKETS,
+        )
+        self.template_duration = Histogram(
+            "notey_request_template_seconds",
+            "Time spent rendering templates per request, by view.",
+            ("view",),
+            SECONDS_BUCKETS,
+        )
+
+    def record(self, view, method, status, seconds, stats):
+        with self._lock:
+            self.requests.inc(view, method, str(status))
+            self.duration.observe(seconds, view)
+            self.queries.observe(len(stats.queries), view)
+            for session in (True, False):
+                self.query_duration.observe(
+                    stats.query_seconds(session), view, str(session).lower()
+                )
+            self.template_duration.observe(stats.template_seconds, view)
+
+    def render(self):
+        """
+        :return: The metrics, in the Prometheus text format.
+        """
+
+        with self._lock:
+            metrics = (
+                self.requests,
+                self.duration,
+                self.queries,
+                self.query_duration,
+                self.template_duration,
+            )
+            lines = [line for metric in metrics for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class InstrumentedTemplate:
+    """
+    Wraps a template of the Django template backend, timing its rendering.
+    """
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return self.template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            stats.template_seconds += time.perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, timing the templates views render (see
+    TEMPLATES in settings.py).
+    """
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return InstrumentedTemplate(super().get_template(template_name))
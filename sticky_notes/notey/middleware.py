@@ -0,0 +1,210 @@
+import logging
+import mimetypes
+import posixpath
+import time
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .metrics import (
+    end_request,
+    install_query_recorder,
+    registry,
+    start_request,
+)
+from .sessions import session_key_changed
+
+logger = logging.getLogger("notey.metrics")
+
+
+class MetricsMiddleware:
+    """
+    Measures every request: how long it took, its queries and how long it
+    spent rendering templates (see metrics.py), and logs the requests slower
+    than NOTEY_SLOW_REQUEST_MS, with their queries.
+
+    It is first in MIDDLEWARE, so the time taken includes the other
+    middleware, i.e. loading and saving the session. It works with both the
+    sync and the async views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        install_query_recorder()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats, token = start_request()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats, token = start_request()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, stats, seconds):
+        match = request.resolver_match
+        # Labelled by URL name rather than path, so every note's detail page
+        # is counted together.
+        view = match.view_name if match else "unmatched"
+        registry.record(
+            view, request.method, response.status_code, seconds, stats
+        )
+        slow_ms = getattr(settings, "NOTEY_SLOW_REQUEST_MS", None)
+        if slow_ms is not None and seconds * 1000 >= slow_ms:
+            logger.warning(
+                "Slow request: %s %s took %.1fms, %d queries (%.1fms), "
+                "templates %.1fms.\n%s",
+                request.method,
+                request.get_full_path(),
+                seconds * 1000,
+                len(stats.queries),
+                stats.query_seconds() * 1000,
+                stats.template_seconds * 1000,
+                "\n".join(
+                    f"  {query_seconds * 1000:.1f}ms {sql}"
+                    for sql, query_seconds in stats.queries
+                ),
+            )
+
+
+# Hashed file names change with their content, so they can be cached for a
+# year. Other files are only cached briefly.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+CACHE_CONTROL = "public, max-age=300"
+
+# Precompressed copies written by collectstatic (see storage.py), best first.
+ENCODINGS = ((".br", "br"), (".gz", "gzip"))
+
+
+class SessionKeyMiddleware(MiddlewareMixin):
+    """
+    Keeps the record of a user's session (see sessions.py) when the session
+    key is cycled during a request, i.e. by update_session_auth_hash after a
+    password change, so the session can still be ended when the user deletes
+    their account.
+
+    Goes after AuthenticationMiddleware. Requests that keep their key cost
+    nothing more.
+    """
+
+    def process_request(self, request):
+        request.notey_session_key = request.session.session_key
+
+    def process_response(self, request, response):
+        old_key = getattr(request, "notey_session_key", None)
+        if old_key and request.session.session_key != old_key:
+            session_key_changed(
+                getattr(request, "user", AnonymousUser()),
+                old_key,
+                request.session,
+            )
+        return response
+
+
+class StaticFilesMiddleware(MiddlewareMixin):
+    """
+    Serves the collected static files (STATIC_ROOT) from the app itself, so
+    a deployment needs no separate web server for them.
+
+    Sends the brotli or gzip copy of a file where the browser accepts it,
+    and lets browsers cache the hashed files (see storage.py) for good. Only
+    used when NOTEY_STATIC_PIPELINE is on; otherwise runserver serves them.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "NOTEY_STATIC_PIPELINE", False):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.prefix = urlparse(settings.STATIC_URL).path
+        if not self.prefix.startswith("/"):
+            self.prefix = "/" + self.prefix
+        self.root = Path(settings.STATIC_ROOT)
+        hashed_files = getattr(staticfiles_storage, "hashed_files", {})
+        self.immutable = set(hashed_files.values())
+
+    def process_request(self, request):
+        if request.method not in ("GET", "HEAD"):
+            return None
+        if not request.path_info.startswith(self.prefix):
+            return None
+        name = posixpath.normpath(
+            unquote(request.path_info[len(self.prefix) :])
+        )
+        if name.startswith((".", "/")):
+            return None
+        path = self.root / name
+        if not path.is_file():
+            return None
+        return self.serve(request, name, path)
+
+    def serve(self, request, name, path):
+        """
+        :param request: HTTP request object.
+        :param name: Name of the static file, i.e. 'notey/css/main.css'.
+        :param path: Path of the file in STATIC_ROOT.
+        :return: HTTP response with the file.
+        """
+
+        accepted = {
+            part.split(";")[0].strip()
+            for part in request.headers.get("Accept-Encoding", "").split(",")
+        }
+        compressed = [
+            (Path(f"{path}{suffix}"), encoding)
+            for suffix, encoding in ENCODINGS
+            if Path(f"{path}{suffix}").is_file()
+        ]
+        encoding = None
+        for candidate, candidate_encoding in compressed:
+            if candidate_encoding in accepted:
+                path, encoding = candidate, candidate_encoding
+                break
+        mtime = path.stat().st_mtime
+        if not was_modified_since(
+            request.headers.get("If-Modified-Since"), mtime
+        ):
+            response = HttpResponseNotModified()
+        else:
+            content_type = mimetypes.guess_type(name)[0]
+            response = FileResponse(
+                path.open("rb"),
+                content_type=content_type or "application/octet-stream",
+            )
+            response["Last-Modified"] = http_date(mtime)
+            if encoding:
+                response["Content-Encoding"] = encoding
+        if compressed:
+            response["Vary"] = "Accept-Encoding"
+        response["Cache-Control"] = (
+            IMMUTABLE_CACHE_CONTROL if name in self.immutable else CACHE_CONTROL
+        )
+        return response
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.13 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notey", "0005_alter_note_user"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(
+                fields=["name", "hex_value"], name="notey_category_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                fields=["user", "created_at", "id"],
+                name="notey_note_user_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE notey_note_fts USING fts5("
+    "title, content, owner, tokenize = 'porter unicode61')",
+    "INSERT INTO notey_note_fts (rowid, title, content, owner) "
+    "SELECT id, title, content, COALESCE(user_id, '') FROM notey_note",
+]
+
+SQLITE_BACKWARD = ["DROP TABLE IF EXISTS notey_note_fts"]
+
+POSTGRESQL_FORWARD = [
+    "ALTER TABLE notey_note ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+    ") STORED",
+    "CREATE INDEX notey_note_search_idx ON notey_note "
+    "USING GIN (search_vector)",
+]
+
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS notey_note_search_idx",
+    "ALTER TABLE notey_note DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, []):
+            schema_editor.execute(sql)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+    """
+    Creates the full-text search index for notes (see notey/search.py).
+
+    The index lives outside of Django's models, so it is made with SQL for the
+    database in use. Other databases fall back to unindexed searches.
+    """
+
+    dependencies = [
+        ("notey", "0007_usersession"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run(
+                {
+                    "sqlite": SQLITE_FORWARD,
+                    "postgresql": POSTGRESQL_FORWARD,
+                }
+            ),
+            run(
+                {
+                    "sqlite": SQLITE_BACKWARD,
+                    "postgresql": POSTGRESQL_BACKWARD,
+                }
+            ),
+        ),
+    ]
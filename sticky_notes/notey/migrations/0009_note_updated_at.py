@@ -0,0 +1,34 @@
+# Generated by Django 4.2.13 on 2026-10-18 19:20
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notey", "0008_note_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="note",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        # Existing notes were last changed, as far as is known, when created.
+        migrations.RunSQL(
+            "UPDATE notey_note SET updated_at = created_at",
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                fields=["user", "updated_at"],
+                name="notey_note_user_updated_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 4.2.13 on 2026-10-18 19:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_boards(apps, schema_editor):
+    # Fills in the counters of the boards existing before them (see
+    # notey/counters.py).
+    BoardSummary = apps.get_model("notey", "BoardSummary")
+    CategoryCount = apps.get_model("notey", "CategoryCount")
+    Note = apps.get_model("notey", "Note")
+    notes = Note.objects.exclude(user=None).order_by()
+    BoardSummary.objects.bulk_create(
+        BoardSummary(
+            user_id=row["user_id"],
+            note_count=row["count"],
+            last_modified=row["last_modified"],
+        )
+        for row in notes.values("user_id").annotate(
+            count=models.Count("id"), last_modified=models.Max("updated_at")
+        )
+    )
+    CategoryCount.objects.bulk_create(
+        CategoryCount(
+            user_id=row["user_id"],
+            category_id=row["category_id"],
+            note_count=row["count"],
+        )
+        for row in notes.exclude(category=None)
+        .values("user_id", "category_id")
+        .annotate(count=models.Count("id"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("notey", "0009_note_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BoardSummary",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("note_count", models.PositiveIntegerField(default=0)),
+                ("last_modified", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CategoryCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("note_count", models.PositiveIntegerField(default=0)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="notey.category",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="categorycount",
+            constraint=models.UniqueConstraint(
+                fields=("user", "category"),
+                name="notey_categorycount_user_category_uniq",
+            ),
+        ),
+        migrations.RunPython(count_boards, migrations.RunPython.noop),
+    ]
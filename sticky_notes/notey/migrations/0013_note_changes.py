@@ -0,0 +1,86 @@
+# Generated by Django 4.2.13 on 2026-10-18 19:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def number_changes(apps, schema_editor):
+    # Numbers the existing notes of each user in the order they were last
+    # saved, so a client syncing from 0 gets them all (see notey/changes.py).
+    BoardSummary = apps.get_model("notey", "BoardSummary")
+    Note = apps.get_model("notey", "Note")
+    user_ids = Note.objects.exclude(user=None).values_list("user_id", flat=True)
+    for user_id in user_ids.distinct().order_by():
+        notes = list(
+            Note.objects.filter(user_id=user_id)
+            .order_by("updated_at", "pk")
+            .only("pk")
+        )
+        for seq, note in enumerate(notes, start=1):
+            note.change_seq = seq
+        Note.objects.bulk_update(notes, ["change_seq"], batch_size=1000)
+        BoardSummary.objects.update_or_create(
+            user_id=user_id,
+            defaults={"change_seq": len(notes)},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("notey", "0012_note_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NoteTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("note_id", models.PositiveBigIntegerField()),
+                ("change_seq", models.PositiveIntegerField()),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="boardsummary",
+            name="change_seq",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="note",
+            name="change_seq",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                fields=["user", "change_seq"], name="notey_note_user_change_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="notetombstone",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notetombstone",
+            index=models.Index(
+                fields=["user", "change_seq"],
+                name="notey_tombstone_user_seq_idx",
+            ),
+        ),
+        migrations.RunPython(number_changes, migrations.RunPython.noop),
+    ]
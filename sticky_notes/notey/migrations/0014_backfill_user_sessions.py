@@ -0,0 +1,44 @@
+# Generated by Django 4.2.13 on 2026-10-18 21:12
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import migrations
+from django.utils import timezone
+
+
+def record_live_sessions(apps, schema_editor):
+    # Records the sessions logged in before the UserSession table was added
+    # (0007), so they are ended with the rest when their user deletes their
+    # account (see notey/sessions.py). The user id is inside the encoded
+    # session data.
+    Session = apps.get_model("sessions", "Session")
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    UserSession = apps.get_model("notey", "UserSession")
+    recorded = set(UserSession.objects.values_list("session_key", flat=True))
+    user_ids = set(User.objects.values_list("pk", flat=True))
+    decoder = SessionStore()
+    live = Session.objects.filter(expire_date__gt=timezone.now())
+    records = []
+    for session_key, session_data in live.values_list(
+        "session_key", "session_data"
+    ).iterator():
+        if session_key in recorded:
+            continue
+        user_id = decoder.decode(session_data).get("_auth_user_id")
+        if user_id is None or int(user_id) not in user_ids:
+            continue
+        records.append(UserSession(user_id=user_id, session_key=session_key))
+    UserSession.objects.bulk_create(records, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("sessions", "0001_initial"),
+        ("notey", "0013_note_changes"),
+    ]
+
+    operations = [
+        migrations.RunPython(record_live_sessions, migrations.RunPython.noop),
+    ]
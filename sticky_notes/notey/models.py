@@ -1,5 +1,14 @@
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, pre_save
+from django.utils import timezone
+
+
+class StaleNote(Exception):
+    """
+    Raised when a note has been changed since the copy being saved was read,
+    rolling back the transaction saving it (see Note.save_changes).
+    """
 
 
 class Note(models.Model):
@@ -11,13 +20,31 @@ class Note(models.Model):
       255 chararcters.
     - content: TextField for the note's contents.
     - created_at: DateTimeField set to the time and date the note is created.
+    - updated_at: DateTimeField set to the time and date the note was last
+      saved.
+    - version: PositiveIntegerField, increased on every save, so an edit made
+      to an out-of-date copy of the note can be caught (see save_changes).
+    - change_seq: PositiveIntegerField, the owner's change sequence number
+      when the note was last saved, for syncing clients (see changes.py).
 
     Relationships:
     - user: ForeignKey representing the user/creator of the note.
     - category: ForeignKey representing the category of the note.
 
+    Indexes:
+    - (user, created_at, id): Matches the dashboard query, which lists a
+      user's notes in creation order a page at a time.
+    - (user, updated_at): Finds when a user's board last changed (see
+      conditional.py).
+    - (user, change_seq): Finds the notes saved since a client last synced.
+
     Methods:
-    - N/A
+    - from_db: Remembers the category the note was loaded with, so a change
+      of colour can be counted (see counters.py).
+    - save, delete: Run in a transaction, with the signal receivers that
+      update the board's counters.
+    - save_changes: Writes only the changed fields, if the note has not been
+      changed since it was read.
 
     Parameters:
     - models.Model: Django's base model class.
@@ -33,9 +60,109 @@ class Note(models.Model):
     title = models.CharField(max_length=255)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     category = models.ForeignKey(
         "Category", on_delete=models.CASCADE, null=True, blank=True
     )
+    version = models.PositiveIntegerField(default=1)
+    change_seq = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "created_at", "id"],
+                name="notey_note_user_created_idx",
+            ),
+            models.Index(
+                fields=["user", "updated_at"],
+                name="notey_note_user_updated_idx",
+            ),
+            models.Index(
+                fields=["user", "change_seq"],
+                name="notey_note_user_change_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        note = super().from_db(db, field_names, values)
+        note._loaded_category_id = note.__dict__.get("category_id")
+        return note
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+            if kwargs.get("update_fields") is not None:
+                # updated_at (auto_now) is only written when listed, and the
+                # page ETags and cache keys depend on it.
+                kwargs["update_fields"] = {
+                    *kwargs["update_fields"],
+                    "updated_at",
+                    "version",
+                    "change_seq",
+                }
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+    def save_changes(self, fields, version):
+        """
+        Writes the given fields with a single UPDATE, on the condition that
+        the note is still at the version the changes were made to, and sends
+        pre_save and post_save as save() would.
+
+        :param fields: Names of the fields changed on this object.
+        :param version: The version of the note the changes were made to.
+        :return: False if the note has been changed (or deleted) since, in
+        which case nothing is written.
+        """
+
+        if not fields:
+            return True
+        update_fields = frozenset(
+            [*fields, "updated_at", "version", "change_seq"]
+        )
+        now = timezone.now()
+        # Raising StaleNote rolls the transaction back, giving back the change
+        # sequence number taken by pre_save.
+        try:
+            with transaction.atomic():
+                pre_save.send(
+                    sender=Note,
+                    instance=self,
+                    raw=False,
+                    using=self._state.db,
+                    update_fields=update_fields,
+                )
+                values = {
+                    self._meta.get_field(name).attname: getattr(
+                        self, self._meta.get_field(name).attname
+                    )
+                    for name in [*fields, "change_seq"]
+                }
+                updated = Note.objects.filter(
+                    pk=self.pk, version=version
+                ).update(
+                    **values, updated_at=now, version=models.F("version") + 1
+                )
+                if not updated:
+                    raise StaleNote(self.pk)
+                self.version = version + 1
+                self.updated_at = now
+                post_save.send(
+                    sender=Note,
+                    instance=self,
+                    created=False,
+                    update_fields=update_fields,
+                    raw=False,
+                    using=self._state.db,
+                )
+        except StaleNote:
+            return False
+        return True
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            return super().delete(*args, **kwargs)
 
 
 class Category(models.Model):
@@ -47,13 +174,206 @@ class Category(models.Model):
        a maximum of 6 characters.
      - name: CharField representing the name of the category, with a maximum
        length of 255 characters.
+     - retired: BooleanField, True once the category has been deleted, while
+       its notes are removed in the background (see jobs.py). Retired
+       categories are left out of the palette.
 
      Relationships:
     - N/A
 
+     Indexes:
+     - (name, hex_value): Covers the category list and the note form's colour
+       picker, both read every category in name order.
+
      Parameters:
      - models.Model: Django's base model class.
     """
 
     name = models.CharField(max_length=255)
     hex_value = models.CharField(max_length=6)
+    retired = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["name", "hex_value"],
+                name="notey_category_name_idx",
+            ),
+        ]
+
+
+class UserSession(models.Model):
+    """
+    Records which sessions belong to which user.
+
+    Django's session table does not say who a session belongs to (the user
+    id is inside the encoded session data), so this table is kept alongside
+    it, allowing a user's sessions to be ended without reading every session.
+
+    Fields:
+    - session_key: CharField holding the key of the user's session, indexed.
+
+    Relationships:
+    - user: ForeignKey representing the user the session was logged in as.
+
+    Parameters:
+    - models.Model: Django's base model class.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    session_key = models.CharField(max_length=40, db_index=True)
+
+
+class BoardSummary(models.Model):
+    """
+    Counts a user's 'sticky-notes', kept up to date as notes are created,
+    edited and deleted (see counters.py), so the dashboard shows them without
+    counting the Note table.
+
+    Fields:
+    - note_count: PositiveIntegerField, the number of notes the user has.
+    - last_modified: DateTimeField set to when one of the user's notes was
+      last created, edited or deleted, None before the first note.
+    - change_seq: PositiveIntegerField, the last change sequence number given
+      to one of the user's notes, or their deletion (see changes.py).
+
+    Relationships:
+    - user: OneToOneField representing the owner of the board, also the
+      primary key.
+
+    Parameters:
+    - models.Model: Django's base model class.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True
+    )
+    note_count = models.PositiveIntegerField(default=0)
+    last_modified = models.DateTimeField(null=True, blank=True)
+    change_seq = models.PositiveIntegerField(default=0)
+
+
+class CategoryCount(models.Model):
+    """
+    Counts a user's 'sticky-notes' in one category, kept up to date alongside
+    BoardSummary.
+
+    Fields:
+    - note_count: PositiveIntegerField, the number of the user's notes in the
+      category.
+
+    Relationships:
+    - user: ForeignKey representing the owner of the notes.
+    - category: ForeignKey representing the category counted.
+
+    Indexes:
+    - (user, category): Unique, one count per category on a user's board.
+
+    Parameters:
+    - models.Model: Django's base model class.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    note_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "category"],
+                name="notey_categorycount_user_category_uniq",
+            ),
+        ]
+
+
+class NoteTombstone(models.Model):
+    """
+    Records a deleted 'sticky-note', so syncing clients learn to drop their
+    copy of it (see changes.py).
+
+    Fields:
+    - note_id: PositiveBigIntegerField, the primary key the note had.
+    - change_seq: PositiveIntegerField, the owner's change sequence number
+      given to the deletion.
+    - deleted_at: DateTimeField set to when the note was deleted.
+
+    Relationships:
+    - user: ForeignKey representing the owner of the note.
+
+    Indexes:
+    - (user, change_seq): Finds the notes deleted since a client last synced.
+
+    Parameters:
+    - models.Model: Django's base model class.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    note_id = models.PositiveBigIntegerField()
+    change_seq = models.PositiveIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "change_seq"],
+                name="notey_tombstone_user_seq_idx",
+            ),
+        ]
+
+
+class Job(models.Model):
+    """
+    A piece of background work, waiting in the job queue (see jobs.py).
+
+    Fields:
+    - kind: CharField naming the job's handler, i.e. 'delete_category'.
+    - payload: JSONField holding the handler's arguments.
+    - status: CharField, 'pending' until the job is 'done', or 'failed' after
+      too many attempts.
+    - done: PositiveIntegerField, how many items the job has worked through.
+    - total: PositiveIntegerField, how many items the job has in all, None
+      until known.
+    - attempts: PositiveSmallIntegerField, the number of failed attempts in a
+      row.
+    - last_error: TextField holding the error of the last failed attempt.
+    - run_after: DateTimeField, the job is not run before this time (it is
+      pushed back after a failure).
+    - locked_until: DateTimeField, set while a worker is running the job, so
+      other workers leave it alone. A worker that dies lets it lapse.
+    - created_at: DateTimeField set to when the job was queued.
+    - updated_at: DateTimeField set to when the job was last saved.
+
+    Relationships:
+    - N/A
+
+    Indexes:
+    - (status, run_after): Finds the jobs due to run.
+
+    Parameters:
+    - models.Model: Django's base model class.
+    """
+
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [(PENDING, "Pending"), (DONE, "Done"), (FAILED, "Failed")]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    done = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "run_after"],
+                name="notey_job_status_run_idx",
+            ),
+        ]
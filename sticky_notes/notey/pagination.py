@@ -0,0 +1,153 @@
+"""
+Keyset (cursor) pagination for 'sticky-note' querysets.
+
+Offset pagination gets slower the deeper a user scrolls, because the database
+has to walk past every skipped row. Keyset pagination remembers the last
+(created_at, id) pair shown and asks for the rows after it, so every page costs
+the same no matter how many notes a user owns.
+"""
+
+import base64
+import binascii
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+
+def get_page_size(request):
+    """
+    Works out how many 'sticky-notes' to show on a page.
+
+    The default comes from the NOTEY_PAGE_SIZE setting. A 'page_size' query
+    parameter can ask for a different size, capped at NOTEY_MAX_PAGE_SIZE.
+
+    :param request: HTTP request object.
+    :return: The number of notes to show on a page.
+    """
+
+    page_size = getattr(settings, "NOTEY_PAGE_SIZE", 50)
+    max_page_size = getattr(settings, "NOTEY_MAX_PAGE_SIZE", 200)
+    try:
+        page_size = int(request.GET.get("page_size", page_size))
+    except ValueError:
+        pass
+    return max(1, min(page_size, max_page_size))
+
+
+def encode_cursor(note):
+    """
+    Encodes the position of a 'sticky-note' into an opaque, URL safe cursor.
+
+    :param note: The last Note object shown on a page.
+    :return: Cursor string pointing just after the note.
+    """
+
+    value = f"{note.created_at.isoformat()}|{note.pk}"
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor made by encode_cursor.
+
+    :param cursor: Cursor string, taken from the request.
+    :return: Tuple of (created_at, pk), or None if the cursor is not valid.
+    """
+
+    if not cursor:
+        return None
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        value = base64.urlsafe_b64decode(cursor + padding).decode()
+        created_at, pk = value.split("|")
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, pk
+
+
+class KeysetPage:
+    """
+    Represents one page of 'sticky-notes', ordered by creation date.
+
+    The page is lazy, the database is only queried the first time the notes
+    (or whether there is a next page) are asked for. One extra row is fetched
+    to find out if another page follows, instead of counting the whole board.
+
+    Attributes:
+    - queryset: The notes being paginated, ordered by (created_at, id).
+    - cursor: The decoded cursor of the page, or None for the first page.
+    - page_size: The number of notes shown on the page.
+    - total: The number of notes in the whole list, if known (i.e. from the
+      board's counters, see counters.py), otherwise None.
+
+    Methods:
+    - get_queryset: The (unevaluated) query for the page.
+    - aload: Fetches the page ahead of time, for async views.
+    - object_list: The notes on this page.
+    - has_next: True when there are more notes after this page.
+    - next_cursor: Cursor string for the following page.
+    """
+
+    def __init__(self, queryset, cursor=None, page_size=50, total=None):
+        self.queryset = queryset.order_by("created_at", "pk")
+        self.cursor = decode_cursor(cursor)
+        self.page_size = page_size
+        self.total = total
+
+    def get_queryset(self):
+        """
+        The query for this page, including the extra look-ahead row.
+
+        :return: Sliced QuerySet of the notes after the cursor.
+        """
+
+        queryset = self.queryset
+        if self.cursor is not None:
+            created_at, pk = self.cursor
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at)
+                | Q(created_at=created_at, pk__gt=pk)
+            )
+        return queryset[: self.page_size + 1]
+
+    @cached_property
+    def _rows(self):
+        return list(self.get_queryset())
+
+    async def aload(self):
+        """
+        Fetches the page with Django's async ORM, for use in async views
+        (where the page cannot be fetched lazily from a template).
+        """
+
+        self._rows = [note async for note in self.get_queryset()]
+
+    @property
+    def object_list(self):
+        return self._rows[: self.page_size]
+
+    @property
+    def has_next(self):
+        return len(self._rows) > self.page_size
+
+    @property
+    def next_cursor(self):
+        if not self.has_next:
+            return None
+        return encode_cursor(self.object_list[-1])
+
+    @property
+    def is_first(self):
+        return self.cursor is None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
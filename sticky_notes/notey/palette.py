@@ -0,0 +1,110 @@
+"""
+Cache of the 'sticky-note' categories (the colour palette).
+
+Categories are a handful of rows, managed by the superuser and rarely
+changed, but the note form and the category page read all of them on every
+request. The palette is loaded once and kept until a category is saved or
+deleted (see signals.py), so those pages do not query the Category table.
+
+The palette is held in the cache backend named by NOTEY_PALETTE_CACHE (see
+CACHES in settings.py), by default the 'sessions' cache, which is shared by
+every process serving the site, so a change made through one process is seen
+by all of them (and their forms, and page fingerprints, agree). Set it to
+None to keep the palette in each process's memory instead, only for sites
+served by a single process.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+from .models import Category
+
+CACHE_KEY = "notey:palette"
+
+# The process-local palette, None until it is first loaded.
+_palette = None
+
+
+def _cache_key():
+    # Processes sharing a cache but not a database (i.e. the test runner
+    # next to the development server) each keep their own palette.
+    return f"{CACHE_KEY}:{connection.settings_dict['NAME']}"
+
+
+def _shared_cache():
+    alias = getattr(settings, "NOTEY_PALETTE_CACHE", None)
+    return caches[alias] if alias else None
+
+
+def get_palette():
+    """
+    Returns every category, ordered by name, leaving out the retired ones
+    (see jobs.py).
+
+    :return: Tuple of Category objects.
+    """
+
+    global _palette
+    cache = _shared_cache()
+    if cache is None:
+        if _palette is None:
+            _palette = tuple(
+                Category.objects.filter(retired=False).order_by("name")
+            )
+        return _palette
+    palette = cache.get(_cache_key())
+    if palette is None:
+        palette = tuple(Category.objects.filter(retired=False).order_by("name"))
+        cache.set(_cache_key(), palette, None)
+    return palette
+
+
+def get_category(pk):
+    """
+    Looks up a category in the palette.
+
+    :param pk: Primary key of the category, as an int or string.
+    :return: The Category object, or None if there is no such category.
+    """
+
+    for category in get_palette():
+        if str(category.pk) == str(pk):
+            return category
+    return None
+
+
+def get_palette_version():
+    """
+    A short fingerprint of the palette, which changes whenever a category is
+    added, removed or recoloured. Used to tell when pages showing note
+    colours are out of date.
+
+    :return: Hex string.
+    """
+
+    value = ",".join(f"{c.pk}:{c.hex_value}" for c in get_palette())
+    return hashlib.md5(value.encode(), usedforsecurity=False).hexdigest()[:12]
+
+
+def _clear():
+    global _palette
+    _palette = None
+    cache = _shared_cache()
+    if cache is not None:
+        cache.delete(_cache_key())
+
+
+def clear_palette():
+    """
+    Forgets the cached palette, so the next request loads it again.
+
+    The palette is cleared straight away and again once the current
+    transaction commits, so a request reading the palette in between cannot
+    keep the categories from before the change.
+    """
+
+    _clear()
+    transaction.on_commit(_clear)
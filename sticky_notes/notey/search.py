@@ -0,0 +1,129 @@
+"""
+Full-text search over the title and content of 'sticky-notes'.
+
+The index depends on the database backend:
+
+- SQLite: An FTS5 table (notey_note_fts), one row per note with the note's
+  id as its rowid. It is kept in sync by the receivers in signals.py. The
+  owner's id is indexed as a column too, so the index itself narrows the
+  search down to one user's notes.
+- PostgreSQL: A generated tsvector column on notey_note with a GIN index,
+  which the database keeps up to date by itself.
+- Anything else: No index, notes are matched with icontains.
+
+See migrations/0008_note_search.py for the tables and indexes.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Note
+
+FTS_TABLE = "notey_note_fts"
+
+# Title matches count for twice as much as content matches, the owner column
+# is only there to filter on.
+SQLITE_RANK = f"bm25({FTS_TABLE}, 2.0, 1.0, 0.0)"
+
+
+def get_terms(query):
+    """
+    Splits a search into words, dropping any punctuation (which would
+    otherwise be read as search syntax).
+
+    :param query: The search, as typed by the user.
+    :return: List of search words.
+    """
+
+    return re.findall(r"\w+", query)
+
+
+def index_notes(notes):
+    """
+    Adds or refreshes notes in the search index.
+
+    :param notes: Iterable of saved Note objects.
+    """
+
+    if connection.vendor != "sqlite":
+        return
+    rows = [
+        (note.pk, note.title, note.content, str(note.user_id or ""))
+        for note in notes
+    ]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+            [(row[0],) for row in rows],
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, content, owner) "
+            "VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+
+def unindex_notes(ids):
+    """
+    Removes notes from the search index.
+
+    :param ids: Iterable of the primary keys of deleted notes.
+    """
+
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in ids]
+        )
+
+
+def search_note_ids(user_id, query, offset=0, limit=50):
+    """
+    Finds the user's notes matching a search, best matches first.
+
+    :param user_id: Primary key of the user whose notes are searched.
+    :param query: The search, as typed by the user.
+    :param offset: The number of matches to skip.
+    :param limit: The most matches to return.
+    :return: List of the primary keys of the matching notes.
+    """
+
+    terms = get_terms(query)
+    if not terms:
+        return []
+    if connection.vendor == "sqlite":
+        # Each word is quoted (so it is never read as a keyword) and matches
+        # as a prefix, i.e. 'shop' finds 'shopping'.
+        match = " ".join(f'"{term}"*' for term in terms)
+        sql = (
+            f"SELECT rowid FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY {SQLITE_RANK}, rowid LIMIT %s OFFSET %s"
+        )
+        params = [f'owner:"{user_id}" AND ({match})', limit, offset]
+    elif connection.vendor == "postgresql":
+        sql = (
+            "SELECT id FROM notey_note, "
+            "websearch_to_tsquery('english', %s) AS query "
+            "WHERE user_id = %s AND search_vector @@ query "
+            "ORDER BY ts_rank(search_vector, query) DESC, id "
+            "LIMIT %s OFFSET %s"
+        )
+        params = [" ".join(terms), user_id, limit, offset]
+    else:
+        matches = Q()
+        for term in terms:
+            matches &= Q(title__icontains=term) | Q(content__icontains=term)
+        return list(
+            Note.objects.filter(matches, user_id=user_id)
+            .order_by("-created_at", "-pk")
+            .values_list("pk", flat=True)[offset : offset + limit]
+        )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,104 @@
+"""
+Generated users, categories and 'sticky-notes', for benchmarking and
+checking query plans (see the seed_notes and benchmark commands).
+
+Notes are written with bulk_create, a batch at a time, so seeding a million
+notes runs in constant memory.
+"""
+
+import itertools
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .changes import stamp_notes
+from .models import Category, Note
+from .signals import notes_bulk_saved
+
+# A 'Rio de Janerio' palette, see README.md.
+SEED_PALETTE = [
+    ("Orange", "fbae3c"),
+    ("Pink", "eb6092"),
+    ("Blue", "4ab6d9"),
+    ("Green", "abcc51"),
+    ("Yellow", "f9c847"),
+]
+
+
+def seed_categories(count=len(SEED_PALETTE)):
+    """
+    Creates the seed palette, and made up colours after it runs out.
+
+    :param count: Number of categories to have.
+    :return: List of Category objects.
+    """
+
+    palette = SEED_PALETTE[:count] + [
+        (f"Colour {i}", f"{(i * 0x9E3779) % 0xFFFFFF:06x}")
+        for i in range(len(SEED_PALETTE), count)
+    ]
+    categories = []
+    for name, hex_value in palette:
+        category, _ = Category.objects.get_or_create(
+            name=name, hex_value=hex_value
+        )
+        categories.append(category)
+    return categories
+
+
+def seed_users(count, prefix="seed"):
+    """
+    :param count: Number of users to create.
+    :param prefix: Prefix for the generated usernames.
+    :return: List of the new users' ids.
+    """
+
+    # Seeded users cannot log in, their password is left unusable.
+    password = make_password(None)
+    existing = User.objects.filter(username__startswith=f"{prefix}_")
+    start = existing.count()
+    User.objects.bulk_create(
+        User(username=f"{prefix}_{start + i}", password=password)
+        for i in range(count)
+    )
+    return list(
+        User.objects.filter(username__startswith=f"{prefix}_")
+        .order_by("-id")
+        .values_list("id", flat=True)[:count]
+    )
+
+
+def generate_notes(user_ids, categories, total):
+    for i in range(total):
+        yield Note(
+            user_id=user_ids[i % len(user_ids)],
+            title=f"Seeded note {i}",
+            content=f"Generated content for seeded note {i}.",
+            category=categories[i % len(categories)],
+        )
+
+
+def seed_notes(user_ids, categories, total, batch_size=5000):
+    """
+    Writes the notes, shared evenly between the users and categories.
+
+    :param user_ids: List of user ids owning the notes.
+    :param categories: List of Category objects.
+    :param total: Number of notes to write.
+    :param batch_size: Number of notes written per INSERT.
+    :return: Generator yielding the number of notes written after each batch.
+    """
+
+    notes = generate_notes(user_ids, categories, total)
+    written = 0
+    while True:
+        batch = list(itertools.islice(notes, batch_size))
+        if not batch:
+            break
+        with transaction.atomic():
+            stamp_notes(batch)
+            Note.objects.bulk_create(batch)
+            notes_bulk_saved.send(sender=Note, notes=batch, created=True)
+        written += len(batch)
+        yield written
@@ -0,0 +1,137 @@
+"""
+Helpers for ending a user's sessions and clearing out expired sessions.
+
+Each session a user logs in with is recorded in models.UserSession, when they
+log in (see signals.py) and when its key changes (see
+middleware.SessionKeyMiddleware). Sessions that were live before the table
+was added are recorded by migration 0014.
+
+Django's clearsessions command deletes every expired session in one go. That
+is fine as an occasional maintenance job but not on a request thread, so
+expired sessions are instead purged in small batches by the purge_sessions
+management command, run from cron or a process manager.
+"""
+
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import UserSession
+
+
+def get_session_store():
+    """
+    :return: The SessionStore class of the configured session engine.
+    """
+
+    return import_module(settings.SESSION_ENGINE).SessionStore
+
+
+def has_session_table():
+    """
+    Whether sessions are kept in the database (the 'db' and 'cached_db'
+    engines), rather than in the browser's cookies.
+
+    :return: Boolean.
+    """
+
+    return hasattr(get_session_store(), "get_model_class")
+
+
+def remember_session(user, session):
+    """
+    Records that a session belongs to a user (see models.UserSession).
+
+    :param user: The User object that logged in.
+    :param session: The session the user logged in with.
+    """
+
+    # Signed cookie sessions cannot be ended from the server, so are not
+    # recorded (their key is the whole cookie).
+    if session.session_key and has_session_table():
+        UserSession.objects.get_or_create(
+            user=user, session_key=session.session_key
+        )
+
+
+def forget_session(session):
+    """
+    Removes the record of a session, i.e. when its user logs out.
+
+    :param session: The session being ended.
+    """
+
+    if session.session_key:
+        UserSession.objects.filter(session_key=session.session_key).delete()
+
+
+def session_key_changed(user, old_key, session):
+    """
+    Moves the record of a session to its new key, after the key was cycled
+    (i.e. by update_session_auth_hash when a password is changed, or by
+    logging in again), the old key no longer being valid.
+
+    :param user: The User object the session is logged in as, or an
+    AnonymousUser if it is not.
+    :param old_key: The key the session had.
+    :param session: The session, with its new key.
+    """
+
+    UserSession.objects.filter(session_key=old_key).delete()
+    if user.is_authenticated:
+        remember_session(user, session)
+
+
+def end_user_sessions(user):
+    """
+    Ends every session the user is logged in with, on any device.
+
+    Only the user's own sessions are touched, found through the indexed
+    UserSession table.
+
+    :param user: The User object whose sessions are ended.
+    :return: The number of sessions ended.
+    """
+
+    SessionStore = get_session_store()
+    records = UserSession.objects.filter(user=user)
+    keys = list(records.values_list("session_key", flat=True))
+    for key in keys:
+        SessionStore(session_key=key).delete()
+    records.delete()
+    return len(keys)
+
+
+def purge_expired_sessions(batch_size=1000, pause=0.0):
+    """
+    Deletes expired sessions a batch at a time.
+
+    Each batch is deleted in its own short transaction, and the function
+    sleeps for 'pause' seconds between batches, so other writers are never
+    held up for long.
+
+    :param batch_size: The number of sessions deleted per batch.
+    :param pause: Seconds to wait between batches.
+    :return: Generator, yielding the number of sessions deleted per batch.
+    """
+
+    if not has_session_table():
+        return
+    Session = get_session_store().get_model_class()
+    while True:
+        keys = list(
+            Session.objects.filter(expire_date__lt=timezone.now())
+            .order_by("expire_date")
+            .values_list("session_key", flat=True)[:batch_size]
+        )
+        if not keys:
+            return
+        with transaction.atomic():
+            deleted, _ = Session.objects.filter(session_key__in=keys).delete()
+            UserSession.objects.filter(session_key__in=keys).delete()
+        yield deleted
+        if pause:
+            time.sleep(pause)
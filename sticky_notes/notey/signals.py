@@ -0,0 +1,151 @@
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .backends import forget_user
+from .changes import record_deletions, stamp_notes
+from .counters import count_deleted, count_saved
+from .database import tune_sqlite
+from .events import publish_note_events
+from .metrics import install_query_recorder
+from .models import Category, Note
+from .palette import clear_palette
+from .search import index_notes, unindex_notes
+from .sessions import forget_session, remember_session
+
+# Sent after 'sticky-notes' are created or updated in bulk (i.e. by the JSON
+# API), which skips the model's post_save signal. Arguments: 'notes', the
+# list of saved Note objects, and 'created', True for new notes.
+notes_bulk_saved = Signal()
+
+# Sent after 'sticky-notes' are deleted in bulk (i.e. by the background jobs),
+# without the model's post_delete signal for each note. Arguments: 'notes',
+# the list of deleted Note objects.
+notes_bulk_deleted = Signal()
+
+# Most ids in one DELETE, well under the databases' limits on parameters.
+DELETE_BATCH_SIZE = 500
+
+
+def bulk_delete_notes(notes, owner_deleted=False):
+    """
+    Deletes notes with one DELETE per DELETE_BATCH_SIZE notes, rather than
+    through QuerySet.delete(), which sends post_delete for each note, then
+    sends notes_bulk_deleted once for all of them. Nothing else references
+    notes, so nothing needs to cascade.
+
+    :param notes: List of Note objects, with their owner and category loaded.
+    :param owner_deleted: True when the notes' owner is being deleted, whose
+    counters and tombstones go with them, and whose boards are closed, so only
+    the search index is updated.
+    """
+
+    connection = connections[Note.objects.db]
+    table = connection.ops.quote_name(Note._meta.db_table)
+    column = connection.ops.quote_name(Note._meta.pk.column)
+    ids = [note.pk for note in notes]
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), DELETE_BATCH_SIZE):
+            batch = ids[start : start + DELETE_BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(
+                f"DELETE FROM {table} WHERE {column} IN ({placeholders})",
+                batch,
+            )
+    if owner_deleted:
+        unindex_notes(ids)
+    else:
+        notes_bulk_deleted.send(sender=Note, notes=notes)
+
+
+# Times the queries of measured requests on every new database connection
+# (see metrics.py).
+connection_created.connect(install_query_recorder)
+connection_created.connect(tune_sqlite)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    """
+    Clears the cached palette when a category is created, edited or deleted,
+    whether through the category views or the admin site.
+    """
+
+    clear_palette()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """
+    Drops the user from the cache of logged in users (see backends.py).
+    """
+
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_in)
+def session_started(sender, request, user, **kwargs):
+    """
+    Records the new session against the user, so it can be ended when the
+    user deletes their account (see sessions.end_user_sessions).
+    """
+
+    remember_session(user, request.session)
+
+
+@receiver(user_logged_out)
+def session_ended(sender, request, user, **kwargs):
+    forget_session(request.session)
+
+
+@receiver(pre_save, sender=Note)
+def note_saving(sender, instance, raw=False, **kwargs):
+    """
+    Gives the note the next change sequence number of its owner, for syncing
+    clients (see changes.py). Notes loaded from fixtures keep their own.
+    """
+
+    if not raw:
+        stamp_notes([instance])
+
+
+@receiver(post_save, sender=Note)
+def note_saved(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Keeps the full-text search index (see search.py) and the board's counters
+    (see counters.py) up to date, and sends the change to the owner's open
+    boards (see events.py).
+    """
+
+    count_saved([instance], created)
+    if update_fields is None or {"title", "content"} & set(update_fields):
+        index_notes([instance])
+    publish_note_events("created" if created else "updated", [instance])
+
+
+@receiver(notes_bulk_saved)
+def notes_saved(sender, notes, created, **kwargs):
+    count_saved(notes, created)
+    index_notes(notes)
+    publish_note_events("created" if created else "updated", notes)
+
+
+@receiver(notes_bulk_deleted)
+def notes_deleted(sender, notes, **kwargs):
+    count_deleted(notes)
+    record_deletions(notes)
+    unindex_notes([note.pk for note in notes])
+    publish_note_events("deleted", notes)
+
+
+@receiver(post_delete, sender=Note)
+def note_deleted(sender, instance, **kwargs):
+    count_deleted([instance])
+    record_deletions([instance])
+    unindex_notes([instance.pk])
+    publish_note_events("deleted", [instance])
@@ -0,0 +1,49 @@
+/*
+ * Keeps the 'sticky-note' board up to date while it is open, by applying
+ * the note changes sent over the board's event stream (see notey/events.py)
+ * rather than reloading the page.
+ */
+(function () {
+    "use strict";
+
+    var dashboard = document.querySelector(".note-dashboard[data-events-url]");
+    var container = document.querySelector(".note-container");
+    if (!dashboard || !container || !window.EventSource) {
+        return;
+    }
+
+    function findCard(id) {
+        return container.querySelector('.note[data-note-id="' + id + '"]');
+    }
+
+    function makeCard(html) {
+        var template = document.createElement("template");
+        template.innerHTML = html.trim();
+        return template.content.firstElementChild;
+    }
+
+    var events = new EventSource(dashboard.dataset.eventsUrl);
+
+    events.addEventListener("created", function (event) {
+        var data = JSON.parse(event.data);
+        // New notes go last, so are only shown on the last page of notes.
+        if (container.dataset.appendNew === "true" && !findCard(data.id)) {
+            container.appendChild(makeCard(data.html));
+        }
+    });
+
+    events.addEventListener("updated", function (event) {
+        var data = JSON.parse(event.data);
+        var card = findCard(data.id);
+        if (card) {
+            card.replaceWith(makeCard(data.html));
+        }
+    });
+
+    events.addEventListener("deleted", function (event) {
+        var card = findCard(JSON.parse(event.data).id);
+        if (card) {
+            card.remove();
+        }
+    });
+}());
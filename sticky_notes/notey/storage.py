@@ -0,0 +1,151 @@
+"""
+Static files storage for production (see STORAGES in settings.py).
+
+On top of Django's ManifestStaticFilesStorage, which puts a hash of each
+file's content in its name (so browsers can cache it for good), collectstatic
+also:
+- Minifies the CSS files.
+- Writes gzip (.gz) and, if the 'brotli' package is installed, brotli (.br)
+  copies of text files, for StaticFilesMiddleware (see middleware.py) to
+  send to browsers accepting them, without compressing on every request.
+- Writes smaller WebP copies of PNG and JPEG images, if the 'Pillow' package
+  is installed, for the {% picture %} tag (see templatetags/notey_static.py).
+"""
+
+import gzip
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+COMPRESSIBLE = (".css", ".js", ".svg", ".txt", ".json", ".map", ".html")
+
+IMAGES = (".png", ".jpg", ".jpeg")
+
+# Files smaller than this are not worth compressing.
+MIN_COMPRESS_SIZE = 256
+
+
+def minify_css(css):
+    """
+    Strips comments and unneeded whitespace from a stylesheet.
+
+    :param css: Stylesheet text.
+    :return: Minified stylesheet text.
+    """
+
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+def variant_name(name, width):
+    """
+    :param name: Name of an image, i.e. 'notey/images/collage.png'.
+    :param width: Width of the variant, in pixels.
+    :return: Name of the WebP variant, i.e. 'notey/images/collage.800w.webp'.
+    """
+
+    return f"{os.path.splitext(name)[0]}.{width}w.webp"
+
+
+class NoteyStaticStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage, also minifying, precompressing and making
+    WebP variants of the collected files.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name, hashed_name in list(self.hashed_files.items()):
+            extension = os.path.splitext(name)[1].lower()
+            if extension == ".css":
+                self.minify(hashed_name)
+            if extension in COMPRESSIBLE:
+                self.compress(hashed_name)
+            if extension in IMAGES and Image is not None:
+                for variant, hashed_variant in self.make_variants(name):
+                    yield variant, hashed_variant, True
+        # Saved again, to list the image variants.
+        self.save_manifest()
+
+    def minify(self, hashed_name):
+        with self.open(hashed_name) as file:
+            css = file.read().decode()
+        self.replace(hashed_name, minify_css(css).encode())
+
+    def compress(self, hashed_name):
+        with self.open(hashed_name) as file:
+            content = file.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        compressed = {".gz": gzip.compress(content, 9, mtime=0)}
+        if brotli is not None:
+            compressed[".br"] = brotli.compress(content)
+        for suffix, data in compressed.items():
+            # Only kept when it is actually smaller.
+            if len(data) < len(content):
+                self.replace(hashed_name + suffix, data)
+
+    def make_variants(self, name):
+        """
+        Writes WebP copies of an image at each of NOTEY_IMAGE_WIDTHS, skipping
+        the widths bigger than the image.
+
+        :param name: Name of the image.
+        :return: List of (variant name, hashed variant name) tuples.
+        """
+
+        made = []
+        with self.open(self.hashed_files[name]) as file:
+            with Image.open(file) as image:
+                image.load()
+        for width in settings.NOTEY_IMAGE_WIDTHS:
+            if width > image.width:
+                continue
+            height = round(image.height * width / image.width)
+            resized = image.resize((width, height), Image.LANCZOS)
+            content = ContentFile(b"")
+            resized.save(content, "WEBP", quality=80, method=6)
+            variant = variant_name(name, width)
+            hashed_variant = self.hashed_name(variant, content)
+            self.replace(hashed_variant, content.getvalue())
+            self.hashed_files[self.hash_key(variant)] = hashed_variant
+            made.append((variant, hashed_variant))
+        return made
+
+    def replace(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
+
+    def image_variants(self, name):
+        """
+        :param name: Name of an image.
+        :return: List of (width, URL) tuples of its WebP variants, smallest
+        first.
+        """
+
+        variants = []
+        for width in settings.NOTEY_IMAGE_WIDTHS:
+            key = self.hash_key(variant_name(name, width))
+            if key in self.hashed_files:
+                variants.append((width, self.url(variant_name(name, width))))
+        return variants
@@ -0,0 +1,103 @@
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+# Self-hosted web fonts: (family, file name, weights, unicode-range). The
+# Latin subset covers the characters used on the website.
+FONTS = (
+    (
+        "Outfit",
+        "notey/fonts/outfit-latin.woff2",
+        "100 900",
+        "U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, "
+        "U+02DC, U+2000-206F, U+2074, U+20AC, U+2122, U+2191, U+2193, "
+        "U+2212, U+2215, U+FEFF, U+FFFD",
+    ),
+)
+
+
+@lru_cache(maxsize=None)
+def self_hosted_fonts():
+    """
+    Looks for the font files once, rather than on every page.
+
+    :return: Tuple of the FONTS whose file is in the static files.
+    """
+
+    return tuple(font for font in FONTS if finders.find(font[1]))
+
+
+@receiver(setting_changed)
+def static_files_changed(setting, **kwargs):
+    if setting.startswith("STATICFILES_"):
+        self_hosted_fonts.cache_clear()
+
+
+@register.simple_tag
+def picture(name, alt, sizes="100vw"):
+    """
+    Shows a static image, letting the browser pick the smallest WebP copy
+    (see storage.py) that fits, and falling back to the original image.
+
+    :param name: Name of the image, i.e. 'notey/images/collage.png'.
+    :param alt: Text describing the image.
+    :param sizes: How wide the image is shown, for the browser to pick a
+    copy.
+    :return: HTML of a <picture> element, or of an <img> element when the
+    image has no WebP copies.
+    """
+
+    image = format_html('<img src="{}" alt="{}">', static(name), alt)
+    image_variants = getattr(staticfiles_storage, "image_variants", None)
+    variants = image_variants(name) if image_variants else []
+    if not variants:
+        return image
+    srcset = ", ".join(f"{url} {width}w" for width, url in variants)
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">{}'
+        "</picture>",
+        srcset,
+        sizes,
+        image,
+    )
+
+
+@register.simple_tag
+def font_faces():
+    """
+    Declares the self-hosted fonts, and asks the browser to start loading
+    them before main.css is parsed. Text is shown in a fallback font until
+    they arrive (font-display: swap). Fonts whose file is missing are left
+    out, so main.css falls back to the system font.
+
+    :return: HTML of the <link rel="preload"> and <style> elements.
+    """
+
+    fonts = self_hosted_fonts()
+    if not fonts:
+        return ""
+    preloads = format_html_join(
+        "",
+        '<link rel="preload" href="{}" as="font" type="font/woff2" '
+        "crossorigin>",
+        ((static(name),) for family, name, weights, unicode_range in fonts),
+    )
+    faces = format_html_join(
+        "",
+        '@font-face{{font-family:"{}";src:url("{}") format("woff2");'
+        "font-weight:{};font-style:normal;font-display:swap;"
+        "unicode-range:{}}}",
+        (
+            (family, static(name), weights, unicode_range)
+            for family, name, weights, unicode_range in fonts
+        ),
+    )
+    return format_html("{}<style>{}</style>", preloads, faces)
@@ -1,9 +1,62 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+import zipfile
+from datetime import datetime, timedelta
+from importlib import import_module
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.contrib.auth import hashers
 from django.contrib.auth.models import User
-from .models import Note, Category
-from datetime import datetime
-from django.urls import reverse
+from django.contrib.sessions.models import Session
+from django.core import management
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import (
+    Client,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.utils import timezone
 
+from . import palette, urls
+from .benchmark import (
+    Scenario,
+    compare,
+    login_scenario,
+    measure,
+    view_scenarios,
+)
+from .changes import get_changes
+from .counters import get_category_counts, rebuild_counters
+from .events import get_broker
+from .forms import NoteForm
+from .hashers import suggest_iterations
+from .jobs import HANDLERS, claim_job, enqueue, run_chunk, run_jobs
+from .metrics import Registry
+from .models import (
+    BoardSummary,
+    Category,
+    Job,
+    Note,
+    NoteTombstone,
+    UserSession,
+)
+from .pagination import KeysetPage
+from .palette import get_palette
+from .search import search_note_ids
+from .seeding import seed_categories, seed_notes, seed_users
+from .sessions import end_user_sessions
+from .storage import minify_css
 
 # Unit Tests for Models (in models.py)
 # ==============================================================================
@@ -63,6 +116,20 @@ class ModelTests(TestCase):
         test_note = Note.objects.get(id=1)
         self.assertIsNotNone(test_note.created_at)
 
+    @skipUnless(connection.vendor == "sqlite", "Checks SQLite query plans.")
+    def test_note_list_query_uses_index(self):
+        # Checks the dashboard query is answered from the composite index,
+        # rather than sorting all of the user's notes.
+        page = KeysetPage(Note.objects.filter(user=self.user))
+        plan = page.get_queryset().explain()
+        self.assertIn("notey_note_user_created_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    @skipUnless(connection.vendor == "sqlite", "Checks SQLite query plans.")
+    def test_category_list_query_uses_index(self):
+        plan = Category.objects.order_by("name").explain()
+        self.assertIn("notey_category_name_idx", plan)
+
 
 # Unit Tests for Views (in views.py)
 # ==============================================================================
@@ -164,6 +231,62 @@ class ViewTests(TestCase):
         visitor_response = self.client.get(url)
         self.assertEqual(visitor_response.status_code, 302)
 
+    @override_settings(NOTEY_PAGE_SIZE=2)
+    def test_note_list_view_pagination(self):
+        # Checks the dashboard is split into pages, following the cursor.
+        for i in range(4):
+            Note.objects.create(
+                user=self.user,
+                title=f"paged_note_{i}",
+                content="Paged content.",
+                category=self.category,
+            )
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("note_list"))
+        page = response.context["page"]
+        self.assertEqual(
+            [note.title for note in page], ["unit_test", "paged_note_0"]
+        )
+        self.assertTrue(page.has_next)
+        self.assertContains(response, "Load more")
+        # Follow the 'load more' cursor to the next pages.
+        seen = []
+        cursor = page.next_cursor
+        while cursor:
+            response = self.client.get(reverse("note_list"), {"after": cursor})
+            page = response.context["page"]
+            seen += [note.title for note in page]
+            cursor = page.next_cursor
+        self.assertEqual(seen, ["paged_note_1", "paged_note_2", "paged_note_3"])
+        self.assertNotContains(response, "Load more")
+        # An invalid cursor falls back to the first page.
+        response = self.client.get(reverse("note_list"), {"after": "nonsense"})
+        self.assertTrue(response.context["page"].is_first)
+
+    def test_note_list_view_query_count(self):
+        # Checks the dashboard query count does not grow with the number of
+        # notes (i.e. each note's category is not fetched one at a time).
+        self.client.force_login(self.user)
+        # Caches the logged in user, so both pages are measured alike.
+        self.client.get(reverse("note_list"))
+        caches["fragments"].clear()
+        with CaptureQueriesContext(connection) as one_note:
+            self.client.get(reverse("note_list"))
+        for i in range(10):
+            Note.objects.create(
+                user=self.user,
+                title=f"query_note_{i}",
+                content="Query count content.",
+                category=Category.objects.create(
+                    name=f"colour_{i}", hex_value="abcc51"
+                ),
+            )
+        get_palette()
+        with CaptureQueriesContext(connection) as many_notes:
+            response = self.client.get(reverse("note_list"))
+        self.assertContains(response, "#abcc51")
+        self.assertEqual(len(one_note), len(many_notes))
+
     def test_note_detail_view(self):
         # Checks to see if a detail view of a note can be viewed.
         self.client.force_login(self.user)
@@ -290,3 +413,1916 @@ class ViewTests(TestCase):
         visitor_response = self.client.post(url, follow=True)
         self.assertRedirects(visitor_response, reverse("login"))
         self.assertContains(visitor_response, "You are not logged in.")
+
+
+# Unit Tests for the Category Palette Cache (in palette.py)
+# ==============================================================================
+
+
+class PaletteTests(TestCase):
+    """
+    Test class for the cached 'sticky-note' category palette.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    - models.Category: Category class representing a category the
+      'sticky-notes' are stored as (i.e. hex-value).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username="testuser",
+            email="test@email.com",
+            password="thefancytestpassword",
+        )
+        self.super_user = User.objects.create_superuser(
+            username="super_user",
+            email="super@email.com",
+            password="superuserpassword",
+        )
+        self.category = Category.objects.create(
+            name="orange", hex_value="fbae3c"
+        )
+
+    def category_queries(self, queries):
+        # The category table, rather than the board's counts per category.
+        return [q for q in queries if '"notey_category"' in q["sql"]]
+
+    def test_palette_is_cached(self):
+        # Checks the palette is only read from the database once.
+        self.assertEqual(get_palette(), (self.category,))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_palette(), (self.category,))
+
+    def test_palette_cleared_on_category_changes(self):
+        # Checks creating and deleting categories (i.e. through the views or
+        # the admin site) updates the palette.
+        get_palette()
+        pink = Category.objects.create(name="pink", hex_value="eb6092")
+        self.assertEqual(get_palette(), (self.category, pink))
+        pink.delete()
+        self.assertEqual(get_palette(), (self.category,))
+
+    def test_palette_shared_by_default(self):
+        # Every process reads the palette from the shared cache, so a
+        # category added through one is in all of their forms.
+        get_palette()
+        cached = caches["sessions"].get(palette._cache_key())
+        self.assertEqual(cached, (self.category,))
+        Category.objects.create(name="pink", hex_value="eb6092")
+        self.assertIsNone(caches["sessions"].get(palette._cache_key()))
+
+    @override_settings(
+        NOTEY_PALETTE_CACHE="default",
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "palette-tests",
+            }
+        },
+    )
+    def test_palette_in_shared_cache(self):
+        # Checks the palette can be kept in a shared cache backend.
+        self.assertEqual(get_palette(), (self.category,))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_palette(), (self.category,))
+        pink = Category.objects.create(name="pink", hex_value="eb6092")
+        self.assertEqual(get_palette(), (self.category, pink))
+
+    def test_note_form_without_category_queries(self):
+        # Checks the note form is shown and saved without category queries.
+        self.client.force_login(self.user)
+        get_palette()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("note_create"))
+        self.assertContains(response, "orange")
+        self.assertEqual(self.category_queries(queries), [])
+        post_data = {
+            "title": "Palette note",
+            "content": "Palette content.",
+            "category": self.category.pk,
+        }
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse("note_create"), data=post_data)
+        self.assertEqual(self.category_queries(queries), [])
+        self.assertEqual(
+            Note.objects.get(title="Palette note").category, self.category
+        )
+
+    def test_note_form_rejects_unknown_category(self):
+        form = NoteForm(
+            data={"title": "Title", "content": "Content", "category": 999}
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn("category", form.errors)
+
+    def test_category_list_without_category_queries(self):
+        self.client.force_login(self.super_user)
+        get_palette()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("category_list"))
+        self.assertContains(response, "fbae3c")
+        self.assertEqual(self.category_queries(queries), [])
+
+
+# Unit Tests for Logging In (in views.py and hashers.py)
+# ==============================================================================
+
+
+@override_settings(NOTEY_PASSWORD_ITERATIONS=1000)
+class LoginTests(TestCase):
+    """
+    Test class for the cost of logging in: the password is hashed once per
+    login, with the iterations of the hasher profile.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="login_user", password="login_password"
+        )
+
+    def log_in(self):
+        return self.client.post(
+            reverse("login"),
+            {"username": "login_user", "password": "login_password"},
+        )
+
+    def test_password_hashed_once(self):
+        with mock.patch.object(
+            hashers, "pbkdf2", wraps=hashers.pbkdf2
+        ) as pbkdf2:
+            response = self.log_in()
+        self.assertRedirects(
+            response, reverse("note_list"), fetch_redirect_response=False
+        )
+        self.assertEqual(pbkdf2.call_count, 1)
+
+    def test_rehashed_on_login(self):
+        self.assertIn("$1000$", self.user.password)
+        with self.settings(NOTEY_PASSWORD_ITERATIONS=2000):
+            self.log_in()
+        self.user.refresh_from_db()
+        self.assertIn("$2000$", self.user.password)
+        self.assertTrue(self.user.check_password("login_password"))
+
+    def test_login_benchmark(self):
+        scenario = login_scenario("login_user", "login_password")
+        result = measure(scenario, rounds=5, warmup=1).as_dict()
+        self.assertEqual(result["name"], "user_login")
+        self.assertEqual(result["rounds"], 5)
+        self.assertGreater(result["p50_ms"], 0)
+
+    def test_suggest_iterations(self):
+        self.assertGreaterEqual(suggest_iterations(0.001, 2000), 1000)
+
+
+# Unit Tests for Sessions (in sessions.py)
+# ==============================================================================
+
+
+class SessionTests(TestCase):
+    """
+    Test class for ending a user's sessions and purging expired sessions.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    - django.contrib.auth.models.User: Django class for creating User objects,
+      typically attached to a set of 'sticky-notes'.
+    - models.UserSession: Class recording the sessions of each user.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username="testuser",
+            email="test@email.com",
+            password="thefancytestpassword",
+        )
+        self.other_user = User.objects.create(
+            username="otheruser",
+            email="other@email.com",
+            password="theotherfancytestpassword",
+        )
+
+    def make_expired_session(self, key):
+        return Session.objects.create(
+            session_key=key,
+            session_data="",
+            expire_date=timezone.now() - timedelta(days=1),
+        )
+
+    def test_login_records_session(self):
+        self.client.force_login(self.user)
+        self.assertTrue(
+            UserSession.objects.filter(
+                user=self.user, session_key=self.client.session.session_key
+            ).exists()
+        )
+        self.client.logout()
+        self.assertFalse(UserSession.objects.filter(user=self.user).exists())
+
+    def test_cycled_session_key_recorded(self):
+        # Changing the password cycles the session key, which must still be
+        # ended when the user deletes their account.
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        self.client.force_login(self.user)
+        old_key = self.client.session.session_key
+        response = self.client.post(
+            reverse("admin:auth_user_password_change", args=[self.user.pk]),
+            {
+                "password1": "thenewfancytestpassword",
+                "password2": "thenewfancytestpassword",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        new_key = self.client.session.session_key
+        self.assertNotEqual(new_key, old_key)
+        self.assertEqual(
+            list(
+                UserSession.objects.filter(user=self.user).values_list(
+                    "session_key", flat=True
+                )
+            ),
+            [new_key],
+        )
+        self.client.post(reverse("user_delete"))
+        self.assertFalse(Session.objects.filter(pk=new_key).exists())
+
+    def test_live_sessions_backfilled(self):
+        # Sessions logged in before UserSession existed are recorded by the
+        # migration.
+        migration = import_module(
+            "notey.migrations.0014_backfill_user_sessions"
+        )
+        self.client.force_login(self.user)
+        other_device = Client()
+        other_device.force_login(self.other_user)
+        self.make_expired_session("expiredsessionkey")
+        UserSession.objects.filter(user=self.other_user).delete()
+        migration.record_live_sessions(apps, None)
+        self.assertEqual(
+            set(UserSession.objects.values_list("user", "session_key")),
+            {
+                (self.user.pk, self.client.session.session_key),
+                (self.other_user.pk, other_device.session.session_key),
+            },
+        )
+        self.assertEqual(end_user_sessions(self.other_user), 1)
+        self.assertFalse(
+            Session.objects.filter(pk=other_device.session.session_key).exists()
+        )
+
+    def test_user_delete_ends_only_users_sessions(self):
+        # Checks deleting an account logs the user out on every device,
+        # without touching anyone else's sessions.
+        other_device = Client()
+        other_device.force_login(self.user)
+        other_users_device = Client()
+        other_users_device.force_login(self.other_user)
+        expired = self.make_expired_session("expiredsessionkey")
+        self.client.force_login(self.user)
+        self.client.post(reverse("user_delete"))
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        response = other_device.get(reverse("note_list"))
+        self.assertRedirects(response, reverse("login"))
+        response = other_users_device.get(reverse("note_list"))
+        self.assertEqual(response.status_code, 200)
+        # Expired sessions are left for purge_sessions to clear.
+        self.assertTrue(Session.objects.filter(pk=expired.pk).exists())
+
+    def test_purge_sessions_command(self):
+        # Checks expired sessions are purged in batches, leaving live ones.
+        for i in range(5):
+            self.make_expired_session(f"expiredsessionkey{i}")
+        self.client.force_login(self.user)
+        out = StringIO()
+        management.call_command(
+            "purge_sessions", batch_size=2, pause=0, stdout=out
+        )
+        self.assertIn("Purged 5 sessions in 3 batches", out.getvalue())
+        self.assertEqual(Session.objects.count(), 1)
+        response = self.client.get(reverse("note_list"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_session_engines(self):
+        # Compares a logged in page view with each session engine, against
+        # Django's defaults (sessions and users read from the database).
+        note = Note.objects.create(user=self.user, title="T", content="C")
+        url = reverse("note_detail", kwargs={"pk": note.pk})
+        engine = "django.contrib.sessions.backends."
+        setups = {
+            "defaults": (engine + "db", "django.contrib.auth.backends."),
+            "db": (engine + "db", "notey.backends."),
+            "cached_db": (engine + "cached_db", "notey.backends."),
+            "signed_cookies": (engine + "signed_cookies", "notey.backends."),
+        }
+        results = {}
+        for name, (session_engine, backends) in setups.items():
+            backend = backends + (
+                "ModelBackend" if name == "defaults" else "CachedModelBackend"
+            )
+            with self.settings(
+                SESSION_ENGINE=session_engine,
+                AUTHENTICATION_BACKENDS=[backend],
+            ):
+                client = Client()
+                client.force_login(self.user)
+                scenario = Scenario(name, lambda: client.get(url))
+                results[name] = measure(scenario, rounds=10).as_dict()
+        queries = {name: result["queries"] for name, result in results.items()}
+        summary = ", ".join(
+            f"{name}: {result['queries']} queries, {result['p50_ms']}ms"
+            for name, result in results.items()
+        )
+        # The user is cached, and then the session too.
+        self.assertEqual(queries["db"], queries["defaults"] - 1, summary)
+        self.assertEqual(queries["cached_db"], queries["defaults"] - 2, summary)
+        self.assertEqual(
+            queries["signed_cookies"], queries["cached_db"], summary
+        )
+
+    def test_cached_user_follows_changes(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("note_list")).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse("note_list"))
+        self.assertRedirects(response, reverse("login"))
+
+    @override_settings(
+        SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies"
+    )
+    def test_signed_cookie_sessions(self):
+        # Signed cookie sessions are not recorded, or purged, as they are
+        # kept in the browser.
+        self.client.force_login(self.user)
+        self.assertFalse(UserSession.objects.exists())
+        self.assertEqual(self.client.get(reverse("note_list")).status_code, 200)
+        with self.assertRaisesMessage(CommandError, "nothing to purge"):
+            management.call_command("purge_sessions", stdout=StringIO())
+
+
+# Unit Tests for the JSON API (in api.py)
+# ==============================================================================
+
+
+class ApiTests(TestCase):
+    """
+    Test class for the bulk 'sticky-note' JSON API.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    - django.contrib.auth.models.User: Django class for creating User objects,
+      typically attached to a set of 'sticky-notes'.
+    - models.Note: Note class represting a 'sticky-note'.
+    - models.Category: Category class representing a category the
+      'sticky-notes' are stored as (i.e. hex-value).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username="testuser",
+            email="test@email.com",
+            password="thefancytestpassword",
+        )
+        self.other_user = User.objects.create(
+            username="otheruser",
+            email="other@email.com",
+            password="theotherfancytestpassword",
+        )
+        self.category = Category.objects.create(
+            name="orange", hex_value="fbae3c"
+        )
+        self.url = reverse("api_notes")
+        self.client.force_login(self.user)
+
+    def send(self, method, data):
+        return getattr(self.client, method)(
+            self.url, data=json.dumps(data), content_type="application/json"
+        )
+
+    def test_bulk_create(self):
+        notes = [
+            {"title": f"API note {i}", "content": "API content."}
+            for i in range(20)
+        ]
+        notes[0]["category"] = self.category.pk
+        with CaptureQueriesContext(connection) as queries:
+            response = self.send("post", {"notes": notes})
+        inserts = [
+            q
+            for q in queries
+            if q["sql"].startswith('INSERT INTO "notey_note"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(response.status_code, 201)
+        created = response.json()["notes"]
+        self.assertEqual(len(created), 20)
+        self.assertEqual(created[0]["category"], self.category.pk)
+        self.assertEqual(Note.objects.filter(user=self.user).count(), 20)
+
+    def test_bulk_create_rejects_whole_batch(self):
+        response = self.send(
+            "post",
+            {"notes": [{"title": "Valid", "content": "Valid."}, {"title": ""}]},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("1", response.json()["errors"])
+        self.assertFalse(Note.objects.exists())
+
+    def test_list_pages(self):
+        for i in range(3):
+            Note.objects.create(user=self.user, title=f"{i}", content="C")
+        Note.objects.create(user=self.other_user, title="other", content="C")
+        response = self.client.get(self.url, {"page_size": 2})
+        body = response.json()
+        self.assertEqual([note["title"] for note in body["notes"]], ["0", "1"])
+        response = self.client.get(self.url, {"after": body["next"]})
+        body = response.json()
+        self.assertEqual([note["title"] for note in body["notes"]], ["2"])
+        self.assertIsNone(body["next"])
+
+    def test_bulk_update(self):
+        first = Note.objects.create(user=self.user, title="1", content="C")
+        second = Note.objects.create(user=self.user, title="2", content="C")
+        response = self.send(
+            "patch",
+            {
+                "notes": [
+                    {"id": first.pk, "title": "One"},
+                    {"id": second.pk, "category": self.category.pk},
+                ]
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.title, first.content), ("One", "C"))
+        self.assertEqual(second.category, self.category)
+
+    def test_bad_ids_rejected(self):
+        note = Note.objects.create(user=self.user, title="1", content="C")
+        for notes in (
+            [{"id": True, "title": "Bool"}],
+            [{"id": note.pk, "title": "A"}, {"id": note.pk, "title": "B"}],
+        ):
+            response = self.send("patch", {"notes": notes})
+            self.assertEqual(response.status_code, 400)
+        for ids in ([True], [note.pk, note.pk]):
+            response = self.send("delete", {"ids": ids})
+            self.assertEqual(response.status_code, 400)
+        note.refresh_from_db()
+        self.assertEqual((note.title, note.version), ("1", 1))
+
+    def test_bulk_delete_queries_do_not_grow_with_notes(self):
+        def delete_queries(count):
+            ids = [
+                Note.objects.create(user=self.user, title="D", content="C").pk
+                for _ in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.send("delete", {"ids": ids})
+            self.assertEqual(response.json(), {"deleted": count})
+            return len(queries)
+
+        self.client.get(self.url)  # Caches the session and the user.
+        self.assertEqual(delete_queries(2), delete_queries(40))
+        self.assertFalse(Note.objects.exists())
+        self.assertEqual(NoteTombstone.objects.count(), 42)
+        self.assertEqual(self.client.get(self.url).json()["count"], 0)
+
+    def test_bulk_update_and_delete_only_own_notes(self):
+        other = Note.objects.create(
+            user=self.other_user, title="O", content="C"
+        )
+        response = self.send(
+            "patch", {"notes": [{"id": other.pk, "title": "X"}]}
+        )
+        self.assertEqual(response.status_code, 404)
+        own = Note.objects.create(user=self.user, title="1", content="C")
+        response = self.send("delete", {"ids": [own.pk, other.pk]})
+        self.assertEqual(response.json(), {"deleted": 1})
+        self.assertTrue(Note.objects.filter(pk=other.pk).exists())
+        self.assertFalse(Note.objects.filter(pk=own.pk).exists())
+
+    def test_bulk_update_version_conflict(self):
+        note = Note.objects.create(user=self.user, title="1", content="C")
+        response = self.send(
+            "patch",
+            {"notes": [{"id": note.pk, "title": "One", "version": 1}]},
+        )
+        self.assertEqual(response.json()["notes"][0]["version"], 2)
+        response = self.send(
+            "patch",
+            {"notes": [{"id": note.pk, "title": "Uno", "version": 1}]},
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["ids"], [note.pk])
+        note.refresh_from_db()
+        self.assertEqual((note.title, note.version), ("One", 2))
+
+    def test_not_logged_in(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+
+
+# Unit Tests for Editing Notes (in views.py and models.py)
+# ==============================================================================
+
+
+class NoteEditTests(TestCase):
+    """
+    Test class for the single UPDATE, version checked, saving an edited
+    'sticky-note'.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    - models.Note: Note class represting a 'sticky-note'.
+    - django.test.utils.CaptureQueriesContext: Records the SQL queries run.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="editor")
+        self.other_user = User.objects.create(username="other")
+        self.category = Category.objects.create(
+            name="orange", hex_value="fbae3c"
+        )
+        self.note = Note.objects.create(
+            user=self.user,
+            title="Title",
+            content="Content",
+            category=self.category,
+        )
+        self.url = reverse("note_update", kwargs={"pk": self.note.pk})
+        self.client.force_login(self.user)
+
+    def post(self, **data):
+        data = {
+            "title": "Title",
+            "content": "Content",
+            "category": self.category.pk,
+            "version": 1,
+            **data,
+        }
+        return self.client.post(self.url, data)
+
+    def test_only_changed_fields_updated(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(title="New title")
+        self.assertRedirects(
+            response, reverse("note_list"), fetch_redirect_response=False
+        )
+        updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "notey_note"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"title"', updates[0])
+        self.assertNotIn('"content"', updates[0])
+        self.assertIn('"version" = ', updates[0].split("WHERE")[1])
+        self.note.refresh_from_db()
+        self.assertEqual((self.note.title, self.note.version), ("New title", 2))
+
+    def test_stale_version_conflicts(self):
+        Note.objects.filter(pk=self.note.pk).update(
+            title="Elsewhere", version=2
+        )
+        pink = Category.objects.create(name="pink", hex_value="eb6092")
+        response = self.post(title="Here", category=pink.pk)
+        self.assertEqual(response.status_code, 409)
+        self.assertContains(
+            response, 'name="version" value="2"', status_code=409
+        )
+        # The form keeps the user's changes, including the colour.
+        self.assertContains(
+            response, f'value="{pink.pk}" selected', status_code=409
+        )
+        self.assertContains(response, 'value="Here"', status_code=409)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, "Elsewhere")
+        # The change number taken for the failed save is given back.
+        summary = BoardSummary.objects.get(user=self.user)
+        self.assertEqual(summary.change_seq, 1)
+        # Saving again, from the form shown, overwrites the other change.
+        self.post(title="Here", version=2)
+        self.note.refresh_from_db()
+        self.assertEqual((self.note.title, self.note.version), ("Here", 3))
+
+    def test_save_with_update_fields_stamps_note(self):
+        updated_at = self.note.updated_at
+        self.note.title = "Saved"
+        self.note.save(update_fields=["title"])
+        self.note.refresh_from_db()
+        self.assertEqual((self.note.title, self.note.version), ("Saved", 2))
+        self.assertGreater(self.note.updated_at, updated_at)
+
+    def test_other_users_note_not_found(self):
+        self.client.force_login(self.other_user)
+        response = self.post(title="Mine now")
+        self.assertEqual(response.status_code, 404)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, "Title")
+
+
+# Unit Tests for Delta Sync (in changes.py and api.py)
+# ==============================================================================
+
+
+class ChangeTests(TestCase):
+    """
+    Test class for the change sequence numbers and the changes API, which
+    syncing clients use to download only what changed on their board.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    - models.Note: Note class represting a 'sticky-note'.
+    - models.NoteTombstone: Record of a deleted 'sticky-note'.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="syncer")
+        self.other_user = User.objects.create(username="other")
+        self.url = reverse("api_changes")
+        self.client.force_login(self.user)
+
+    def add_notes(self, count, user=None):
+        return [
+            Note.objects.create(
+                user=user or self.user, title=f"{i}", content="C"
+            )
+            for i in range(count)
+        ]
+
+    def test_changes_since(self):
+        first, second, third = self.add_notes(3)
+        self.add_notes(2, user=self.other_user)
+        self.assertEqual(
+            [first.change_seq, second.change_seq, third.change_seq], [1, 2, 3]
+        )
+        body = self.client.get(self.url).json()
+        self.assertEqual(len(body["notes"]), 3)
+        self.assertEqual((body["seq"], body["more"]), (3, False))
+        second.title = "Edited"
+        second.save()
+        deleted_id = first.pk
+        first.delete()
+        body = self.client.get(self.url, {"since": 3}).json()
+        self.assertEqual([note["title"] for note in body["notes"]], ["Edited"])
+        self.assertEqual(body["deleted"], [deleted_id])
+        self.assertEqual(body["seq"], 5)
+        body = self.client.get(self.url, {"since": 5}).json()
+        self.assertEqual((body["notes"], body["deleted"]), ([], []))
+        self.assertEqual(body["seq"], 5)
+
+    def test_changes_paged(self):
+        notes = self.add_notes(5)
+        deleted_id = notes[0].pk
+        notes[0].delete()
+        body = self.client.get(self.url, {"since": 2, "page_size": 2}).json()
+        self.assertEqual([note["title"] for note in body["notes"]], ["2", "3"])
+        self.assertEqual((body["seq"], body["more"]), (4, True))
+        body = self.client.get(self.url, {"since": 4, "page_size": 2}).json()
+        self.assertEqual([note["title"] for note in body["notes"]], ["4"])
+        self.assertEqual(body["deleted"], [deleted_id])
+        self.assertFalse(body["more"])
+        response = self.client.get(self.url, {"since": "x"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_changes_cost_follows_delta(self):
+        self.add_notes(30)
+        self.add_notes(1)[0].delete()
+        with self.assertNumQueries(2):
+            notes, deleted, seq, more = get_changes(self.user.id, 30, 10)
+        self.assertEqual((notes, len(deleted), seq, more), ([], 1, 32, False))
+        if connection.vendor == "sqlite":
+            plan = (
+                Note.objects.filter(user=self.user, change_seq__gt=30)
+                .order_by("change_seq")
+                .explain()
+            )
+            self.assertIn("notey_note_user_change_idx", plan)
+
+    def test_bulk_changes_stamped(self):
+        response = self.client.post(
+            reverse("api_notes"),
+            data=json.dumps({"notes": [{"title": "A", "content": "C"}] * 3}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            sorted(Note.objects.values_list("change_seq", flat=True)),
+            [1, 2, 3],
+        )
+        # The sequence carries on through a recount of the board.
+        rebuild_counters()
+        self.assertEqual(self.add_notes(1)[0].change_seq, 4)
+
+    def test_deleting_user_leaves_no_tombstones(self):
+        self.add_notes(2)
+        self.user.delete()
+        self.assertFalse(NoteTombstone.objects.exists())
+
+
+# Unit Tests for the Board Counters (in counters.py)
+# ==============================================================================
+
+
+class CounterTests(TestCase):
+    """
+    Test class for the per-user note counters, kept up to date as notes are
+    created, edited and deleted.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="counter_user", password="counter_password"
+        )
+        self.orange = Category.objects.create(name="orange", hex_value="fbae3c")
+        self.pink = Category.objects.create(name="pink", hex_value="eb6092")
+        for i in range(3):
+            Note.objects.create(
+                user=self.user,
+                title=f"counted_{i}",
+                content="Counted content.",
+                category=self.orange if i else None,
+            )
+
+    def note_count(self):
+        return BoardSummary.objects.get(user=self.user).note_count
+
+    def test_counts_follow_notes(self):
+        self.assertEqual(self.note_count(), 3)
+        self.assertEqual(get_category_counts(self.user.pk), {self.orange.pk: 2})
+        note = Note.objects.get(title="counted_1")
+        note.category = self.pink
+        note.save()
+        self.assertEqual(
+            get_category_counts(self.user.pk),
+            {self.orange.pk: 1, self.pink.pk: 1},
+        )
+        note.delete()
+        self.assertEqual(self.note_count(), 2)
+        self.assertEqual(get_category_counts(self.user.pk), {self.orange.pk: 1})
+        # Deleting a category deletes its notes.
+        self.orange.delete()
+        self.assertEqual(self.note_count(), 1)
+
+    def test_bulk_changes_counted(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("api_notes"),
+            data=json.dumps({"notes": [{"title": "API", "content": "C"}] * 2}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.note_count(), 5)
+        ids = [note["id"] for note in response.json()["notes"]]
+        self.client.delete(
+            reverse("api_notes"),
+            data=json.dumps({"ids": ids}),
+            content_type="application/json",
+        )
+        self.assertEqual(self.note_count(), 3)
+        self.assertEqual(
+            self.client.get(reverse("api_notes")).json()["count"], 3
+        )
+
+    def test_rebuild_counters(self):
+        BoardSummary.objects.update(note_count=99)
+        Note.objects.filter(category=self.orange).update(category=self.pink)
+        management.call_command("rebuild_counters", stdout=StringIO())
+        self.assertEqual(self.note_count(), 3)
+        self.assertEqual(get_category_counts(self.user.pk), {self.pink.pk: 2})
+
+    def test_dashboard_summary(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("note_list"))
+        self.assertContains(response, "3 notes")
+        self.assertContains(response, 'title="orange"')
+        self.assertNotContains(response, 'title="pink"')
+
+
+# Unit Tests for the Background Jobs (in jobs.py)
+# ==============================================================================
+
+
+class JobTests(TestCase):
+    """
+    Test class for the job queue, and deleting categories and accounts in
+    the background.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    """
+
+    def setUp(self):
+        self.super_user = User.objects.create_superuser(
+            username="job_admin", password="job_password"
+        )
+        self.user = User.objects.create_user(
+            username="job_user", password="job_password"
+        )
+        self.orange = Category.objects.create(name="orange", hex_value="fbae3c")
+        self.pink = Category.objects.create(name="pink", hex_value="eb6092")
+        for i in range(5):
+            Note.objects.create(
+                user=self.user if i % 2 else self.super_user,
+                title=f"job_note_{i}",
+                content="Job content.",
+                category=self.orange,
+            )
+        self.client.force_login(self.super_user)
+
+    def delete_orange(self, **data):
+        return self.client.post(
+            reverse("category_delete", kwargs={"pk": self.orange.pk}),
+            data=data,
+            follow=True,
+        )
+
+    def test_category_deleted_in_chunks(self):
+        response = self.delete_orange()
+        self.assertContains(response, "being deleted in the background")
+        self.assertContains(response, "0 of ? notes done.")
+        self.orange.refresh_from_db()
+        self.assertTrue(self.orange.retired)
+        self.assertNotIn(self.orange, get_palette())
+        self.assertEqual(Note.objects.count(), 5)
+        jobs = list(run_jobs(batch_size=2))
+        self.assertEqual(len(jobs), 4)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.done, job.total), ("done", 5, 5))
+        self.assertFalse(Category.objects.filter(pk=self.orange.pk).exists())
+        self.assertEqual(Note.objects.count(), 0)
+        self.assertEqual(BoardSummary.objects.get(user=self.user).note_count, 0)
+
+    def test_retiring_category_kept_on_edit(self):
+        # Until the job moves its notes, editing a note in a category being
+        # retired keeps the note's colour.
+        self.delete_orange(reassign_to=self.pink.pk)
+        note = Note.objects.filter(user=self.super_user).first()
+        url = reverse("note_update", kwargs={"pk": note.pk})
+        response = self.client.get(url)
+        self.assertContains(
+            response, f'<option value="{self.orange.pk}" selected>orange'
+        )
+        self.assertNotContains(response, f'<option value="{self.pink.pk}" s')
+        self.client.post(
+            url,
+            {
+                "title": "Edited",
+                "content": note.content,
+                "category": self.orange.pk,
+                "version": note.version,
+            },
+        )
+        note.refresh_from_db()
+        self.assertEqual((note.title, note.category), ("Edited", self.orange))
+        # Other notes still cannot be moved into it.
+        form = NoteForm(
+            {"title": "New", "content": "C", "category": self.orange.pk}
+        )
+        self.assertFalse(form.is_valid())
+
+    def test_notes_reassigned(self):
+        self.delete_orange(reassign_to=self.pink.pk)
+        out = StringIO()
+        management.call_command("run_jobs", batch_size=2, stdout=out)
+        self.assertIn("5 of 5 done.", out.getvalue())
+        self.assertEqual(Note.objects.filter(category=self.pink).count(), 5)
+        self.assertEqual(get_category_counts(self.user.pk), {self.pink.pk: 2})
+        self.assertFalse(Category.objects.filter(pk=self.orange.pk).exists())
+
+    def test_failed_chunk_retried(self):
+        self.delete_orange()
+        failing = mock.Mock(side_effect=RuntimeError("database is locked"))
+        with mock.patch.dict(HANDLERS, {"delete_category": failing}):
+            with self.assertLogs("notey.jobs", "WARNING"):
+                list(run_jobs())
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), ("pending", 1))
+        self.assertIn("database is locked", job.last_error)
+        self.assertGreater(job.run_after, timezone.now())
+        # Not due again until the retry delay has passed.
+        self.assertIsNone(claim_job())
+        Job.objects.update(run_after=timezone.now())
+        with self.settings(NOTEY_JOB_MAX_ATTEMPTS=2):
+            with mock.patch.dict(HANDLERS, {"delete_category": failing}):
+                with self.assertLogs("notey.jobs", "ERROR"):
+                    list(run_jobs())
+        self.assertEqual(Job.objects.get().status, "failed")
+        self.assertContains(
+            self.client.get(reverse("category_list")), "failed after 2"
+        )
+
+    def test_account_deleted_in_background(self):
+        other_device = Client()
+        other_device.force_login(self.user)
+        self.client.force_login(self.user)
+        response = self.client.post(reverse("user_delete"))
+        self.assertContains(response, "Your account has been deleted.")
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertFalse(self.user.has_usable_password())
+        self.assertFalse(
+            self.client.login(username="job_user", password="job_password")
+        )
+        self.assertRedirects(
+            other_device.get(reverse("note_list")), reverse("login")
+        )
+        self.assertEqual(Note.objects.filter(user=self.user).count(), 2)
+        list(run_jobs(batch_size=1))
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(Note.objects.count(), 3)
+        job = Job.objects.get(kind="delete_user")
+        self.assertEqual((job.status, job.done, job.total), ("done", 2, 2))
+
+    def test_chunk_queries_do_not_grow_with_notes(self):
+        # A chunk is deleted with one DELETE, and the index, counters and
+        # tombstones updated once for it, rather than once per note.
+        def chunk_queries(count):
+            Note.objects.bulk_create(
+                Note(user=self.user, title="N", content="C", category=self.pink)
+                for _ in range(count)
+            )
+            job = enqueue("delete_category", category_id=self.pink.pk)
+            with CaptureQueriesContext(connection) as queries:
+                run_chunk(job, batch_size=count)
+            return len(queries)
+
+        self.assertEqual(chunk_queries(2), chunk_queries(50))
+        self.assertEqual(Note.objects.filter(category=self.pink).count(), 0)
+        self.assertEqual(
+            NoteTombstone.objects.filter(user=self.user).count(), 52
+        )
+
+    def test_claimed_once(self):
+        self.delete_orange()
+        self.assertIsNotNone(claim_job())
+        self.assertIsNone(claim_job())
+
+
+# Unit Tests for Full-Text Search (in search.py)
+# ==============================================================================
+
+
+class SearchTests(TestCase):
+    """
+    Test class for searching 'sticky-notes'.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    - django.contrib.auth.models.User: Django class for creating User objects,
+      typically attached to a set of 'sticky-notes'.
+    - models.Note: Note class represting a 'sticky-note'.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username="testuser",
+            email="test@email.com",
+            password="thefancytestpassword",
+        )
+        self.other_user = User.objects.create(
+            username="otheruser",
+            email="other@email.com",
+            password="theotherfancytestpassword",
+        )
+        self.shopping = Note.objects.create(
+            user=self.user, title="Shopping", content="Milk, eggs and bread."
+        )
+        self.garden = Note.objects.create(
+            user=self.user, title="Garden", content="Buy seeds and more eggs."
+        )
+        Note.objects.create(
+            user=self.other_user, title="Eggs", content="Not your eggs."
+        )
+
+    def test_search_ranks_and_filters_by_user(self):
+        ids = search_note_ids(self.user.id, "eggs")
+        self.assertCountEqual(ids, [self.shopping.pk, self.garden.pk])
+        # Title matches rank above content matches.
+        recipe = Note.objects.create(
+            user=self.user, title="Bread", content="Flour and water."
+        )
+        self.assertEqual(
+            search_note_ids(self.user.id, "bread"),
+            [recipe.pk, self.shopping.pk],
+        )
+        # Words match as prefixes, and search syntax is ignored.
+        self.assertEqual(
+            search_note_ids(self.user.id, "gard"), [self.garden.pk]
+        )
+        self.assertEqual(search_note_ids(self.user.id, 'milk "OR'), [])
+        self.assertEqual(
+            search_note_ids(self.user.id, "milk bread"), [self.shopping.pk]
+        )
+
+    def test_index_follows_saves_and_deletes(self):
+        self.garden.title = "Allotment"
+        self.garden.save()
+        self.assertEqual(search_note_ids(self.user.id, "garden"), [])
+        self.assertEqual(
+            search_note_ids(self.user.id, "allotment"), [self.garden.pk]
+        )
+        self.garden.delete()
+        self.assertEqual(search_note_ids(self.user.id, "allotment"), [])
+
+    def test_index_follows_bulk_api(self):
+        self.client.force_login(self.user)
+        self.client.post(
+            reverse("api_notes"),
+            data=json.dumps({"notes": [{"title": "Bulk", "content": "Kiwi"}]}),
+            content_type="application/json",
+        )
+        self.client.patch(
+            reverse("api_notes"),
+            data=json.dumps(
+                {"notes": [{"id": self.shopping.pk, "title": "Kiwi"}]}
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(len(search_note_ids(self.user.id, "kiwi")), 2)
+
+    def test_note_search_view(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("note_search"), {"q": "bread"})
+        self.assertEqual(list(response.context["notes"]), [self.shopping])
+        self.assertContains(response, "Shopping")
+        self.assertNotContains(response, "Garden")
+        self.client.logout()
+        response = self.client.get(reverse("note_search"), {"q": "bread"})
+        self.assertEqual(response.status_code, 302)
+
+
+# Unit Tests for Conditional GET (in conditional.py)
+# ==============================================================================
+
+
+class ConditionalTests(TestCase):
+    """
+    Test class for the ETag/Last-Modified handling of the note pages.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    - django.contrib.auth.models.User: Django class for creating User objects,
+      typically attached to a set of 'sticky-notes'.
+    - models.Note: Note class represting a 'sticky-note'.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username="testuser",
+            email="test@email.com",
+            password="thefancytestpassword",
+        )
+        self.note = Note.objects.create(
+            user=self.user, title="unit_test", content="Test content."
+        )
+        self.client.force_login(self.user)
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_note_list_not_modified(self):
+        url = reverse("note_list")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertTrue(response.has_header("Last-Modified"))
+        not_modified = self.revalidate(url, response)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.templates, [])
+        # Adding, editing or deleting a note changes the board.
+        note = Note.objects.create(user=self.user, title="New", content="C")
+        changed = self.revalidate(url, response)
+        self.assertEqual(changed.status_code, 200)
+        note.title = "Edited"
+        note.save()
+        self.assertEqual(self.revalidate(url, changed).status_code, 200)
+        note.delete()
+        self.assertEqual(self.revalidate(url, changed).status_code, 200)
+
+    def test_note_list_not_cached_with_messages(self):
+        # Pages with a message waiting (i.e. after creating a note) are
+        # always rendered, so the message is shown.
+        url = reverse("note_list")
+        response = self.client.get(url)
+        self.client.post(
+            reverse("note_create"), data={"title": "T", "content": "C"}
+        )
+        response = self.revalidate(url, response)
+        self.assertContains(response, "Sticky Note created.")
+
+    def test_note_list_modified_after_logging_in_again(self):
+        # Logging in replaces the CSRF secret, so the tokens in a page from
+        # before would be refused.
+        self.user.set_password("thefancytestpassword")
+        self.user.save()
+        self.client.force_login(self.user)
+        url = reverse("note_list")
+        response = self.client.get(url)
+        self.client.get(reverse("logout"))
+        self.client.post(
+            reverse("login"),
+            data={"username": "testuser", "password": "thefancytestpassword"},
+        )
+        self.client.get(url)  # Shows the "logged in" message.
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_note_detail_not_modified(self):
+        url = reverse("note_detail", kwargs={"pk": self.note.pk})
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+        self.note.content = "New content."
+        self.note.save()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+
+# Unit Tests for the Fragment Cache (in note_list.html and note_card.html)
+# ==============================================================================
+
+
+class FragmentCacheTests(TestCase):
+    """
+    Test class for the cached fragments of the 'sticky-note' board.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    - django.contrib.auth.models.User: Django class for creating User objects,
+      typically attached to a set of 'sticky-notes'.
+    - models.Note: Note class represting a 'sticky-note'.
+    - models.Category: Category class representing a category the
+      'sticky-notes' are stored as (i.e. hex-value).
+    """
+
+    def setUp(self):
+        caches["fragments"].clear()
+        self.user = User.objects.create(
+            username="testuser",
+            email="test@email.com",
+            password="thefancytestpassword",
+        )
+        self.category = Category.objects.create(
+            name="orange", hex_value="fbae3c"
+        )
+        self.note = Note.objects.create(
+            user=self.user,
+            title="unit_test",
+            content="Test content.",
+            category=self.category,
+        )
+        self.client.force_login(self.user)
+
+    def note_queries(self, queries):
+        # The query for the page of notes (rather than the board's version).
+        return [q for q in queries if '"notey_note"."title"' in q["sql"]]
+
+    def test_board_served_from_cache(self):
+        url = reverse("note_list")
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, "unit_test")
+        self.assertEqual(self.note_queries(queries), [])
+        # The cached board holds no CSRF tokens, those stay per session.
+        self.assertEqual(
+            response.content.decode().count("csrfmiddlewaretoken"), 1
+        )
+
+    def test_board_cache_follows_changes(self):
+        url = reverse("note_list")
+        self.client.get(url)
+        self.note.title = "changed_title"
+        self.note.save()
+        response = self.client.get(url)
+        self.assertContains(response, "changed_title")
+        self.category.hex_value = "eb6092"
+        self.category.save()
+        response = self.client.get(url)
+        self.assertContains(response, "#eb6092")
+        Note.objects.create(user=self.user, title="second_note", content="C")
+        self.assertContains(self.client.get(url), "second_note")
+
+    def test_note_card_cached(self):
+        self.client.get(reverse("note_list"))
+        key = make_template_fragment_key(
+            "note_card",
+            [self.note.pk, self.note.updated_at, self.category.hex_value],
+        )
+        self.assertIn("unit_test", caches["fragments"].get(key))
+
+
+# Unit Tests for the Benchmark Harness (in benchmark.py and seeding.py)
+# ==============================================================================
+
+
+class BenchmarkTests(TestCase):
+    """
+    Test class for the benchmark harness and the seeded data it runs on.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    - django.contrib.auth.models.User: Django class for creating User objects,
+      typically attached to a set of 'sticky-notes'.
+    - models.Note: Note class represting a 'sticky-note'.
+    """
+
+    def test_seeding(self):
+        categories = seed_categories(7)
+        self.assertEqual(Category.objects.count(), 7)
+        self.assertEqual(len({c.hex_value for c in categories}), 7)
+        user_ids = seed_users(2, "bench")
+        self.assertEqual(
+            list(seed_notes(user_ids, categories, 150, 100)), [100, 150]
+        )
+        self.assertEqual(Note.objects.filter(user_id=user_ids[0]).count(), 75)
+
+    def test_view_scenarios(self):
+        user_ids = seed_users(1, "bench")
+        list(seed_notes(user_ids, seed_categories(), 60))
+        user = User.objects.get(pk=user_ids[0])
+        user.is_superuser = True
+        user.save()
+        self.client.force_login(user)
+        results = [
+            measure(scenario, rounds=3, warmup=1).as_dict()
+            for scenario in view_scenarios(self.client, user)
+        ]
+        self.assertEqual(
+            [result["name"] for result in results],
+            [
+                "note_list",
+                "note_list (next page)",
+                "note_detail",
+                "note_create",
+                "note_update",
+                "note_delete",
+                "category_list",
+            ],
+        )
+        for result in results:
+            self.assertEqual(result["rounds"], 3)
+            self.assertGreater(result["peak_kib"], 0)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        self.assertGreater(results[3]["queries"], 0)
+
+    def test_compare(self):
+        baseline = [{"name": "note_list", "p50_ms": 10.0, "queries": 3}]
+        self.assertEqual(compare(baseline, baseline), [])
+        slower = [{"name": "note_list", "p50_ms": 12.0, "queries": 4}]
+        self.assertEqual(len(compare(slower, baseline)), 1)
+        self.assertEqual(len(compare(slower, baseline, tolerance=0.1)), 2)
+
+
+class LoadTestTests(TransactionTestCase):
+    """
+    Test class for the loadtest command, which serves requests from several
+    threads, so the data it reads is committed rather than left in a test
+    transaction.
+
+    Parameters:
+    - django.test.TransactionTestCase: Parent class this class inherits from.
+    - django.contrib.auth.models.User: Django class for creating User objects,
+      typically attached to a set of 'sticky-notes'.
+    - models.Note: Note class represting a 'sticky-note'.
+    """
+
+    def test_loadtest(self):
+        user_ids = seed_users(1, "bench")
+        list(seed_notes(user_ids, seed_categories(), 20))
+        out = StringIO()
+        with self.assertNoLogs("notey", level="WARNING"):
+            management.call_command(
+                "loadtest",
+                "--requests=8",
+                "--concurrency=4",
+                "--threads=2",
+                "--delay=200",
+                stdout=out,
+            )
+        output = out.getvalue()
+        # The sync views are served on the worker threads only, while the
+        # async views serve every request the clients send at once.
+        self.assertIn("At most 2 requests served at once", output)
+        self.assertIn("At most 4 requests served at once", output)
+        self.assertEqual(output.count(" 0 failed"), 2)
+
+
+# Unit Tests for Note Import/Export (in transfer.py)
+# ==============================================================================
+
+
+class TransferTests(TestCase):
+    """
+    Test class for the export_notes and import_notes commands.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    - django.contrib.auth.models.User: Django class for creating User objects,
+      typically attached to a set of 'sticky-notes'.
+    - models.Note: Note class represting a 'sticky-note'.
+    - models.Category: Category class representing a category the
+      'sticky-notes' are stored as (i.e. hex-value).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", password="pw")
+        self.category = Category.objects.create(
+            name="orange", hex_value="fbae3c"
+        )
+        self.created_at = timezone.now() - timedelta(days=30)
+        for i in range(3):
+            Note.objects.create(
+                user=self.user,
+                title=f"note_{i}",
+                content=f'Content, with "quotes"\nand lines {i}.',
+                category=self.category if i else None,
+            )
+        Note.objects.update(created_at=self.created_at)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def call(self, name, *args):
+        management.call_command(
+            name, *args, stdout=StringIO(), stderr=StringIO()
+        )
+
+    def snapshot(self):
+        return list(
+            Note.objects.order_by("title").values_list(
+                "user__username",
+                "title",
+                "content",
+                "category__hex_value",
+                "created_at",
+            )
+        )
+
+    def test_round_trip(self):
+        expected = self.snapshot()
+        for name in ("notes.jsonl", "notes.csv"):
+            path = os.path.join(self.directory, name)
+            self.call("export_notes", path, "--chunk-size", "2")
+            Note.objects.all().delete()
+            self.call("import_notes", path, "--batch-size", "2")
+            self.assertEqual(self.snapshot(), expected)
+            self.assertFalse(os.path.exists(f"{path}.checkpoint"))
+
+    def test_import_creates_owners_and_categories(self):
+        path = os.path.join(self.directory, "notes.jsonl")
+        self.call("export_notes", path)
+        Note.objects.all().delete()
+        self.user.delete()
+        self.category.delete()
+        self.call("import_notes", path)
+        self.assertEqual(
+            Note.objects.filter(user__username="testuser").count(), 3
+        )
+        self.assertTrue(Category.objects.filter(hex_value="fbae3c").exists())
+        self.assertFalse(
+            User.objects.get(username="testuser").has_usable_password()
+        )
+
+    def test_export_resume(self):
+        path = os.path.join(self.directory, "notes.jsonl")
+        self.call("export_notes", path)
+        with open(path) as file:
+            complete = file.read()
+        first = complete.splitlines(keepends=True)[0]
+        # An export interrupted part way through writing its second note.
+        with open(path, "w") as file:
+            file.write(first + '{"id": ')
+        with open(f"{path}.checkpoint", "w") as file:
+            json.dump(
+                {
+                    "last_id": json.loads(first)["id"],
+                    "offset": len(first.encode()),
+                    "written": 1,
+                },
+                file,
+            )
+        self.call("export_notes", path, "--resume")
+        with open(path) as file:
+            self.assertEqual(file.read(), complete)
+
+    def test_import_resume(self):
+        path = os.path.join(self.directory, "notes.jsonl")
+        self.call("export_notes", path)
+        Note.objects.all().delete()
+        with open(f"{path}.checkpoint", "w") as file:
+            json.dump({"imported": 2}, file)
+        self.call("import_notes", path, "--resume")
+        self.assertEqual(
+            list(Note.objects.values_list("title", flat=True)), ["note_2"]
+        )
+
+
+# Unit Tests for Note Downloads (in archive.py)
+# ==============================================================================
+
+
+class ArchiveTests(TestCase):
+    """
+    Test class for the note_export view's archives.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    - django.contrib.auth.models.User: Django class for creating User objects,
+      typically attached to a set of 'sticky-notes'.
+    - models.Note: Note class represting a 'sticky-note'.
+    - models.Category: Category class representing a category the
+      'sticky-notes' are stored as (i.e. hex-value).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", password="pw")
+        category = Category.objects.create(name="orange", hex_value="fbae3c")
+        self.notes = [
+            Note.objects.create(
+                user=self.user,
+                title=f"Note {i}",
+                content=f"Content {i}.",
+                category=category,
+            )
+            for i in range(3)
+        ]
+        other = User.objects.create(username="other", password="pw")
+        Note.objects.create(user=other, title="Not mine", content="C")
+        self.client.force_login(self.user)
+
+    def download(self, **params):
+        response = self.client.get(reverse("note_export"), params)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_json_archive(self):
+        response, content = self.download()
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn(".jsonl.gz", response["Content-Disposition"])
+        lines = gzip.decompress(content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [row["title"] for row in rows], ["Note 0", "Note 1", "Note 2"]
+        )
+        self.assertEqual(rows[0]["category_hex"], "fbae3c")
+
+    def test_markdown_archive(self):
+        response, content = self.download(format="markdown")
+        self.assertEqual(response["Content-Type"], "application/zip")
+        with zipfile.ZipFile(BytesIO(content)) as archive:
+            names = archive.namelist()
+            self.assertEqual(len(names), 3)
+            self.assertIn(f"-{self.notes[1].pk}-note-1.md", names[1])
+            text = archive.read(names[1]).decode()
+        self.assertTrue(text.startswith("# Note 1\n\nContent 1."))
+        self.assertIn("Colour: orange (#fbae3c)", text)
+
+    def test_bad_format_and_not_logged_in(self):
+        response = self.client.get(reverse("note_export"), {"format": "pdf"})
+        self.assertEqual(response.status_code, 400)
+        self.client.logout()
+        response = self.client.get(reverse("note_export"))
+        self.assertRedirects(
+            response, reverse("login"), fetch_redirect_response=False
+        )
+
+
+# Unit Tests for Realtime Board Updates (in events.py)
+# ==============================================================================
+
+
+class EventTests(TestCase):
+    """
+    Test class for the note change events sent to open boards.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    - django.contrib.auth.models.User: Django class for creating User objects,
+      typically attached to a set of 'sticky-notes'.
+    - models.Note: Note class represting a 'sticky-note'.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username="testuser",
+            email="test@email.com",
+            password="thefancytestpassword",
+        )
+        self.broker = get_broker()
+        self.subscription = self.broker.subscribe(self.user.id)
+        self.addCleanup(self.broker.unsubscribe, self.subscription)
+
+    def test_note_changes_published(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            note = Note.objects.create(
+                user=self.user, title="unit_test", content="Test content."
+            )
+        event = self.subscription.get(0)
+        self.assertEqual(event["type"], "created")
+        self.assertIn(f'data-note-id="{note.pk}"', event["html"])
+        self.assertIn("unit_test", event["html"])
+        with self.captureOnCommitCallbacks(execute=True):
+            note.title = "changed_title"
+            note.save()
+        self.assertIn("changed_title", self.subscription.get(0)["html"])
+        pk = note.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            note.delete()
+        self.assertEqual(
+            self.subscription.get(0), {"type": "deleted", "id": pk}
+        )
+
+    def test_only_owner_receives_events(self):
+        other = User.objects.create(username="other", password="password")
+        with self.captureOnCommitCallbacks(execute=True):
+            Note.objects.create(user=other, title="T", content="C")
+        self.assertIsNone(self.subscription.get(0))
+
+    def test_rolled_back_changes_not_published(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            Note.objects.create(user=self.user, title="T", content="C")
+        self.assertIsNone(self.subscription.get(0))
+
+    @override_settings(NOTEY_EVENT_STREAM_TIMEOUT=0)
+    @override_settings(NOTEY_LIVE_BOARD=True)
+    def test_note_events_view(self):
+        url = reverse("note_events")
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(
+            b"".join(response.streaming_content), b"retry: 3000\n\n"
+        )
+
+    def test_live_board_off_by_default(self):
+        # Each open stream holds a WSGI worker, so without the async views
+        # the board does not open one.
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("note_list"))
+        self.assertNotContains(response, "data-events-url")
+        self.assertNotContains(response, "board.js")
+        response = self.client.get(reverse("note_events"))
+        self.assertEqual(response.status_code, 204)
+        with self.settings(NOTEY_LIVE_BOARD=True):
+            response = self.client.get(reverse("note_list"))
+            self.assertContains(response, "data-events-url")
+
+    async def test_async_subscription(self):
+        await sync_to_async(self.broker.publish)(self.user.id, {"type": "t"})
+        self.assertEqual(await self.subscription.aget(1), {"type": "t"})
+        self.assertIsNone(await self.subscription.aget(0.01))
+
+
+# Unit Tests for Request Metrics (in metrics.py and middleware.py)
+# ==============================================================================
+
+
+class MetricsTests(TestCase):
+    """
+    Test class for the request metrics and the metrics page.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    - django.contrib.auth.models.User: Django class for creating User objects,
+      typically attached to a set of 'sticky-notes'.
+    - models.Note: Note class represting a 'sticky-note'.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username="testuser",
+            email="test@email.com",
+            password="thefancytestpassword",
+        )
+        Note.objects.create(
+            user=self.user, title="unit_test", content="Test content."
+        )
+        self.client.force_login(self.user)
+        self.registry = Registry()
+        for module in ("notey.middleware", "notey.views"):
+            patcher = mock.patch(f"{module}.registry", self.registry)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.db")
+    def test_request_measured(self):
+        self.client.get(reverse("note_list"))
+        self.assertEqual(
+            self.registry.requests._series[("note_list", "GET", "200")], 1
+        )
+        _, count, total = self.registry.queries._series[("note_list",)]
+        self.assertEqual(count, 1)
+        self.assertGreater(total, 0)
+        # The session is read from the database, and timed on its own.
+        session = self.registry.query_duration._series[("note_list", "true")]
+        self.assertGreater(session[2], 0)
+        template = self.registry.template_duration._series[("note_list",)]
+        self.assertGreater(template[2], 0)
+
+    @override_settings(NOTEY_METRICS_IPS=["127.0.0.1"])
+    def test_metrics_page(self):
+        self.client.get(reverse("note_list"))
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response,
+            'notey_requests_total{view="note_list",method="GET",status="200"} 1',
+        )
+        self.assertContains(
+            response,
+            'notey_request_duration_seconds_bucket{view="note_list",le="+Inf"} 1',
+        )
+        with self.settings(NOTEY_METRICS_IPS=[]):
+            self.assertEqual(
+                self.client.get(reverse("metrics")).status_code, 403
+            )
+
+    def test_metrics_page_not_public_by_default(self):
+        # Requests passed on by a reverse proxy come from 127.0.0.1 too.
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="127.0.0.1")
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(NOTEY_SLOW_REQUEST_MS=0)
+    def test_slow_request_logged(self):
+        with self.assertLogs("notey.metrics", "WARNING") as logs:
+            self.client.get(reverse("note_list"))
+        self.assertIn("GET /notes", logs.output[0])
+        self.assertIn('FROM "notey_note"', logs.output[0])
+
+
+# Unit Tests for the Static Files Pipeline (in storage.py and middleware.py)
+# ==============================================================================
+
+
+class StaticPipelineTests(TestCase):
+    """
+    Test class for the hashed, minified and precompressed static files,
+    collected into a temporary STATIC_ROOT.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        storages = {
+            "staticfiles": {"BACKEND": "notey.storage.NoteyStaticStorage"}
+        }
+        pipeline = override_settings(
+            STATIC_ROOT=directory.name,
+            STORAGES=storages,
+            NOTEY_STATIC_PIPELINE=True,
+        )
+        pipeline.enable()
+        self.addCleanup(pipeline.disable)
+        self.root = directory.name
+        management.call_command(
+            "collectstatic",
+            interactive=False,
+            verbosity=0,
+            ignore_patterns=["admin"],
+        )
+        with open(os.path.join(self.root, "staticfiles.json")) as file:
+            self.manifest = json.load(file)["paths"]
+
+    def test_minify_css(self):
+        css = "/* Notes */\n.note {\n    color: red;\n    margin: 0 auto;\n}\n"
+        self.assertEqual(minify_css(css), ".note{color:red;margin:0 auto}")
+
+    def test_collectstatic(self):
+        hashed = self.manifest["notey/css/main.css"]
+        self.assertNotEqual(hashed, "notey/css/main.css")
+        with open(os.path.join(self.root, hashed), "rb") as file:
+            css = file.read()
+        self.assertNotIn(b"\n", css)
+        with gzip.open(os.path.join(self.root, hashed + ".gz")) as file:
+            self.assertEqual(file.read(), css)
+
+    def test_served_compressed(self):
+        hashed = self.manifest["notey/css/main.css"]
+        response = self.client.get(
+            f"/static/{hashed}", headers={"Accept-Encoding": "gzip, deflate"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertIn("immutable", response["Cache-Control"])
+        response = self.client.get("/static/notey/css/main.css")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertNotIn("immutable", response["Cache-Control"])
+        response = self.client.get(
+            f"/static/{hashed}",
+            headers={"If-Modified-Since": response["Last-Modified"]},
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_self_hosted_font(self):
+        # Without the font file, the system font is used, and no other
+        # website is asked for fonts.
+        response = self.client.get(reverse("index"))
+        self.assertNotContains(response, "fonts.googleapis.com")
+        self.assertNotContains(response, "@font-face")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        os.makedirs(os.path.join(directory.name, "notey/fonts"))
+        font = os.path.join(directory.name, "notey/fonts/outfit-latin.woff2")
+        with open(font, "wb") as file:
+            file.write(b"wOF2")
+        with self.settings(STATICFILES_DIRS=[directory.name]):
+            management.call_command(
+                "collectstatic",
+                interactive=False,
+                verbosity=0,
+                ignore_patterns=["admin"],
+            )
+            response = self.client.get(reverse("index"))
+        self.assertContains(response, 'rel="preload"')
+        self.assertContains(response, "font-display:swap")
+        self.assertContains(response, "outfit-latin.")
+        self.assertNotContains(response, "fonts.googleapis.com")
+
+    def test_index_images(self):
+        response = self.client.get(reverse("index"))
+        self.assertContains(
+            response,
+            f'src="/static/{self.manifest["notey/images/collage.png"]}"',
+        )
+
+
+# Unit Tests for the Database Profile (in database.py and settings.py)
+# ==============================================================================
+
+
+class DatabaseProfileTests(TestCase):
+    """
+    Test class for the database connection settings. Run the whole suite on
+    each profile, i.e. NOTEY_DB_ENGINE=postgresql python manage.py test.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    """
+
+    def test_persistent_connections(self):
+        self.assertGreater(connection.settings_dict["CONN_MAX_AGE"], 0)
+        self.assertTrue(connection.settings_dict["CONN_HEALTH_CHECKS"])
+
+    @skipUnless(connection.vendor == "sqlite", "Checks SQLite pragmas.")
+    def test_sqlite_pragmas(self):
+        from django.db.backends.sqlite3.base import DatabaseWrapper
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_dict = {
+            **connection.settings_dict,
+            "NAME": os.path.join(directory.name, "pragmas.sqlite3"),
+        }
+        new_connection = DatabaseWrapper(settings_dict, alias="pragmas")
+        self.addCleanup(new_connection.close)
+        with new_connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 20000)
+            cursor.execute("PRAGMA synchronous")
+            # 1 is NORMAL.
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    @skipUnless(connection.vendor == "postgresql", "Checks PostgreSQL.")
+    def test_postgresql_search_column(self):
+        with connection.cursor() as cursor:
+            columns = connection.introspection.get_table_description(
+                cursor, "notey_note"
+            )
+        self.assertIn("search_vector", [column.name for column in columns])
+
+
+# Unit Tests for the Async Views (in async_views.py)
+# ==============================================================================
+
+
+class AsyncURLConf:
+    # The site's URLs, with the async views in front of the sync ones.
+    urlpatterns = [path("", include(urls.async_urlpatterns + urls.urlpatterns))]
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncViewTests(TestCase):
+    """
+    Test class for the async versions of the note and category views, served
+    through Django's async test client.
+
+    Parameters:
+    - django.test.TestCase: Parent class this class inherits from.
+    - django.contrib.auth.models.User: Django class for creating User objects,
+      typically attached to a set of 'sticky-notes'.
+    - models.Note: Note class represting a 'sticky-note'.
+    - models.Category: Category class representing a category the
+      'sticky-notes' are stored as (i.e. hex-value).
+    """
+
+    def setUp(self):
+        caches["fragments"].clear()
+        self.user = User.objects.create(
+            username="testuser",
+            email="test@email.com",
+            password="thefancytestpassword",
+            is_superuser=True,
+        )
+        self.category = Category.objects.create(
+            name="orange", hex_value="fbae3c"
+        )
+        self.note = Note.objects.create(
+            user=self.user,
+            title="unit_test",
+            content="Test content.",
+            category=self.category,
+        )
+        self.async_client.force_login(self.user)
+
+    def test_async_views_selected(self):
+        match = self.client.get(reverse("note_list")).resolver_match
+        self.assertEqual(match.func.__module__, "notey.async_views")
+
+    async def test_note_list_view(self):
+        url = reverse("note_list")
+        response = await self.async_client.get(url)
+        self.assertContains(response, "unit_test")
+        self.assertContains(response, "#fbae3c")
+        not_modified = await self.async_client.get(
+            url, headers={"If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    async def test_note_detail_view(self):
+        response = await self.async_client.get(
+            reverse("note_detail", kwargs={"pk": self.note.pk})
+        )
+        self.assertContains(response, "Test content.")
+        response = await self.async_client.get(
+            reverse("note_detail", kwargs={"pk": self.note.pk + 1})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_note_create_update_and_delete(self):
+        response = await self.async_client.post(
+            reverse("note_create"),
+            data={"title": "Async", "content": "C", "category": ""},
+        )
+        self.assertRedirects(
+            response, reverse("note_list"), fetch_redirect_response=False
+        )
+        note = await Note.objects.aget(title="Async")
+        await self.async_client.post(
+            reverse("note_update", kwargs={"pk": note.pk}),
+            data={
+                "title": "Edited",
+                "content": "C",
+                "category": self.category.pk,
+            },
+        )
+        note = await Note.objects.select_related("category").aget(pk=note.pk)
+        self.assertEqual(note.title, "Edited")
+        self.assertEqual(note.category, self.category)
+        await self.async_client.post(
+            reverse("note_delete", kwargs={"pk": note.pk})
+        )
+        self.assertFalse(await Note.objects.filter(pk=note.pk).aexists())
+
+    async def test_category_views(self):
+        response = await self.async_client.get(reverse("category_list"))
+        self.assertContains(response, "orange")
+        await self.async_client.post(
+            reverse("category_create"),
+            data={"name": "pink", "hex_value": "eb6092"},
+        )
+        category = await Category.objects.aget(name="pink")
+        await self.async_client.post(
+            reverse("category_delete", kwargs={"pk": category.pk})
+        )
+        self.assertFalse(await Category.objects.filter(name="pink").aexists())
+
+    async def test_note_export(self):
+        response = await self.async_client.get(reverse("note_export"))
+        content = b"".join([part async for part in response.streaming_content])
+        rows = gzip.decompress(content).decode().splitlines()
+        self.assertEqual(json.loads(rows[0])["title"], "unit_test")
+
+    async def test_not_logged_in(self):
+        self.async_client.cookies.clear()
+        response = await self.async_client.get(reverse("note_list"))
+        self.assertRedirects(
+            response, reverse("login"), fetch_redirect_response=False
+        )
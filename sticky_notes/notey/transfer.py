@@ -0,0 +1,291 @@
+"""
+Streaming export and import of 'sticky-notes', as JSON Lines or CSV (see the
+export_notes and import_notes commands).
+
+Each note is written with its owner's username and its category's name and
+colour, rather than their ids, so a board can be moved to a database where
+the ids differ. Notes are read a chunk at a time and written in bulk_create
+batches, so millions of notes move in constant memory.
+
+Both commands save a checkpoint after each chunk, so an interrupted run can
+be resumed where it stopped with --resume.
+"""
+
+import csv
+import json
+import os
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from .changes import stamp_notes
+from .models import Category, Note
+from .signals import notes_bulk_saved
+
+FIELDS = (
+    "id",
+    "owner",
+    "title",
+    "content",
+    "category",
+    "category_hex",
+    "created_at",
+    "updated_at",
+)
+
+FORMATS = ("jsonl", "csv")
+
+
+class TransferError(Exception):
+    pass
+
+
+def guess_format(path):
+    """
+    :param path: File name.
+    :return: 'csv' for .csv files, otherwise 'jsonl'.
+    """
+
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+EXPORT_FIELDS = (
+    "pk",
+    "user__username",
+    "title",
+    "content",
+    "category__name",
+    "category__hex_value",
+    "created_at",
+    "updated_at",
+)
+
+
+def export_row(values):
+    row = dict(zip(FIELDS, (values[field] for field in EXPORT_FIELDS)))
+    row["created_at"] = row["created_at"].isoformat()
+    row["updated_at"] = row["updated_at"].isoformat()
+    return row
+
+
+def export_rows(queryset, after_id=0, chunk_size=2000):
+    """
+    Reads the notes through iterator(), which uses a server-side cursor
+    where the database has them, so only a chunk is in memory at a time.
+
+    :param queryset: Note QuerySet to export.
+    :param after_id: Only export the notes with a greater id (resuming).
+    :param chunk_size: Number of notes fetched from the database at a time.
+    :return: Generator of dictionaries with the FIELDS keys, in id order.
+    """
+
+    rows = (
+        queryset.filter(pk__gt=after_id)
+        .order_by("pk")
+        .values(*EXPORT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    for values in rows:
+        yield export_row(values)
+
+
+async def aexport_rows(queryset, chunk_size=2000):
+    """
+    Async version of export_rows, for the async views.
+    """
+
+    # values() rather than values_list(), whose aiterator() queries from
+    # the event loop in Django 4.2.
+    rows = (
+        queryset.order_by("pk")
+        .values(*EXPORT_FIELDS)
+        .aiterator(chunk_size=chunk_size)
+    )
+    async for values in rows:
+        yield export_row(values)
+
+
+class JsonLinesWriter:
+    def __init__(self, file):
+        self.file = file
+
+    def write_header(self):
+        pass
+
+    def write(self, row):
+        self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+class CsvWriter:
+    def __init__(self, file):
+        self.file = file
+        self.writer = csv.DictWriter(file, fieldnames=FIELDS)
+
+    def write_header(self):
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(
+            {key: "" if value is None else value for key, value in row.items()}
+        )
+
+
+WRITERS = {"jsonl": JsonLinesWriter, "csv": CsvWriter}
+
+
+def read_rows(file, format):
+    """
+    :param file: Text file opened for reading.
+    :param format: 'jsonl' or 'csv'.
+    :return: Generator of row dictionaries, one per note.
+    """
+
+    if format == "csv":
+        for row in csv.DictReader(file):
+            yield {key: value or None for key, value in row.items()}
+    else:
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                raise TransferError(f"Line {number} is not valid JSON.")
+
+
+class Checkpoint:
+    """
+    Progress of an export or import, saved next to the file being written
+    or read, so an interrupted run can be resumed.
+
+    Fields:
+    - path: Path of the checkpoint file.
+    - state: Dictionary of the saved progress.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+
+    def load(self):
+        try:
+            with open(self.path) as file:
+                self.state = json.load(file)
+        except FileNotFoundError:
+            self.state = {}
+        return self.state
+
+    def save(self, **state):
+        # Written to a temporary file first, so a crash mid-write cannot
+        # leave a broken checkpoint behind.
+        self.state = state
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as file:
+            json.dump(state, file)
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class NoteImporter:
+    """
+    Writes imported notes in batches, creating the owners and categories
+    they name as needed.
+
+    Owners are matched by username, and created (unable to log in) if
+    missing. Categories are matched by name and colour. Both are remembered
+    for the rest of the import, so each is looked up once.
+    """
+
+    def __init__(self, owner=None):
+        """
+        :param owner: User to give every note to, instead of the owners in
+        the file.
+        """
+
+        self.owner = owner
+        self.users = {}
+        self.categories = {}
+
+    def import_batch(self, rows):
+        """
+        :param rows: List of row dictionaries.
+        :return: List of the created Note objects.
+        """
+
+        with transaction.atomic():
+            user_ids = self.get_user_ids(rows)
+            categories = self.get_categories(rows)
+            notes = []
+            for row in rows:
+                if not row.get("title") or row.get("content") is None:
+                    raise TransferError(
+                        f"Note {row.get('id')} needs a title and content."
+                    )
+                created_at = parse_datetime(row.get("created_at") or "")
+                updated_at = parse_datetime(row.get("updated_at") or "")
+                notes.append(
+                    Note(
+                        user_id=user_ids.get(row.get("owner")),
+                        title=row["title"][:255],
+                        content=row["content"],
+                        category=categories.get(
+                            (row.get("category"), row.get("category_hex"))
+                        ),
+                        created_at=created_at,
+                        updated_at=updated_at or created_at,
+                    )
+                )
+            # bulk_create stamps the notes with the current time (auto_now),
+            # so the exported times are put back afterwards.
+            timestamps = [(n.created_at, n.updated_at) for n in notes]
+            stamp_notes(notes)
+            Note.objects.bulk_create(notes)
+            dated = []
+            for note, (created_at, updated_at) in zip(notes, timestamps):
+                if created_at:
+                    note.created_at = created_at
+                    note.updated_at = updated_at
+                    dated.append(note)
+            Note.objects.bulk_update(dated, ["created_at", "updated_at"])
+            notes_bulk_saved.send(sender=Note, notes=notes, created=True)
+        return notes
+
+    def get_user_ids(self, rows):
+        if self.owner is not None:
+            return {row.get("owner"): self.owner.pk for row in rows}
+        names = {row.get("owner") for row in rows} - set(self.users)
+        names.discard(None)
+        if names:
+            self.users.update(
+                User.objects.filter(username__in=names).values_list(
+                    "username", "pk"
+                )
+            )
+            missing = names - set(self.users)
+            if missing:
+                password = make_password(None)
+                User.objects.bulk_create(
+                    User(username=name, password=password) for name in missing
+                )
+                self.users.update(
+                    User.objects.filter(username__in=missing).values_list(
+                        "username", "pk"
+                    )
+                )
+        return self.users
+
+    def get_categories(self, rows):
+        for row in rows:
+            key = (row.get("category"), row.get("category_hex"))
+            if key in self.categories or not all(key):
+                continue
+            name, hex_value = key
+            self.categories[key] = Category.objects.filter(
+                name=name, hex_value=hex_value
+            ).first() or Category.objects.create(name=name, hex_value=hex_value)
+        return self.categories
@@ -1,4 +1,7 @@
+from django.conf import settings
 from django.urls import path
+
+from . import async_views
 from .views import (
     # Home/Index Section
     index,
@@ -9,6 +12,9 @@ from .views import (
     user_delete,
     # 'Sticky-Note' Section
     note_list,
+    note_search,
+    note_events,
+    note_export,
     note_detail,
     note_create,
     note_update,
@@ -17,7 +23,10 @@ from .views import (
     category_list,
     category_create,
     category_delete,
+    # Metrics Section
+    metrics,
 )
+from .api import api_changes, api_notes
 
 urlpatterns = [
     # Home/Index Section
@@ -29,6 +38,9 @@ urlpatterns = [
     path("user/delete/", user_delete, name="user_delete"),
     # 'Sticky-Note' Section
     path("notes", note_list, name="note_list"),
+    path("notes/search", note_search, name="note_search"),
+    path("notes/events", note_events, name="note_events"),
+    path("notes/export", note_export, name="note_export"),
     path("note/<int:pk>/", note_detail, name="note_detail"),
     path("note/new/", note_create, name="note_create"),
     path("note/<int:pk>/edit/", note_update, name="note_update"),
@@ -37,4 +49,34 @@ urlpatterns = [
     path("categories", category_list, name="category_list"),
     path("category/new/", category_create, name="category_create"),
     path("category/<int:pk>/delete/", category_delete, name="category_delete"),
+    # JSON API Section
+    path("api/notes", api_notes, name="api_notes"),
+    path("api/changes", api_changes, name="api_changes"),
+    # Metrics Section
+    path("metrics", metrics, name="metrics"),
+]
+
+# The async versions of the 'sticky-note' and category views, used in place of
+# the views above when NOTEY_ASYNC_VIEWS is set (see notey/async_views.py).
+async_urlpatterns = [
+    # 'Sticky-Note' Section
+    path("notes", async_views.note_list, name="note_list"),
+    path("notes/search", async_views.note_search, name="note_search"),
+    path("notes/events", async_views.note_events, name="note_events"),
+    path("notes/export", async_views.note_export, name="note_export"),
+    path("note/<int:pk>/", async_views.note_detail, name="note_detail"),
+    path("note/new/", async_views.note_create, name="note_create"),
+    path("note/<int:pk>/edit/", async_views.note_update, name="note_update"),
+    path("note/<int:pk>/delete/", async_views.note_delete, name="note_delete"),
+    # Category Section
+    path("categories", async_views.category_list, name="category_list"),
+    path("category/new/", async_views.category_create, name="category_create"),
+    path(
+        "category/<int:pk>/delete/",
+        async_views.category_delete,
+        name="category_delete",
+    ),
 ]
+
+if settings.NOTEY_ASYNC_VIEWS:
+    urlpatterns = async_urlpatterns + urlpatterns
@@ -1,10 +1,90 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.conf import settings
+from django.utils import timezone
+from django.http import HttpResponse, StreamingHttpResponse
 from django.contrib.auth.forms import AuthenticationForm
-from django.contrib.auth import login, logout, authenticate
+from django.contrib.auth import login, logout
 from django.contrib import messages
-from django.core import management
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from .models import Note, Category
 from .forms import UserRegisterForm, NoteForm, CategoryForm
+from .archive import ARCHIVES, stream_archive
+from .counters import get_board_categories
+from .events import stream_events
+from .jobs import get_category_deletions, retire_category, retire_user
+from .metrics import registry
+from .conditional import (
+    get_board_state,
+    get_board_version,
+    note_detail_etag,
+    note_detail_last_modified,
+    note_list_etag,
+    note_list_last_modified,
+)
+from .pagination import KeysetPage, get_page_size
+from .palette import get_category, get_palette
+from .search import search_note_ids
+from .sessions import end_user_sessions
+from .transfer import export_rows
+
+# The columns the 'sticky-note' templates read. Anything else (i.e. the owner)
+# is left in the database, and the category is joined in the same query
+# rather than fetched once per note.
+NOTE_LIST_FIELDS = (
+    "title",
+    "content",
+    "created_at",
+    "updated_at",
+    "category__hex_value",
+)
+NOTE_DETAIL_FIELDS = ("title", "content", "created_at")
+# The columns the edit form reads and may change.
+NOTE_EDIT_FIELDS = ("user", "title", "content", "category", "version")
+
+
+def get_version(request, note):
+    """
+    :param request: HTTP request object.
+    :param note: Note object being edited.
+    :return: The version of the note the form was filled in from (its
+    'version' field), or the note's current version if it was not sent.
+    """
+
+    try:
+        return int(request.POST["version"])
+    except (KeyError, ValueError):
+        return note.version
+
+
+def note_conflict(request, note_id, data):
+    """
+    Shows the edit form again, filled in with the user's changes, when the
+    note was changed elsewhere (i.e. on another device) after the form was
+    opened. Saving again overwrites the other change.
+
+    :param request: HTTP request object.
+    :param note_id: Primary key of the note.
+    :param data: The submitted form data.
+    :return: Rendered template, with a '409 Conflict' status.
+    """
+
+    note = get_object_or_404(
+        Note.objects.only(*NOTE_EDIT_FIELDS),
+        pk=note_id,
+        user_id=request.user.id,
+    )
+    messages.error(
+        request,
+        "This note was changed elsewhere since you opened it. Save again to "
+        "replace it with your changes.",
+    )
+    context = {
+        "form": NoteForm(data, instance=note),
+        "page_title": "Create Note",
+        "note_id": note.id,
+    }
+    return render(request, "notey/note_form.html", context, status=409)
 
 
 def index(request):
@@ -47,16 +127,15 @@ def user_login(request):
 
     if request.method == "POST":
         form = AuthenticationForm(request, data=request.POST)
+        # is_valid() authenticates the user (hashing the password), so the
+        # user is taken from the form rather than authenticated again.
         if form.is_valid():
-            username = form.cleaned_data.get("username")
-            password = form.cleaned_data.get("password")
-            user = authenticate(username=username, password=password)
-            if user is not None:
-                login(request, user)
-                messages.info(request, f"You are now logged in as {username}.")
-                return redirect("note_list")
-            else:
-                messages.error(request, "Invalid username or password.")
+            user = form.get_user()
+            login(request, user)
+            messages.info(
+                request, f"You are now logged in as {user.get_username()}."
+            )
+            return redirect("note_list")
         else:
             messages.error(request, "Invalid username or password.")
     form = AuthenticationForm()
@@ -80,33 +159,57 @@ def user_delete(request):
     """
     View for a user to delete their account.
 
+    The user is deactivated straight away, and their notes deleted in the
+    background (see jobs.py), so the page does not wait on a big delete.
+
     :param request: HTTP request object.
     :return: Rendered template of account deleted page.
     """
 
     if request.user.is_authenticated:
-        request.user.delete()
-        # This clears the session cache for the user, help reduce weirdness in
-        # the browser with out-of-date session data.
-        management.call_command("clearsessions")
+        user = request.user
+        # Ends this session and the user's sessions on other devices, to
+        # help reduce weirdness in the browser with out-of-date session data.
+        # Other users' (expired) sessions are left to purge_sessions.
+        logout(request)
+        end_user_sessions(user)
+        retire_user(user)
         return render(request, "notey/user_delete.html")
     else:
         messages.error(request, "You are not logged in.")
         return redirect("login")
 
 
+# The browser has to check back every time (no-cache), but gets a 304 answer
+# when the notes have not changed (see conditional.py).
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=note_list_etag, last_modified_func=note_list_last_modified)
 def note_list(request):
     """
     View to display a list of 'sticky-notes'.
 
+    The notes are shown a page at a time, oldest first. The 'after' query
+    parameter holds the cursor of the page to show (see pagination.py).
+
     :param request: HTTP reqeust object.
     :return: Rendered template, contains a list of 'sticky-notes'.
     """
 
     if request.user.is_authenticated:
-        notes = Note.objects.filter(user_id=request.user.id)
+        page = KeysetPage(
+            Note.objects.filter(user_id=request.user.id)
+            .select_related("category")
+            .only(*NOTE_LIST_FIELDS),
+            cursor=request.GET.get("after"),
+            page_size=get_page_size(request),
+            total=get_board_state(request)["count"],
+        )
         context = {
-            "notes": notes,
+            "notes": page,
+            "page": page,
+            # Called by the template only when the cached board is stale.
+            "board_categories": lambda: get_board_categories(request.user.id),
+            "board_version": get_board_version(request),
             "page_title": "Your Notes",
             "user": f"{request.user.first_name} {request.user.last_name}",
         }
@@ -116,6 +219,117 @@ def note_list(request):
         return redirect("login")
 
 
+def note_search(request):
+    """
+    View to search the user's 'sticky-notes', best matches first.
+
+    The 'q' query parameter holds the search and 'page' the page of results
+    (see search.py for the search index).
+
+    :param request: HTTP reqeust object.
+    :return: Rendered template, contains a list of matching 'sticky-notes'.
+    """
+
+    if request.user.is_authenticated:
+        query = request.GET.get("q", "").strip()
+        page_size = get_page_size(request)
+        try:
+            page_number = max(1, int(request.GET.get("page", 1)))
+        except ValueError:
+            page_number = 1
+        # One extra match is fetched to find out if there is another page.
+        ids = search_note_ids(
+            request.user.id,
+            query,
+            offset=(page_number - 1) * page_size,
+            limit=page_size + 1,
+        )
+        notes = (
+            Note.objects.select_related("category")
+            .only(*NOTE_LIST_FIELDS)
+            .in_bulk(ids[:page_size])
+        )
+        context = {
+            "notes": [notes[pk] for pk in ids[:page_size] if pk in notes],
+            "query": query,
+            "page_number": page_number,
+            "has_previous": page_number > 1,
+            "has_next": len(ids) > page_size,
+            "page_title": "Search",
+            "user": f"{request.user.first_name} {request.user.last_name}",
+        }
+        return render(request, "notey/note_search.html", context)
+    else:
+        messages.error(request, "You are not logged in.")
+        return redirect("login")
+
+
+def note_export(request):
+    """
+    View downloading all of the user's 'sticky-notes' as a compressed
+    archive, streamed as it is made (see archive.py).
+
+    The 'format' query parameter picks the archive: 'json' (the default) for
+    gzipped JSON Lines, or 'markdown' for a zip of Markdown files.
+
+    :param request: HTTP request object.
+    :return: Streaming response of the archive.
+    """
+
+    if request.user.is_authenticated:
+        archive = get_archive(request)
+        if archive is None:
+            return HttpResponse("Unknown export format.", status=400)
+        rows = export_rows(Note.objects.filter(user_id=request.user.id))
+        return archive_response(archive, stream_archive(archive, rows))
+    else:
+        messages.error(request, "You are not logged in.")
+        return redirect("login")
+
+
+def get_archive(request):
+    archive_class = ARCHIVES.get(request.GET.get("format", "json"))
+    return archive_class() if archive_class else None
+
+
+def archive_response(archive, content):
+    response = StreamingHttpResponse(content, content_type=archive.content_type)
+    filename = f"sticky-notes-{timezone.now():%Y-%m-%d}.{archive.extension}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def note_events(request):
+    """
+    View streaming changes to the user's 'sticky-notes' as Server-Sent
+    Events, so an open board can patch itself (see events.py).
+
+    :param request: HTTP request object.
+    :return: Streaming response of text/event-stream events, 401 if the user
+    is not logged in, or 204 if NOTEY_LIVE_BOARD is off (which stops the
+    browser reconnecting).
+    """
+
+    if not getattr(settings, "NOTEY_LIVE_BOARD", False):
+        return HttpResponse(status=204)
+    if request.user.is_authenticated:
+        return event_stream_response(stream_events(request.user.id))
+    else:
+        return HttpResponse("You are not logged in.", status=401)
+
+
+def event_stream_response(events):
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stops proxies (i.e. Nginx) from holding the events back in a buffer.
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@cache_control(private=True, no_cache=True)
+@condition(
+    etag_func=note_detail_etag, last_modified_func=note_detail_last_modified
+)
 def note_detail(request, pk):
     """
     View to display the details of the 'sticky-note'.
@@ -127,7 +341,9 @@ def note_detail(request, pk):
 
     if request.user.is_authenticated:
         context = {
-            "note": get_object_or_404(Note, pk=pk),
+            "note": get_object_or_404(
+                Note.objects.only(*NOTE_DETAIL_FIELDS), pk=pk
+            ),
             "page_title": "Note Detail",
         }
         return render(request, "notey/note_detail.html", context)
@@ -164,6 +380,10 @@ def note_create(request):
 def note_update(request, pk):
     """View to update an existing 'sticky-note'.
 
+    Only the changed fields are written, in one UPDATE made on the condition
+    that the note has not been changed since the form was opened (see
+    Note.save_changes), otherwise the user is asked to save again.
+
     :param request: HTTP request object.
     :param pk: Primary key of the 'sticky-note' (i.e. Note object) to be
     updated.
@@ -171,19 +391,25 @@ def note_update(request, pk):
     """
 
     if request.user.is_authenticated:
-        note = get_object_or_404(Note, pk=pk)
-        form = NoteForm(request.POST, instance=note)
-        if form.is_valid():
-            note = form.save(commit=False)
-            note.user = request.user
-            note.save()
-            return redirect("note_list")
+        note = get_object_or_404(
+            Note.objects.only(*NOTE_EDIT_FIELDS),
+            pk=pk,
+            user_id=request.user.id,
+        )
+        if request.method == "POST":
+            version = get_version(request, note)
+            form = NoteForm(request.POST, instance=note)
+            if form.is_valid():
+                if not note.save_changes(form.changed_data, version):
+                    return note_conflict(request, pk, request.POST)
+                return redirect("note_list")
         else:
-            context = {
-                "form": NoteForm(instance=note),
-                "page_title": "Create Note",
-                "note_id": note.id,
-            }
+            form = NoteForm(instance=note)
+        context = {
+            "form": form,
+            "page_title": "Create Note",
+            "note_id": note.id,
+        }
         return render(request, "notey/note_form.html", context)
     else:
         messages.error(request, "You are not logged in.")
@@ -217,9 +443,9 @@ def category_list(request):
     """
 
     if request.user.is_superuser:
-        categories = Category.objects.all()
         context = {
-            "categories": categories,
+            "categories": get_palette(),
+            "deletions": get_category_deletions(),
             "page_title": "Categories",
             "form": CategoryForm(),
         }
@@ -262,15 +488,28 @@ def category_delete(request, pk):
     """
     View to delete an existing 'sticky-note' category.
 
+    A category in use is retired, and its notes deleted (or moved to the
+    category in the 'reassign_to' field) in the background, see jobs.py.
+
     :param request: HTTP request object.
     :param pk: Primary key of the category to be deleted.
     :return: Redirect to the category list after deletion.
     """
 
     if request.user.is_superuser:
-        category = get_object_or_404(Category, pk=pk)
-        category.delete()
-        messages.success(request, "Category deleted.")
+        category = get_object_or_404(Category, pk=pk, retired=False)
+        reassign_to = get_category(request.POST.get("reassign_to"))
+        if reassign_to == category:
+            reassign_to = None
+        job = retire_category(category, reassign_to)
+        if job:
+            messages.success(
+                request,
+                "Category deleted. Its notes are being "
+                f"{'moved' if reassign_to else 'deleted'} in the background.",
+            )
+        else:
+            messages.success(request, "Category deleted.")
         return redirect("/categories")
     else:
         if request.user.is_authenticated:
@@ -279,3 +518,26 @@ def category_delete(request, pk):
         else:
             messages.error(request, "You are not logged in.")
         return redirect("login")
+
+
+def metrics(request):
+    """
+    View showing the request metrics (see metrics.py), in the Prometheus
+    text format. Only for superusers and the addresses in NOTEY_METRICS_IPS
+    (i.e. the Prometheus server).
+
+    :param request: HTTP request object.
+    :return: Plain text response, or 403 for anyone else.
+    """
+
+    if (
+        request.META.get("REMOTE_ADDR")
+        in getattr(settings, "NOTEY_METRICS_IPS", [])
+        or request.user.is_superuser
+    ):
+        return HttpResponse(
+            registry.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+    else:
+        return HttpResponse("You are not authorised to view that.", status=403)
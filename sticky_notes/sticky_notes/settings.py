@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,11 +46,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Added after project generation and 'notey' app created. First, so it
+    # times the rest of the middleware too (see notey/middleware.py).
+    "notey.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    # Serves the collected static files when NOTEY_STATIC_PIPELINE is on.
+    "notey.middleware.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Follows session keys cycled by a request (see notey/middleware.py).
+    "notey.middleware.SessionKeyMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -57,7 +66,8 @@ ROOT_URLCONF = "sticky_notes.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # The Django backend, timing template rendering (see notey/metrics.py).
+        "BACKEND": "notey.metrics.InstrumentedDjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -66,6 +76,9 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                # Added after project generation and 'notey' app created.
+                "notey.context_processors.fragment_cache",
+                "notey.context_processors.live_board",
             ],
         },
     },
@@ -77,13 +90,153 @@ WSGI_APPLICATION = "sticky_notes.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# Pick the database with the NOTEY_DB_ENGINE environment variable: 'sqlite'
+# (default) or 'postgresql' (needs the psycopg package), with NOTEY_DB_NAME,
+# NOTEY_DB_USER, NOTEY_DB_PASSWORD, NOTEY_DB_HOST and NOTEY_DB_PORT giving
+# the PostgreSQL server. Added after project generation and 'notey' app
+# created.
+
+DB_ENGINE = os.environ.get("NOTEY_DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("NOTEY_DB_NAME", "sticky_notes"),
+            "USER": os.environ.get("NOTEY_DB_USER", ""),
+            "PASSWORD": os.environ.get("NOTEY_DB_PASSWORD", ""),
+            "HOST": os.environ.get("NOTEY_DB_HOST", ""),
+            "PORT": os.environ.get("NOTEY_DB_PORT", ""),
+            # Keeps each worker's connection open between requests (seconds),
+            # checking it still works before reusing it.
+            "CONN_MAX_AGE": int(os.environ.get("NOTEY_DB_CONN_MAX_AGE", 60)),
+            "CONN_HEALTH_CHECKS": True,
+            # Behind PgBouncer in transaction pooling mode, server-side
+            # cursors (used by iterator()) cannot outlive a transaction.
+            "DISABLE_SERVER_SIDE_CURSORS": (
+                os.environ.get("NOTEY_DB_PGBOUNCER", "") == "1"
+            ),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("NOTEY_DB_NAME", BASE_DIR / "db.sqlite3"),
+            "CONN_MAX_AGE": int(os.environ.get("NOTEY_DB_CONN_MAX_AGE", 60)),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                # Seconds a write waits for another writer to finish.
+                "timeout": 20,
+            },
+        }
     }
+
+# Set on every new SQLite connection (see notey/database.py): write-ahead
+# logging lets pages be read while a note is being saved.
+
+NOTEY_SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": 20000,
+    "cache_size": -20000,
+    "temp_store": "memory",
+    "mmap_size": 134217728,
+}
+
+
+# Caches
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# The 'fragments' cache holds rendered parts of the 'sticky-note' board (see
+# notey/templates/notey/note_list.html). Pick its backend with the
+# NOTEY_FRAGMENT_CACHE environment variable: 'locmem' (default), 'file' or
+# 'redis', with NOTEY_FRAGMENT_CACHE_LOCATION giving the directory or the
+# redis:// URL.
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+
+FRAGMENT_CACHE_LOCATIONS = {
+    "locmem": "notey-fragments",
+    "file": str(BASE_DIR / "fragment_cache"),
+    "redis": "redis://127.0.0.1:6379/1",
+}
+
+FRAGMENT_CACHE = os.environ.get("NOTEY_FRAGMENT_CACHE", "locmem")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "fragments": {
+        "BACKEND": CACHE_BACKENDS[FRAGMENT_CACHE],
+        "LOCATION": os.environ.get(
+            "NOTEY_FRAGMENT_CACHE_LOCATION",
+            FRAGMENT_CACHE_LOCATIONS[FRAGMENT_CACHE],
+        ),
+    },
+}
+
+if FRAGMENT_CACHE != "redis":
+    CACHES["fragments"]["OPTIONS"] = {"MAX_ENTRIES": 10000}
+
+# The 'sessions' cache holds sessions (with the cached_db engine below) and
+# logged in users (see notey/backends.py). It must be shared by every
+# process serving the site, or a logout in one would go unseen by the
+# others, so it defaults to files in the project's session_cache directory,
+# which only works when the site runs on a single host. The entries are
+# pickled, so the directory is created readable by the site's account only
+# (never under /tmp, where another account could read or plant entries).
+# The test runner keeps its own cache in memory. Pick another backend with
+# NOTEY_SESSION_CACHE: 'file', 'redis' (for several servers) or 'locmem' (a
+# single process), and NOTEY_SESSION_CACHE_LOCATION.
+#
+# Each active user takes two entries (their session and their user), and
+# the file and memory backends clear out a third of their entries whenever
+# they are full, so they are sized for NOTEY_SESSION_CACHE_ENTRIES entries
+# (by default room for 25,000 active users) rather than Django's 300. The
+# file backend still lists its directory on every write, so busy sites are
+# better served by 'redis'.
+
+SESSION_CACHE_LOCATIONS = {
+    "locmem": "notey-sessions",
+    "file": str(BASE_DIR / "session_cache"),
+    "redis": "redis://127.0.0.1:6379/2",
+}
+
+TESTING = sys.argv[1:2] == ["test"]
+
+SESSION_CACHE = os.environ.get(
+    "NOTEY_SESSION_CACHE", "locmem" if TESTING else "file"
+)
+
+CACHES["sessions"] = {
+    "BACKEND": CACHE_BACKENDS[SESSION_CACHE],
+    "LOCATION": os.environ.get(
+        "NOTEY_SESSION_CACHE_LOCATION", SESSION_CACHE_LOCATIONS[SESSION_CACHE]
+    ),
 }
 
+if SESSION_CACHE == "file":
+    os.makedirs(CACHES["sessions"]["LOCATION"], mode=0o700, exist_ok=True)
+    os.chmod(CACHES["sessions"]["LOCATION"], 0o700)
+
+if SESSION_CACHE != "redis":
+    CACHES["sessions"]["OPTIONS"] = {
+        "MAX_ENTRIES": int(
+            os.environ.get("NOTEY_SESSION_CACHE_ENTRIES", "50000")
+        )
+    }
+
+# Seconds a rendered fragment is kept. Fragments are keyed by what they show
+# (i.e. a note's last change), so an edit never serves an old fragment.
+
+NOTEY_FRAGMENT_CACHE_TIMEOUT = 3600
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -104,6 +257,28 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing (see notey/hashers.py). The first hasher hashes new
+# passwords; the others verify passwords hashed before, which are rehashed
+# with the first the next time their user logs in.
+
+PASSWORD_HASHERS = [
+    "notey.hashers.TunablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+# PBKDF2 iterations per password hash, None for Django's default. Run the
+# tune_password_hasher command to pick a value for the server.
+
+NOTEY_PASSWORD_ITERATIONS = (
+    int(os.environ["NOTEY_PASSWORD_ITERATIONS"])
+    if os.environ.get("NOTEY_PASSWORD_ITERATIONS")
+    else None
+)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -130,8 +305,133 @@ STATICFILES_DIRS = [
 # Added after project generation and 'notey' app created.
 STATIC_ROOT = BASE_DIR / "static"
 
+# Hashed, minified and precompressed static files, with WebP copies of the
+# images, written by collectstatic and served with far-future cache headers
+# (see notey/storage.py and notey/middleware.py). Set the
+# NOTEY_STATIC_PIPELINE environment variable to 1, then run collectstatic.
+
+NOTEY_STATIC_PIPELINE = os.environ.get("NOTEY_STATIC_PIPELINE", "") == "1"
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": (
+            "notey.storage.NoteyStaticStorage"
+            if NOTEY_STATIC_PIPELINE
+            else "django.contrib.staticfiles.storage.StaticFilesStorage"
+        ),
+    },
+}
+
+# Widths, in pixels, of the WebP copies of the images.
+
+NOTEY_IMAGE_WIDTHS = (400, 800, 1600)
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+
+# 'Sticky-note' dashboard pagination (see notey/pagination.py).
+# Added after project generation and 'notey' app created.
+
+NOTEY_PAGE_SIZE = 50
+
+NOTEY_MAX_PAGE_SIZE = 200
+
+# Cache alias holding the 'sticky-note' category palette (see
+# notey/palette.py). It must be shared by every process serving the site, or
+# a category added through one would be missing from the others' forms, so
+# it defaults to the 'sessions' cache. None keeps the palette in each
+# process's memory, only for a single process.
+
+NOTEY_PALETTE_CACHE = "sessions"
+
+# The most notes the JSON API (notey/api.py) accepts in one request.
+
+NOTEY_API_MAX_BATCH = 500
+
+# Serve the 'sticky-note' and category pages with the async views in
+# notey/async_views.py, for deployments running under an ASGI server (see
+# asgi.py). Set the NOTEY_ASYNC_VIEWS environment variable to 1 to enable.
+
+NOTEY_ASYNC_VIEWS = os.environ.get("NOTEY_ASYNC_VIEWS", "") == "1"
+
+# Realtime board updates (see notey/events.py): the class passing events
+# between processes, and how long, in seconds, an event stream stays open
+# before the browser reconnects.
+
+NOTEY_EVENT_BROKER = "notey.events.LocalBroker"
+
+NOTEY_EVENT_STREAM_TIMEOUT = 300
+
+# Whether open boards get realtime updates at all. Every open board keeps an
+# event stream open, which under a WSGI server holds a worker thread for as
+# long as the tab is open, so it is only on by default with the async views.
+# Set the NOTEY_LIVE_BOARD environment variable to 1 or 0 to choose.
+
+NOTEY_LIVE_BOARD = (
+    os.environ.get("NOTEY_LIVE_BOARD", "1" if NOTEY_ASYNC_VIEWS else "0") == "1"
+)
+
+# Requests slower than this, in milliseconds, are logged with their queries
+# (see notey/middleware.py). None turns the log off.
+
+NOTEY_SLOW_REQUEST_MS = 500
+
+# Addresses allowed to read the /metrics page without logging in, i.e. the
+# Prometheus server, as a comma separated NOTEY_METRICS_IPS environment
+# variable. Empty by default: behind a reverse proxy on the same host, every
+# request comes from 127.0.0.1, so trusting it would make the page public.
+
+NOTEY_METRICS_IPS = [
+    address.strip()
+    for address in os.environ.get("NOTEY_METRICS_IPS", "").split(",")
+    if address.strip()
+]
+
+# Sessions
+# https://docs.djangoproject.com/en/4.2/topics/http/sessions/
+
+# Pick where sessions are kept with NOTEY_SESSION_ENGINE: 'cached_db'
+# (default, read from the 'sessions' cache and written through to the
+# database), 'db' (the database only) or 'signed_cookies' (in the browser,
+# so a session cannot be ended from the server before it expires).
+
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+
+SESSION_ENGINE = SESSION_ENGINES[
+    os.environ.get("NOTEY_SESSION_ENGINE", "cached_db")
+]
+
+SESSION_CACHE_ALIAS = "sessions"
+
+# Looks logged in users up in the 'sessions' cache before the database (see
+# notey/backends.py).
+
+AUTHENTICATION_BACKENDS = ["notey.backends.CachedModelBackend"]
+
+# Seconds a logged in user is cached. Saving the user clears it sooner.
+
+NOTEY_USER_CACHE_TIMEOUT = 300
+
+# Background job queue (see notey/jobs.py and the run_jobs command): items
+# per chunk, failures in a row before a job is given up on, seconds before
+# the first retry (doubling after each failure), and seconds a worker holds
+# a job between chunks.
+
+NOTEY_JOB_BATCH_SIZE = 1000
+
+NOTEY_JOB_MAX_ATTEMPTS = 5
+
+NOTEY_JOB_RETRY_DELAY = 30
+
+NOTEY_JOB_LEASE = 300